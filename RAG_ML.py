@@ -1,10 +1,22 @@
+import argparse
+import glob
+import os
+import sys
+import time
 import numpy as np
 import random
 import joblib
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, mean_squared_error, r2_score
+from compiled_forest import CompiledForest
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+from rag_features import extract_features as extract_rag_features, extract_batch_features
 
 # ===============================
 # 1. Resource Allocation Graph Class
@@ -90,115 +102,230 @@ class ResourceAllocationGraph:
         return False, deadlock_percentage
 
     def extract_features(self):
-        rag = self
-        n_processes = len(rag.processes)
-        n_resources = len(rag.resources)
-        total_instances = sum(info['total'] for info in rag.resources.values())
-        total_allocated = sum(rag.allocations.values())
-        total_requested = sum(rag.requests.values())
-        n_allocation_edges = sum(1 for cnt in rag.allocations.values() if cnt > 0)
-        n_request_edges = sum(1 for cnt in rag.requests.values() if cnt > 0)
-
-        # Per-process allocation and request statistics
-        allocation_per_process = {p: sum(rag.allocations.get((p, r), 0) for r in rag.resources) for p in rag.processes}
-        request_per_process = {p: sum(rag.requests.get((p, r), 0) for r in rag.resources) for p in rag.processes}
-        avg_allocation = np.mean(list(allocation_per_process.values())) if n_processes > 0 else 0
-        avg_request = np.mean(list(request_per_process.values())) if n_processes > 0 else 0
-        max_allocation = max(allocation_per_process.values(), default=0)
-        max_request = max(request_per_process.values(), default=0)
-
-        # Resource utilization
-        utilization = [sum(rag.allocations.get((p, r), 0) for p in rag.processes) / info['total']
-                       for r, info in rag.resources.items()]
-        resource_utilization = np.mean(utilization) if utilization else 0
-
-        # Waiting edges (P1 -> P2 if P1 requests R and P2 holds R)
-        waiting_edges = set()
-        for r in rag.resources:
-            holders = [p for p in rag.processes if rag.allocations.get((p, r), 0) > 0]
-            requesters = [p for p in rag.processes if rag.requests.get((p, r), 0) > 0]
-            for p1 in requesters:
-                for p2 in holders:
-                    if p1 != p2:
-                        waiting_edges.add((p1, p2))
-        number_of_waiting_edges = len(waiting_edges)
-
-        # Processes with waiting relationships
-        outgoing_processes = set(p1 for (p1, p2) in waiting_edges)
-        incoming_processes = set(p2 for (p1, p2) in waiting_edges)
-        number_of_processes_with_outgoing_waiting_edges = len(outgoing_processes)
-        number_of_processes_with_incoming_waiting_edges = len(incoming_processes)
-        number_of_processes_with_both = len(outgoing_processes & incoming_processes)
-
-        # Holding and waiting processes
-        holding_processes = set(p for p in rag.processes if any(rag.allocations.get((p, r), 0) > 0 for r in rag.resources))
-        number_of_holding_processes = len(holding_processes)
-        number_of_waiting_processes = len(outgoing_processes)
-        both_waiting_and_holding = outgoing_processes & holding_processes
-        number_of_both_waiting_and_holding = len(both_waiting_and_holding)
-
-        # Resource contention features
-        fully_allocated_resources = sum(1 for r in rag.resources if rag.resources[r]['available'] == 0)
-        contested_resources = 0
-        total_contention = 0
-        max_contention = 0
-        for r in rag.resources:
-            sum_requests = sum(rag.requests.get((p, r), 0) for p in rag.processes)
-            available = rag.resources[r]['available']
-            if sum_requests > available:
-                contested_resources += 1
-                contention = sum_requests - available
-                total_contention += contention
-                max_contention = max(max_contention, contention)
-        average_contention = total_contention / contested_resources if contested_resources > 0 else 0
-        maximum_contention = max_contention
-
-        # Compile all 23 features into a list
-        features = [
-            n_processes, n_resources, total_instances, total_allocated, total_requested,
-            avg_allocation, avg_request, max_allocation, max_request,
-            n_allocation_edges, n_request_edges, resource_utilization,
-            number_of_waiting_edges, number_of_processes_with_outgoing_waiting_edges,
-            number_of_processes_with_incoming_waiting_edges, number_of_processes_with_both,
-            number_of_waiting_processes, number_of_holding_processes, number_of_both_waiting_and_holding,
-            fully_allocated_resources, contested_resources, average_contention, maximum_contention
-        ]
-        return features
+        return extract_rag_features(self)
 
 # ===============================
 # 2. Data Generation
 # ===============================
-def generate_dataset(n_samples=1000):
+def generate_sample(rng=random):
+    """
+    Build one random ResourceAllocationGraph and return its features and label
+
+    Args:
+        rng: Source of randomness, the ``random`` module or a ``random.Random``
+
+    Returns:
+        Tuple of the 23 features and 1 if the graph deadlocks, 0 otherwise
+    """
+    rag = ResourceAllocationGraph()
+    # Create a random number of processes and resources
+    n_proc = rng.randint(2, 10)
+    n_res = rng.randint(1, 5)
+    for i in range(n_proc):
+        rag.add_process(f"P{i}")
+    for j in range(n_res):
+        instances = rng.randint(1, 10)
+        rag.add_resource(f"R{j}", instances)
+    # Randomly assign allocations and requests (sorted, so a seeded rng
+    # gives the same graph regardless of set ordering)
+    for p in sorted(rag.processes, key=lambda name: int(name[1:])):
+        for r in list(rag.resources.keys()):
+            if rng.random() < 0.5:
+                max_alloc = rag.resources[r]['available']
+                if max_alloc > 0:
+                    alloc = rng.randint(1, max_alloc)
+                    rag.add_allocation(p, r, alloc)
+            if rng.random() < 0.5:
+                req = rng.randint(1, 3)
+                rag.add_request(p, r, req)
+    # Label: 1 if deadlock exists, 0 otherwise
+    safe, _ = rag.is_safe()
+    label = 0 if safe else 1
+    return rag.extract_features(), label
+
+def generate_dataset(n_samples=1000, rng=random):
     X, y = [], []
     for _ in range(n_samples):
-        rag = ResourceAllocationGraph()
-        # Create a random number of processes and resources
-        n_proc = random.randint(2, 10)
-        n_res = random.randint(1, 5)
-        for i in range(n_proc):
-            rag.add_process(f"P{i}")
-        for j in range(n_res):
-            instances = random.randint(1, 10)
-            rag.add_resource(f"R{j}", instances)
-        # Randomly assign allocations and requests
-        for p in list(rag.processes):
-            for r in list(rag.resources.keys()):
-                if random.random() < 0.5:
-                    max_alloc = rag.resources[r]['available']
-                    if max_alloc > 0:
-                        alloc = random.randint(1, max_alloc)
-                        rag.add_allocation(p, r, alloc)
-                if random.random() < 0.5:
-                    req = random.randint(1, 3)
-                    rag.add_request(p, r, req)
-        # Label: 1 if deadlock exists, 0 otherwise
-        safe, _ = rag.is_safe()
-        label = 0 if safe else 1
-        features = rag.extract_features()
+        features, label = generate_sample(rng)
         X.append(features)
         y.append(label)
     return X, y
 
+# Systems generated per tensor batch; bounds the B x P x R working memory
+GENERATION_BATCH = 8192
+
+def generate_batch(batch_size, rng, max_processes=10, max_resources=5):
+    """
+    Generate a batch of random systems as tensors
+
+    Follows the same distribution as generate_sample: 2..max_processes
+    processes, 1..max_resources resources with 1..10 instances, and each
+    process/resource pair gets an allocation of up to the remaining
+    instances and a request of 1..3 instances, each with probability 0.5.
+    Systems are padded to max_processes x max_resources.
+
+    Args:
+        batch_size: Number of systems B
+        rng: numpy.random.Generator
+        max_processes: Padded process dimension P
+        max_resources: Padded resource dimension R
+
+    Returns:
+        Dictionary of allocation and request (B x P x R), totals and
+        available (B x R) and process_mask (B x P) and resource_mask (B x R)
+    """
+    n_proc = rng.integers(2, max_processes + 1, batch_size)
+    n_res = rng.integers(1, max_resources + 1, batch_size)
+    process_mask = np.arange(max_processes) < n_proc[:, None]
+    resource_mask = np.arange(max_resources) < n_res[:, None]
+    totals = rng.integers(1, 11, (batch_size, max_resources)) * resource_mask
+
+    # Allocations depend on what earlier processes took, so walk the
+    # processes in order; each step covers the whole batch at once
+    available = totals.copy()
+    allocation = np.zeros((batch_size, max_processes, max_resources), dtype=np.int64)
+    for p in range(max_processes):
+        allocate = (rng.random((batch_size, max_resources)) < 0.5) & process_mask[:, p, None] & (available > 0)
+        amount = (rng.random((batch_size, max_resources)) * available).astype(np.int64) + 1
+        allocation[:, p] = np.where(allocate, amount, 0)
+        available -= allocation[:, p]
+
+    real = process_mask[:, :, None] & resource_mask[:, None, :]
+    wanted = (rng.random((batch_size, max_processes, max_resources)) < 0.5) & real
+    request = np.where(wanted, rng.integers(1, 4, (batch_size, max_processes, max_resources)), 0)
+
+    return {
+        "allocation": allocation,
+        "request": request,
+        "totals": totals,
+        "available": available,
+        "process_mask": process_mask,
+        "resource_mask": resource_mask
+    }
+
+def detect_deadlocks_batch(allocation, request, available, process_mask):
+    """
+    Run the deadlock-detection reduction on a batch of systems at once
+
+    Every pass finishes, in all systems together, each process whose
+    requests fit in the work vector and returns its allocation; the
+    passes stop when no system makes progress. This reaches the same fixed
+    point as ResourceAllocationGraph.detect_deadlock.
+
+    Args:
+        allocation: B x P x R held instances
+        request: B x P x R requested instances
+        available: B x R free instances
+        process_mask: B x P, True for real processes
+
+    Returns:
+        B x P boolean array of deadlocked processes
+    """
+    finish = ~np.asarray(process_mask, dtype=bool)
+    work = np.array(available, dtype=np.int64)
+    for _ in range(finish.shape[1]):
+        can_finish = ~finish & (request <= work[:, None, :]).all(axis=2)
+        if not can_finish.any():
+            break
+        work += (allocation * can_finish[:, :, None]).sum(axis=1)
+        finish |= can_finish
+    return ~finish
+
+def generate_labelled_batch(batch_size, rng):
+    """
+    Generate a batch of systems and return their features and deadlock labels
+
+    Args:
+        batch_size: Number of samples
+        rng: numpy.random.Generator
+
+    Returns:
+        Tuple of the B x 23 feature matrix and the int8 labels
+    """
+    batch = generate_batch(batch_size, rng)
+    deadlocked = detect_deadlocks_batch(batch["allocation"], batch["request"], batch["available"], batch["process_mask"])
+    X = extract_batch_features(batch["allocation"], batch["request"], batch["totals"],
+                               batch["process_mask"], batch["resource_mask"])
+    return X, deadlocked.any(axis=1).astype(np.int8)
+
+def shard_path(out_dir, shard):
+    return os.path.join(out_dir, f"shard-{shard:05d}.npz")
+
+def _generate_shard(task):
+    """Generate one shard in a worker process; returns its sample count"""
+    out_dir, shard, n_samples, seed = task
+    # Each shard has its own seed, so the data does not depend on how many
+    # workers there are or which worker picked up the shard
+    rng = np.random.default_rng([seed, shard])
+    batches = [generate_labelled_batch(min(GENERATION_BATCH, n_samples - start), rng)
+               for start in range(0, n_samples, GENERATION_BATCH)]
+    X = np.concatenate([X for X, _ in batches])
+    y = np.concatenate([y for _, y in batches])
+    path = shard_path(out_dir, shard)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, X=X, y=y)
+    os.replace(tmp_path, path)
+    return n_samples
+
+def generate_shards(n_samples, out_dir="rag_dataset", shard_size=10000, workers=None, seed=0):
+    """
+    Generate a dataset in parallel as sharded .npz files
+
+    Shards are written under a temporary name and renamed when complete, so
+    an interrupted run can be resumed by calling this again with the same
+    arguments: shards that already exist are skipped.
+
+    Args:
+        n_samples: Total number of samples
+        out_dir: Directory for the shard-NNNNN.npz files (arrays X and y)
+        shard_size: Samples per shard
+        workers: Worker processes, one per CPU if omitted
+        seed: Base seed; the same seed reproduces the same shards
+
+    Returns:
+        Dictionary with the shard paths, samples generated in this run and samples per second
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    n_shards = -(-n_samples // shard_size)
+    tasks = []
+    for shard in range(n_shards):
+        size = min(shard_size, n_samples - shard * shard_size)
+        if not os.path.exists(shard_path(out_dir, shard)):
+            tasks.append((out_dir, shard, size, seed))
+
+    start = time.perf_counter()
+    generated = 0
+    if tasks:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+            for count in pool.map(_generate_shard, tasks):
+                generated += count
+                elapsed = time.perf_counter() - start
+                print(f"{generated}/{sum(t[2] for t in tasks)} samples, {generated / elapsed:.0f} samples/s")
+    elapsed = time.perf_counter() - start
+
+    return {
+        "shards": [shard_path(out_dir, shard) for shard in range(n_shards)],
+        "generated": generated,
+        "skipped": n_shards - len(tasks),
+        "seconds": elapsed,
+        "samples_per_second": generated / elapsed if generated else 0.0
+    }
+
+def load_shards(paths):
+    """Yield (X, y) for each shard file in turn"""
+    for path in paths:
+        with np.load(path) as data:
+            yield data["X"], data["y"]
+
+def peak_memory_bytes():
+    """Peak resident memory of this process in bytes, or None where unavailable"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
 # ===============================
 # 3. Model: DeadlockPredictor
 # ===============================
@@ -217,11 +344,80 @@ class DeadlockPredictor:
         print(f"R\u00b2 Score: {r2}")
         print(f"Accuracy: {accuracy:.2f}%")
 
+    def train_on_shards(self, paths, trees_per_shard=10, checkpoint="rag_training_checkpoint.joblib"):
+        """
+        Train on a sharded dataset without loading it all into memory
+
+        Shards are read one at a time. The forest is warm-started: each shard
+        adds trees_per_shard trees fitted on that shard only, so memory is
+        bounded by one shard. Before a shard is learned it is scored with the
+        forest so far, which gives a held-out accuracy without a separate
+        test set. After each shard the model is checkpointed with the list of
+        shards, and a run over the same shards continues after the ones it
+        already learned; a checkpoint for other shards is ignored. The
+        checkpoint is deleted once every shard has been learned.
+
+        Args:
+            paths: Shard files from generate_shards, in training order
+            trees_per_shard: Trees added per shard
+            checkpoint: Checkpoint file, or None to disable checkpointing
+
+        Returns:
+            Dictionary with samples trained, samples per second, peak memory
+            (bytes, None where unavailable) and the accuracy on unseen shards
+        """
+        shards = [os.path.abspath(path) for path in paths]
+        done = 0
+        if checkpoint and os.path.exists(checkpoint):
+            state = joblib.load(checkpoint)
+            if state.get("shards") == shards:
+                self.model, done = state["model"], state["shards_done"]
+                print(f"Resuming after {done} shards from {checkpoint}")
+            else:
+                print(f"Ignoring {checkpoint}: it was written for different shards")
+        if done == 0:
+            self.model = RandomForestClassifier(n_estimators=0, random_state=42)
+        self.model.set_params(warm_start=True)
+
+        trained, correct, scored = 0, 0, 0
+        start = time.perf_counter()
+        for shard, (X, y) in enumerate(load_shards(paths[done:]), start=done):
+            if len(np.unique(y)) < 2:
+                # Trees need both classes to share the forest's class list
+                print(f"Skipping shard {shard}: only one class")
+                continue
+            if len(getattr(self.model, "estimators_", [])) > 0:
+                correct += int((self.model.predict(X) == y).sum())
+                scored += len(y)
+            self.model.set_params(n_estimators=len(getattr(self.model, "estimators_", [])) + trees_per_shard)
+            self.model.fit(X, y)
+            trained += len(y)
+            if checkpoint:
+                tmp_path = f"{checkpoint}.tmp"
+                joblib.dump({"model": self.model, "shards_done": shard + 1, "shards": shards}, tmp_path)
+                os.replace(tmp_path, checkpoint)
+            elapsed = time.perf_counter() - start
+            print(f"Shard {shard + 1}/{len(paths)}: {len(self.model.estimators_)} trees, "
+                  f"{trained / elapsed:.0f} samples/s")
+        elapsed = time.perf_counter() - start
+        if checkpoint and os.path.exists(checkpoint):
+            os.remove(checkpoint)
+
+        return {
+            "samples": trained,
+            "trees": len(getattr(self.model, "estimators_", [])),
+            "samples_per_second": trained / elapsed if trained else 0.0,
+            "peak_memory_bytes": peak_memory_bytes(),
+            "unseen_shard_accuracy": correct / scored * 100 if scored else None
+        }
+
     def predict(self, X):
         return self.model.predict(X)
 
-    def save_model(self, filename="rag_deadlock_model.joblib"):
+    def save_model(self, filename="rag_deadlock_model.joblib", compiled_filename="rag_deadlock_model.npz"):
         joblib.dump(self.model, filename)
+        # NumPy-only copy used by the desktop simulator for fast predictions
+        CompiledForest.from_sklearn(self.model).save(compiled_filename)
 
     def load_model(self, filename="rag_deadlock_model.joblib"):
         self.model = joblib.load(filename)
@@ -230,7 +426,33 @@ class DeadlockPredictor:
 # 4. Main Execution
 # ===============================
 if __name__ == "__main__":
-    X, y = generate_dataset(n_samples=1000)
-    predictor = DeadlockPredictor()
-    predictor.train(X, y)
-    #predictor.save_model()
+    parser = argparse.ArgumentParser(description="Generate RAG deadlock data and train the predictor")
+    parser.add_argument("--samples", type=int, default=1000, help="number of graphs to generate")
+    parser.add_argument("--out", help="write the dataset as .npz shards to this directory instead of training")
+    parser.add_argument("--shard-size", type=int, default=10000, help="graphs per shard")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--seed", type=int, default=0, help="base seed for the shards")
+    parser.add_argument("--train-shards", metavar="DIR", help="train out-of-core on the shards in this directory")
+    parser.add_argument("--trees-per-shard", type=int, default=10, help="trees added per shard")
+    args = parser.parse_args()
+
+    if args.train_shards:
+        predictor = DeadlockPredictor()
+        result = predictor.train_on_shards(sorted(glob.glob(os.path.join(args.train_shards, "shard-*.npz"))),
+                                           args.trees_per_shard)
+        peak = result["peak_memory_bytes"]
+        print(f"Trained {result['trees']} trees on {result['samples']} samples "
+              f"at {result['samples_per_second']:.0f} samples/s"
+              + (f", peak memory {peak / 2**20:.0f} MiB" if peak else ""))
+        if result["unseen_shard_accuracy"] is not None:
+            print(f"Accuracy on unseen shards: {result['unseen_shard_accuracy']:.2f}%")
+        predictor.save_model()
+    elif args.out:
+        result = generate_shards(args.samples, args.out, args.shard_size, args.workers, args.seed)
+        print(f"Generated {result['generated']} samples ({result['skipped']} shards already present) "
+              f"at {result['samples_per_second']:.0f} samples/s")
+    else:
+        X, y = generate_dataset(n_samples=args.samples)
+        predictor = DeadlockPredictor()
+        predictor.train(X, y)
+        #predictor.save_model()
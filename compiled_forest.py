@@ -0,0 +1,220 @@
+from typing import Any, Callable, Dict, Optional, Tuple
+import numpy as np
+
+# Marks leaves in the flattened feature array
+LEAF = -1
+
+class CompiledForest:
+    """
+    A tree ensemble flattened into contiguous NumPy arrays
+    
+    Every tree's nodes are stored back to back, with child indices rewritten
+    to point into the shared arrays, so a batch of rows is routed through all
+    trees at once with a handful of vectorized steps per tree level. Only
+    NumPy is needed at prediction time; scikit-learn is only used to compile.
+    """
+    
+    def __init__(self,
+                 feature: np.ndarray,
+                 threshold: np.ndarray,
+                 left: np.ndarray,
+                 right: np.ndarray,
+                 value: np.ndarray,
+                 roots: np.ndarray,
+                 max_depth: int,
+                 n_features: int,
+                 classes: Optional[np.ndarray] = None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.n_features_in_ = int(n_features)
+        self.classes_ = classes
+    
+    @classmethod
+    def from_sklearn(cls, model: Any) -> "CompiledForest":
+        """
+        Flatten a fitted scikit-learn random forest or extra-trees ensemble
+        
+        Args:
+            model: Fitted single-output forest classifier or regressor
+        
+        Returns:
+            The compiled forest
+        """
+        estimators = getattr(model, "estimators_", None)
+        if not estimators or not hasattr(estimators[0], "tree_"):
+            raise ValueError(f"Cannot compile {type(model).__name__}: not a fitted tree ensemble")
+        if getattr(model, "n_outputs_", 1) != 1:
+            raise ValueError("Only single-output forests can be compiled")
+        
+        is_classifier = hasattr(model, "classes_")
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for estimator in estimators:
+            tree = estimator.tree_
+            is_leaf = tree.children_left == -1
+            features.append(np.where(is_leaf, LEAF, tree.feature))
+            thresholds.append(tree.threshold)
+            lefts.append(np.where(is_leaf, -1, tree.children_left + offset))
+            rights.append(np.where(is_leaf, -1, tree.children_right + offset))
+            value = tree.value[:, 0, :]
+            if is_classifier:
+                # Per-tree class probabilities, as DecisionTreeClassifier.predict_proba
+                totals = value.sum(axis=1, keepdims=True)
+                value = value / np.where(totals == 0, 1, totals)
+            values.append(value)
+            roots.append(offset)
+            offset += tree.node_count
+            max_depth = max(max_depth, tree.max_depth)
+        
+        return cls(
+            feature=np.concatenate(features).astype(np.int32),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            left=np.concatenate(lefts).astype(np.int32),
+            right=np.concatenate(rights).astype(np.int32),
+            value=np.concatenate(values).astype(np.float64),
+            roots=np.asarray(roots, dtype=np.int32),
+            max_depth=max_depth,
+            n_features=model.n_features_in_,
+            classes=np.asarray(model.classes_) if is_classifier else None
+        )
+    
+    @property
+    def is_classifier(self) -> bool:
+        return self.classes_ is not None
+    
+    def apply(self, X: Any) -> np.ndarray:
+        """
+        Return the leaf reached in every tree for every row
+        
+        Args:
+            X: Feature matrix of shape (n_samples, n_features)
+        
+        Returns:
+            Array of node indices of shape (n_samples, n_trees)
+        """
+        return self._route(np.asarray(X, dtype=np.float32))
+    
+    def _route(self, X: np.ndarray, on_step: Optional[Callable] = None) -> np.ndarray:
+        # Trees were fitted on float32 inputs, so compare in that precision
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Expected rows of {self.n_features_in_} features, got shape {X.shape}")
+        
+        nodes = np.tile(self.roots, (X.shape[0], 1))
+        rows = np.broadcast_to(np.arange(X.shape[0])[:, None], nodes.shape)
+        for _ in range(self.max_depth):
+            feature = self.feature[nodes]
+            internal = feature != LEAF
+            if not internal.any():
+                break
+            go_left = X[rows, np.where(internal, feature, 0)] <= self.threshold[nodes]
+            children = np.where(internal, np.where(go_left, self.left[nodes], self.right[nodes]), nodes)
+            if on_step is not None:
+                on_step(nodes[internal], children[internal], feature[internal], rows[internal])
+            nodes = children
+        return nodes
+    
+    def attributions(self, X: Any, output: int = -1) -> Tuple[float, np.ndarray]:
+        """
+        Split each prediction into a base value plus one contribution per feature
+        
+        Every split on a row's path moves the tree output from the parent
+        node's value to the child's; the change is credited to the feature
+        split on. Averaged over trees, the base value plus a row's
+        contributions equals its prediction exactly. The cost is one
+        vectorized step per tree level, the same as prediction.
+        
+        Args:
+            X: Feature matrix of shape (n_samples, n_features)
+            output: Column of the tree values to explain, by default the
+                positive class of a classifier (the only output of a regressor)
+            
+        Returns:
+            Tuple of the base value and contributions of shape (n_samples, n_features)
+        """
+        X = np.asarray(X, dtype=np.float32)
+        node_value = self.value[:, output]
+        n_trees = len(self.roots)
+        contributions = np.zeros((len(X), self.n_features_in_))
+        
+        self._route(X, lambda parent, child, feature, rows: np.add.at(
+            contributions, (rows, feature), (node_value[child] - node_value[parent]) / n_trees
+        ))
+        return float(node_value[self.roots].mean()), contributions
+    
+    def predict_proba(self, X: Any) -> np.ndarray:
+        """Class probabilities averaged over the trees, as the scikit-learn forest computes them"""
+        if not self.is_classifier:
+            raise AttributeError("predict_proba is only available for classifiers")
+        return self.value[self.apply(X)].mean(axis=1)
+    
+    def predict(self, X: Any) -> np.ndarray:
+        """Predicted class for classifiers, or the mean tree output for regressors"""
+        averaged = self.value[self.apply(X)].mean(axis=1)
+        if self.is_classifier:
+            return self.classes_[averaged.argmax(axis=1)]
+        return averaged[:, 0]
+    
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """Return the flattened arrays and metadata by name, as stored by save"""
+        arrays = {
+            "feature": self.feature,
+            "threshold": self.threshold,
+            "left": self.left,
+            "right": self.right,
+            "value": self.value,
+            "roots": self.roots,
+            "max_depth": np.asarray(self.max_depth),
+            "n_features": np.asarray(self.n_features_in_)
+        }
+        if self.classes_ is not None:
+            arrays["classes"] = self.classes_
+        return arrays
+    
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> "CompiledForest":
+        """Rebuild a compiled forest from the arrays returned by ``arrays``"""
+        return cls(
+            feature=arrays["feature"],
+            threshold=arrays["threshold"],
+            left=arrays["left"],
+            right=arrays["right"],
+            value=arrays["value"],
+            roots=arrays["roots"],
+            max_depth=int(arrays["max_depth"]),
+            n_features=int(arrays["n_features"]),
+            classes=arrays["classes"] if "classes" in arrays else None
+        )
+    
+    def save(self, file: Any) -> None:
+        """Write the forest to an .npz file path or binary file object"""
+        np.savez(file, **self.arrays())
+    
+    @classmethod
+    def load(cls, file: Any) -> "CompiledForest":
+        """Read a forest written by save"""
+        with np.load(file, allow_pickle=False) as data:
+            return cls.from_arrays({name: data[name] for name in data.files})
+
+def compile_model(model: Any) -> Any:
+    """
+    Compile a model into a CompiledForest when possible
+    
+    Args:
+        model: A fitted model
+    
+    Returns:
+        The compiled forest, or the model unchanged if it is not a supported ensemble
+    """
+    if isinstance(model, CompiledForest):
+        return model
+    try:
+        return CompiledForest.from_sklearn(model)
+    except ValueError:
+        return model
@@ -0,0 +1,25 @@
+import argparse
+import json
+from models.lock_importers import LOCK_FORMATS, import_lock_dump
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import a lock dump into a resource allocation graph")
+    parser.add_argument("path", help="/proc/locks snapshot, pg_locks CSV export or JVM thread dump")
+    parser.add_argument("--format", choices=["auto", *LOCK_FORMATS], default="auto", help="Format of the dump")
+    parser.add_argument("--output", help="Write the graph as JSON to this file")
+    args = parser.parse_args()
+    
+    with open(args.path, encoding="utf-8", errors="replace", newline="") as f:
+        result = import_lock_dump(f, args.format)
+    
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result["graph"].model_dump(), f)
+    
+    print(f"{result['rows']} {result['format']} rows in {result['seconds']:.2f}s: "
+          f"{result['processes']} processes, {result['resources']} resources")
+    deadlocked = result["deadlockedProcesses"]
+    if deadlocked:
+        print(f"Deadlocked: {', '.join(deadlocked)}")
+    else:
+        print("No deadlock")
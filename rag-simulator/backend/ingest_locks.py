@@ -0,0 +1,26 @@
+import argparse
+import json
+import time
+from models.lock_traces import MAX_PROCESSES, LiveRAG, ingest
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Detect deadlocks in a JSONL lock trace as it is written")
+    parser.add_argument("path", help="JSONL file of acquire/release/wait/exit events")
+    parser.add_argument("--follow", action="store_true", help="Keep reading as the file grows")
+    parser.add_argument("--max-processes", type=int, default=MAX_PROCESSES,
+                        help="Processes tracked at once before the least recently active is evicted")
+    args = parser.parse_args()
+    
+    rag = LiveRAG(args.max_processes)
+    start = time.perf_counter()
+    try:
+        for alert in ingest(args.path, rag, follow=args.follow):
+            print(json.dumps(alert), flush=True)
+    except KeyboardInterrupt:
+        pass
+    elapsed = time.perf_counter() - start
+    
+    stats = rag.stats
+    print(f"{stats['events']} events ({stats['malformed']} malformed) in {elapsed:.2f}s, "
+          f"{stats['events'] / elapsed:.0f} events/s; {stats['deadlocks']} deadlocks, "
+          f"{stats['evicted']} processes evicted")
@@ -1,22 +1,41 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from pydantic import BaseModel
 from typing import List, Dict, Optional, Any, Union
 import networkx as nx
 import numpy as np
 import json
+import io
 import os
 import logging
 from datetime import datetime
 import joblib
+import asyncio
 from pathlib import Path
 
 # Import modules
 from models.graph import Graph, Node, Edge
 from models.deadlock import detect_deadlock, check_resource_request
 from models.bankers import run_bankers_algorithm, check_safety
-from models.ml_prediction import predict_deadlock, train_model
+from models.ml_prediction import (
+    predict_deadlock, active_feature_set, prediction_model_signature, model_holders, FEATURE_SETS
+)
+from models.monte_carlo import estimate_deadlock_probability, DEFAULT_TRIALS, DEFAULT_TIME_BUDGET
+from models.simulation import run_simulation
+from models.trace_format import run_recorded_simulation, trace_step
+from models.lock_traces import lock_trace_watcher
+from models.lock_importers import import_lock_dump
+from models.model_registry import model_registry
+from models.online_learning import record_labelled_graph, recent_updates, online_updates, MIN_UPDATE_ROWS
 from models.language_parser import parse_language_to_graph, validate_syntax
+from models.sessions import session_store
+from models.analysis import analyze_graph
+from models.batch import detect_deadlock_batch, predict_deadlock_batch
+from models.serialization import FastJSONResponse
+from models.parallel import shutdown_process_pool
+from models.training_jobs import training_jobs, TooManyTrainingJobs
+from models.training_data import save_upload, prepare_training_file, remove_training_files
 
 # Setup logging
 logging.basicConfig(
@@ -35,7 +54,7 @@ Path("data/temp").mkdir(exist_ok=True)
 Path("data/models").mkdir(exist_ok=True)
 Path("data/feedback").mkdir(exist_ok=True)
 
-app = FastAPI(title="Resource Allocation Graph Simulator API")
+app = FastAPI(title="Resource Allocation Graph Simulator API", default_response_class=FastJSONResponse)
 
 # Configure CORS
 app.add_middleware(
@@ -46,13 +65,50 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress responses larger than this many bytes; a mid compression level
+# keeps most of the size reduction at a fraction of the level-9 CPU cost
+GZIP_MINIMUM_SIZE = 1024
+GZIP_COMPRESS_LEVEL = 5
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MINIMUM_SIZE, compresslevel=GZIP_COMPRESS_LEVEL)
+
 # API version
 API_VERSION = "1.0.0"
 
+# Load the prediction models once at startup instead of on first request
+@app.on_event("startup")
+async def load_prediction_model():
+    for holder in model_holders.values():
+        holder.get()
+
+# Learn from labelled graphs in the background while the server runs
+@app.on_event("startup")
+async def start_online_updates():
+    online_updates.start()
+
+# Follow a lock trace file for live deadlock detection when one is configured
+@app.on_event("startup")
+async def start_lock_trace_watcher():
+    path = os.environ.get("LOCK_TRACE_PATH")
+    if path:
+        lock_trace_watcher.start(path)
+
+# Stop the batch worker processes with the server
+@app.on_event("shutdown")
+async def stop_process_pool():
+    shutdown_process_pool()
+
+@app.on_event("shutdown")
+async def stop_online_updates():
+    online_updates.stop()
+
+@app.on_event("shutdown")
+async def stop_lock_trace_watcher():
+    lock_trace_watcher.stop()
+
 # Health check endpoint
 @app.get("/api/health")
 async def health_check():
-    return {"status": "ok", "version": API_VERSION}
+    return {"status": "ok", "version": API_VERSION, "predictionFeatureSet": active_feature_set()}
 
 # Deadlock detection endpoint
 @app.post("/api/detect-deadlock")
@@ -65,6 +121,21 @@ async def api_detect_deadlock(graph_data: Dict[str, Any]):
         logger.error(f"Error in deadlock detection: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# Batch deadlock detection endpoint
+@app.post("/api/batch/detect-deadlock")
+async def api_batch_detect_deadlock(batch_data: Dict[str, Any]):
+    try:
+        graphs = batch_data.get("graphs", [])
+        chunk_size = batch_data.get("chunkSize")
+        loop = asyncio.get_running_loop()
+        results = await loop.run_in_executor(None, detect_deadlock_batch, graphs, chunk_size)
+        return {"results": results}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error in batch deadlock detection: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 # Banker's algorithm endpoint
 @app.post("/api/bankers-algorithm")
 async def api_bankers_algorithm(state_data: Dict[str, Any]):
@@ -122,16 +193,300 @@ async def api_predict_deadlock(graph_data: Dict[str, Any]):
         logger.error(f"Error in deadlock prediction: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-# Train ML model endpoint
+# Monte Carlo deadlock probability endpoint; simulates random interleavings
+# of the processes' future requests
+@app.post("/api/estimate-deadlock-probability")
+async def api_estimate_deadlock_probability(estimate_data: Dict[str, Any]):
+    try:
+        graph = Graph(**estimate_data.get("graph", {}))
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(
+            None,
+            lambda: estimate_deadlock_probability(
+                graph,
+                estimate_data.get("patterns"),
+                trials=estimate_data.get("trials", DEFAULT_TRIALS),
+                time_budget=estimate_data.get("timeBudget", DEFAULT_TIME_BUDGET),
+                confidence=estimate_data.get("confidence", 0.95),
+                seed=estimate_data.get("seed")
+            )
+        )
+        return result
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error in deadlock probability estimation: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Discrete-event simulation endpoint
+@app.post("/api/simulate")
+async def api_simulate(simulation_data: Dict[str, Any]):
+    try:
+        loop = asyncio.get_running_loop()
+        run = run_recorded_simulation if simulation_data.get("saveTrace") else run_simulation
+        result = await loop.run_in_executor(None, run, simulation_data)
+        return result
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error in simulation: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Saved simulation trace endpoint; returns the graph at any step
+@app.get("/api/traces/{trace_id}")
+async def api_trace_step(trace_id: str, step: int = 0):
+    try:
+        return trace_step(trace_id, step)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error reading trace: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Fused analysis pipeline endpoint
+@app.post("/api/analyze")
+async def api_analyze(graph_data: Dict[str, Any]):
+    try:
+        graph = Graph(**graph_data)
+        result = analyze_graph(graph)
+        return result
+    except Exception as e:
+        logger.error(f"Error in graph analysis: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Batch ML prediction endpoint
+@app.post("/api/batch/predict-deadlock")
+async def api_batch_predict_deadlock(batch_data: Dict[str, Any]):
+    try:
+        graphs = batch_data.get("graphs", [])
+        chunk_size = batch_data.get("chunkSize")
+        loop = asyncio.get_running_loop()
+        results = await loop.run_in_executor(None, predict_deadlock_batch, graphs, chunk_size)
+        return {"results": results}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error in batch deadlock prediction: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Train ML model endpoint; training runs as a background job
 @app.post("/api/train-model")
 async def api_train_model(training_data: Dict[str, Any]):
     try:
-        model_info = train_model(training_data)
-        return model_info
+        job = training_jobs.submit(training_data)
+        return job.to_dict()
+    except TooManyTrainingJobs as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error training model: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# Train ML model from an uploaded .csv or .npz file, streamed to disk
+@app.post("/api/train-model/upload")
+async def api_train_model_upload(file: UploadFile = File(...), feature_set: str = Form("v1")):
+    try:
+        if feature_set not in FEATURE_SETS:
+            raise ValueError(f"Unknown feature set: {feature_set}")
+        path = await save_upload(file)
+        loop = asyncio.get_running_loop()
+        training_data = await loop.run_in_executor(
+            None, prepare_training_file, path, feature_set, FEATURE_SETS[feature_set]
+        )
+        try:
+            job = training_jobs.submit(training_data)
+        except Exception:
+            remove_training_files(training_data)
+            raise
+        return job.to_dict()
+    except TooManyTrainingJobs as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error training model from upload: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+# List training jobs endpoint
+@app.get("/api/train-model/jobs")
+async def api_list_training_jobs():
+    return {"jobs": [job.to_dict() for job in training_jobs.list()]}
+
+# Training job status endpoint
+@app.get("/api/train-model/jobs/{job_id}")
+async def api_get_training_job(job_id: str):
+    try:
+        return training_jobs.get(job_id).to_dict()
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+# Cancel training job endpoint
+@app.delete("/api/train-model/jobs/{job_id}")
+async def api_cancel_training_job(job_id: str):
+    try:
+        job = training_jobs.get(job_id)
+        # Cancelling may wait for a worker that is saving its model
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, job.cancel)
+        return job.to_dict()
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+def _require_feature_set(feature_set: str) -> None:
+    if feature_set not in FEATURE_SETS:
+        raise HTTPException(status_code=404, detail=f"Unknown feature set: {feature_set}")
+
+# List model versions endpoint
+@app.get("/api/models/{feature_set}/versions")
+async def api_list_model_versions(feature_set: str):
+    _require_feature_set(feature_set)
+    return {"featureSet": feature_set, "versions": model_registry.list_versions(feature_set)}
+
+# Activate model version endpoint
+@app.post("/api/models/{feature_set}/activate")
+async def api_activate_model_version(feature_set: str, activate_data: Dict[str, Any]):
+    _require_feature_set(feature_set)
+    try:
+        model_registry.activate(feature_set, activate_data.get("version"))
+        # Swap the model in this worker now; the others follow on their next request
+        model_holders[feature_set].get()
+        return {"featureSet": feature_set, "activeVersion": model_registry.active_version(feature_set)}
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except (TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+# Roll back model version endpoint
+@app.post("/api/models/{feature_set}/rollback")
+async def api_rollback_model_version(feature_set: str):
+    _require_feature_set(feature_set)
+    try:
+        version = model_registry.rollback(feature_set)
+        model_holders[feature_set].get()
+        return {"featureSet": feature_set, "activeVersion": version}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+# Submit labelled graph endpoint; the models learn from it off the request path
+@app.post("/api/labelled-graphs")
+async def api_submit_labelled_graph(labelled_data: Dict[str, Any]):
+    try:
+        graph = Graph(**labelled_data.get("graph", {}))
+        # Extracting the v1 features enumerates cycles, so keep it off the event loop
+        loop = asyncio.get_running_loop()
+        pending = await loop.run_in_executor(None, record_labelled_graph, graph, labelled_data.get("label"))
+        if max(pending.values()) >= MIN_UPDATE_ROWS:
+            online_updates.trigger()
+        return {"status": "success", "pendingRows": pending}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error recording labelled graph: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Online model update history endpoint
+@app.get("/api/online-updates")
+async def api_online_updates():
+    return {"updates": recent_updates()}
+
+# Live lock trace status endpoint: counters, recent deadlock alerts and the live graph
+@app.get("/api/lock-traces/status")
+async def api_lock_trace_status():
+    return lock_trace_watcher.status()
+
+# Create graph session endpoint
+@app.post("/api/sessions")
+async def api_create_session(graph_data: Dict[str, Any]):
+    try:
+        session = session_store.create(Graph(**graph_data))
+        return {"sessionId": session.id, "version": session.version}
+    except Exception as e:
+        logger.error(f"Error creating session: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Import a /proc/locks, pg_locks CSV or JVM thread dump into a new graph session
+@app.post("/api/sessions/import-locks")
+async def api_import_locks(file: UploadFile = File(...), lock_format: str = Form("auto")):
+    try:
+        lines = io.TextIOWrapper(file.file, encoding="utf-8", errors="replace", newline="")
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(None, import_lock_dump, lines, lock_format)
+        session = session_store.create(result.pop("graph"))
+        return {"sessionId": session.id, "version": session.version, **result}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error importing lock dump: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Get graph session endpoint
+@app.get("/api/sessions/{session_id}")
+async def api_get_session(session_id: str):
+    try:
+        session = session_store.get(session_id)
+        return {"sessionId": session.id, **session.snapshot()}
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error getting session: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Apply graph edits endpoint
+@app.post("/api/sessions/{session_id}/edits")
+async def api_edit_session(session_id: str, edit_data: Dict[str, Any]):
+    try:
+        session = session_store.get(session_id)
+        version = session.apply(edit_data.get("operations", []))
+        return {"sessionId": session.id, "version": version}
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error editing session: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Session deadlock detection endpoint
+@app.get("/api/sessions/{session_id}/detect-deadlock")
+async def api_session_detect_deadlock(session_id: str):
+    try:
+        session = session_store.get(session_id)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, session.analysis, "detect-deadlock", detect_deadlock)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error in session deadlock detection: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Session ML prediction endpoint
+@app.get("/api/sessions/{session_id}/predict-deadlock")
+async def api_session_predict_deadlock(session_id: str):
+    try:
+        session = session_store.get(session_id)
+        loop = asyncio.get_running_loop()
+        # Keyed by the model too, so a reload or activation is picked up
+        return await loop.run_in_executor(
+            None, lambda: session.analysis("predict-deadlock", predict_deadlock, prediction_model_signature())
+        )
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error in session deadlock prediction: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Delete graph session endpoint
+@app.delete("/api/sessions/{session_id}")
+async def api_delete_session(session_id: str):
+    try:
+        session_store.delete(session_id)
+        return {"status": "success"}
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
 # Save temporary graph endpoint
 @app.post("/api/save-temp-graph")
 async def api_save_temp_graph(graph_data: Dict[str, Any]):
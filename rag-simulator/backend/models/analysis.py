@@ -0,0 +1,53 @@
+from typing import Dict, Any
+import time
+import networkx as nx
+from .graph import Graph
+from .deadlock import detect_deadlock
+from .bankers import check_safety, graph_to_state
+from .ml_prediction import extract_features, extract_structural_features, predict_from_features, active_feature_set
+
+def analyze_graph(graph: Graph) -> Dict[str, Any]:
+    """
+    Run detection, Banker's reduction, feature extraction and ML prediction as one pipeline
+    
+    The NetworkX conversion, cycle enumeration and Banker's state are computed
+    once and shared by every stage instead of being rebuilt per analysis.
+    
+    Args:
+        graph: The resource allocation graph
+        
+    Returns:
+        Dictionary with the result of every stage and per-stage timings in milliseconds
+    """
+    timings = {}
+    
+    def timed(stage, compute):
+        start = time.perf_counter()
+        result = compute()
+        timings[stage] = (time.perf_counter() - start) * 1000
+        return result
+    
+    G = timed("convert", graph.to_networkx)
+    cycles = timed("cycles", lambda: list(nx.simple_cycles(G)))
+    state = timed("state", lambda: graph_to_state(graph))
+    safety = timed("bankers", lambda: check_safety(state))
+    detection = timed("detection", lambda: detect_deadlock(graph, G=G, cycles=cycles, state=state, safety=safety))
+    feature_set = active_feature_set()
+    if feature_set == "v2":
+        features = timed("features", lambda: extract_structural_features(graph, G=G))
+    else:
+        features = timed("features", lambda: extract_features(graph, G=G, cycles=cycles))
+    prediction = timed("prediction", lambda: predict_from_features(features, feature_set))
+    timings["total"] = sum(timings.values())
+    
+    return {
+        "detection": detection,
+        "bankers": {
+            "isSafe": safety["isSafe"],
+            "safeSequence": [state["processIds"][i] for i in safety["safeSequence"]] if safety["isSafe"] else None,
+            "deadlocked": [state["processIds"][i] for i in safety["deadlocked"]],
+            "explanation": safety["explanation"]
+        },
+        "prediction": prediction,
+        "timings": timings
+    }
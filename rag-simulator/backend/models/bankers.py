@@ -1,11 +1,13 @@
 from typing import Dict, List, Any
+from .graph import Graph
 
 def check_safety(state: Dict[str, Any]) -> Dict[str, Any]:
     """
     Check if a system state is safe using the Banker's Algorithm
     
     Args:
-        state: System state with available resources, allocation matrix, and need matrix
+        state: System state with available resources, allocation matrix, and need matrix,
+            and optionally the "processIds" used to name processes in the explanation
         
     Returns:
         Dictionary with safety information
@@ -16,6 +18,10 @@ def check_safety(state: Dict[str, Any]) -> Dict[str, Any]:
     available = state.get('available', [])
     allocation = state.get('allocation', [])
     need = state.get('need', [])
+    process_ids = state.get('processIds')
+    
+    def name(i):
+        return process_ids[i] if process_ids else f"P{i}"
     
     # Initialize work and finish arrays
     work = available.copy()
@@ -44,14 +50,14 @@ def check_safety(state: Dict[str, Any]) -> Dict[str, Any]:
                 
                 if can_complete:
                     # Process i can complete
-                    explanation.append(f"Process {i} can complete with available resources {work}.")
+                    explanation.append(f"Process {name(i)} can complete with available resources {work}.")
                     explanation.append(f"Need: {need[i]}, Available: {work}")
                     
                     # Update work vector
                     for j in range(resources):
                         work[j] += allocation[i][j]
                     
-                    explanation.append(f"Process {i} releases its resources. New available: {work}")
+                    explanation.append(f"Process {name(i)} releases its resources. New available: {work}")
                     
                     # Mark process as finished
                     finish[i] = True
@@ -64,19 +70,21 @@ def check_safety(state: Dict[str, Any]) -> Dict[str, Any]:
     
     # Check if all processes can finish
     if all(finish):
-        explanation.append(f"All processes can complete. Safe sequence: {' → '.join(f'P{p}' for p in safe_sequence)}")
+        explanation.append(f"All processes can complete. Safe sequence: {' → '.join(name(p) for p in safe_sequence)}")
         return {
             "isSafe": True,
             "safeSequence": safe_sequence,
+            "deadlocked": [],
             "explanation": explanation
         }
     else:
         # Identify deadlocked processes
         deadlocked = [i for i in range(processes) if not finish[i]]
-        explanation.append(f"Processes {deadlocked} cannot complete. The system is in an unsafe state.")
+        explanation.append(f"Processes {', '.join(name(p) for p in deadlocked)} cannot complete. The system is in an unsafe state.")
         return {
             "isSafe": False,
             "safeSequence": None,
+            "deadlocked": deadlocked,
             "explanation": explanation
         }
 
@@ -115,3 +123,51 @@ def run_bankers_algorithm(state: Dict[str, Any]) -> Dict[str, Any]:
     
     return result
 
+
+def graph_to_state(graph: Graph) -> Dict[str, Any]:
+    """
+    Convert a resource allocation graph into a Banker's Algorithm state
+    
+    Allocation edges become the allocation matrix and request edges become
+    the need matrix, both weighted by the edge counts, so running the safety
+    algorithm on the result performs deadlock detection by graph reduction.
+    
+    Args:
+        graph: The resource allocation graph
+        
+    Returns:
+        System state with available resources, allocation matrix, need matrix
+        and the process/resource ids behind each row and column
+    """
+    process_ids = [node.id for node in graph.nodes if node.type == "process"]
+    resource_ids = [node.id for node in graph.nodes if node.type == "resource"]
+    process_index = {p: i for i, p in enumerate(process_ids)}
+    resource_index = {r: j for j, r in enumerate(resource_ids)}
+    
+    instances = [node.instances or 1 for node in graph.nodes if node.type == "resource"]
+    allocation = [[0] * len(resource_ids) for _ in process_ids]
+    need = [[0] * len(resource_ids) for _ in process_ids]
+    
+    for edge in graph.edges:
+        count = edge.count
+        if edge.type == "allocation":
+            if edge.source in resource_index and edge.target in process_index:
+                allocation[process_index[edge.target]][resource_index[edge.source]] += count
+        else:
+            if edge.source in process_index and edge.target in resource_index:
+                need[process_index[edge.source]][resource_index[edge.target]] += count
+    
+    available = [
+        instances[j] - sum(allocation[i][j] for i in range(len(process_ids)))
+        for j in range(len(resource_ids))
+    ]
+    
+    return {
+        "processes": len(process_ids),
+        "resources": len(resource_ids),
+        "available": available,
+        "allocation": allocation,
+        "need": need,
+        "processIds": process_ids,
+        "resourceIds": resource_ids
+    }
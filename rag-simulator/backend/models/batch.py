@@ -0,0 +1,98 @@
+from typing import Dict, List, Any, Optional, Union
+from functools import partial
+import numpy as np
+from .graph import Graph
+from .deadlock import detect_deadlock
+from .ml_prediction import (
+    FEATURE_SETS, active_feature_set, attributions_by_name, extract_features, extract_structural_features,
+    generate_prediction_explanation, model_holders, simple_heuristic_prediction
+)
+from .compiled_forest import CompiledForest
+from .parallel import map_chunks
+
+def _detect_chunk(graphs: List[Union[Graph, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Run deadlock detection over one chunk, capturing errors per graph"""
+    results = []
+    for graph in graphs:
+        try:
+            if not isinstance(graph, Graph):
+                graph = Graph(**graph)
+            results.append({"result": detect_deadlock(graph), "error": None})
+        except Exception as e:
+            results.append({"result": None, "error": str(e)})
+    return results
+
+def detect_deadlock_batch(graphs: List[Union[Graph, Dict[str, Any]]],
+                          chunk_size: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Detect deadlocks in many resource allocation graphs in parallel
+    
+    Args:
+        graphs: Graphs as Graph objects or raw dictionaries
+        chunk_size: Graphs per worker task, chosen automatically if omitted
+        
+    Returns:
+        One entry per input graph, in order, with either a "result" or an "error"
+    """
+    return map_chunks(_detect_chunk, graphs, chunk_size)
+
+def _features_chunk(feature_set: str, graphs: List[Union[Graph, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Extract features for one chunk, capturing errors per graph"""
+    extract = extract_structural_features if feature_set == "v2" else extract_features
+    results = []
+    for graph in graphs:
+        try:
+            if not isinstance(graph, Graph):
+                graph = Graph(**graph)
+            results.append({"features": extract(graph), "error": None})
+        except Exception as e:
+            results.append({"features": None, "error": str(e)})
+    return results
+
+def predict_deadlock_batch(graphs: List[Union[Graph, Dict[str, Any]]],
+                           chunk_size: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Predict deadlock likelihood for many graphs with a single model call
+    
+    Features are extracted in parallel, stacked into one matrix and scored
+    with one ``predict_proba`` call instead of one call per graph.
+    
+    Args:
+        graphs: Graphs as Graph objects or raw dictionaries
+        chunk_size: Graphs per worker task, chosen automatically if omitted
+        
+    Returns:
+        One entry per input graph, in order, with either the prediction or an "error"
+    """
+    feature_set = active_feature_set()
+    extracted = map_chunks(partial(_features_chunk, feature_set), graphs, chunk_size)
+    
+    valid = [i for i, item in enumerate(extracted) if item["error"] is None]
+    model = model_holders[feature_set].get()
+    if model is not None and valid:
+        names = FEATURE_SETS[feature_set]
+        X = np.array([[extracted[i]["features"][name] for name in names] for i in valid], dtype=float)
+        probabilities = model.predict_proba(X)[:, 1]
+    else:
+        probabilities = [simple_heuristic_prediction(extracted[i]["features"]) for i in valid]
+    
+    # Attributions for the whole batch come from one vectorized pass
+    base_value = None
+    contributions = [None] * len(valid)
+    if isinstance(model, CompiledForest) and valid:
+        base_value, matrix = model.attributions(X)
+        contributions = [attributions_by_name(row, feature_set) for row in matrix]
+    
+    results = [{"error": item["error"]} for item in extracted]
+    for i, probability, attributions in zip(valid, probabilities, contributions):
+        features = extracted[i]["features"]
+        results[i] = {
+            "deadlockProbability": float(probability),
+            "features": features,
+            "modelVersion": feature_set,
+            "explanation": generate_prediction_explanation(features, float(probability), attributions),
+            "baseValue": base_value,
+            "attributions": attributions,
+            "error": None
+        }
+    return results
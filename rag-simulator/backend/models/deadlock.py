@@ -1,24 +1,35 @@
-from typing import Dict, List, Any, Tuple
+from typing import Dict, List, Any, Tuple, Optional
 import networkx as nx
 from .graph import Graph
+from .bankers import check_safety, graph_to_state
 
-def detect_deadlock(graph: Graph) -> Dict[str, Any]:
+def detect_deadlock(graph: Graph,
+                    G: Optional[nx.DiGraph] = None,
+                    cycles: Optional[List[List[str]]] = None,
+                    state: Optional[Dict[str, Any]] = None,
+                    safety: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """
     Detect deadlocks in a Resource Allocation Graph
     
     Args:
         graph: The Resource Allocation Graph
+        G: Precomputed NetworkX graph, built from ``graph`` if omitted
+        cycles: Precomputed simple cycles of ``G``, enumerated if omitted
+        state: Precomputed ``graph_to_state(graph)``
+        safety: Precomputed safety result for ``state``
         
     Returns:
         Dictionary with deadlock information
     """
-    G = graph.to_networkx()
+    if G is None:
+        G = graph.to_networkx()
     
     # Find cycles in the graph
-    try:
-        cycles = list(nx.simple_cycles(G))
-    except nx.NetworkXNoCycle:
-        cycles = []
+    if cycles is None:
+        try:
+            cycles = list(nx.simple_cycles(G))
+        except nx.NetworkXNoCycle:
+            cycles = []
     
     if not cycles:
         return {
@@ -80,11 +91,42 @@ def detect_deadlock(graph: Graph) -> Dict[str, Any]:
                 "explanation": "Deadlock detected. A cycle exists in the resource allocation graph, and all resources in the cycle have only one instance."
             }
     
-    # If we have cycles but resources have multiple instances, we need Banker's Algorithm
+    # If we have cycles but resources have multiple instances, reduce the graph
+    # with the Banker's safety algorithm using the edge multiplicities
+    if state is None:
+        state = graph_to_state(graph)
+    result = safety if safety is not None else check_safety(state)
+    
+    if result["isSafe"]:
+        return {
+            "hasDeadlock": False,
+            "cycle": [],
+            "explanation": "Cycles detected, but resources have multiple instances and every process can still complete. The system is not in a deadlock state."
+        }
+    
+    # Unfinished processes are only deadlocked if they wait on each other in a
+    # cycle; a process whose request can never be met is blocked, not deadlocked
+    unfinished = set(state["processIds"][i] for i in result["deadlocked"])
+    circular = [
+        c for c in deadlock_cycles
+        if all(node in unfinished for node in c if G.nodes[node].get('type') == 'process')
+    ]
+    
+    if not circular:
+        blocked = [p for p in state["processIds"] if p in unfinished]
+        return {
+            "hasDeadlock": False,
+            "cycle": [],
+            "explanation": f"Cycles detected, but every process on them can complete. Processes {', '.join(blocked)} are blocked by requests that cannot be satisfied, which is not a circular wait."
+        }
+    
+    on_cycles = set(node for c in circular for node in c)
+    deadlocked = [p for p in state["processIds"] if p in on_cycles]
     return {
-        "hasDeadlock": True,  # Conservative approach - mark as potential deadlock
-        "cycle": deadlock_cycles[0],  # Return the first cycle
-        "explanation": "Potential deadlock detected. A cycle exists in the resource allocation graph, but some resources have multiple instances. Further analysis with Banker's Algorithm is recommended."
+        "hasDeadlock": True,
+        "cycle": circular[0],
+        "deadlockedProcesses": deadlocked,
+        "explanation": f"Deadlock detected. After granting every satisfiable request, processes {', '.join(deadlocked)} still wait on each other in a cycle and cannot complete with the remaining resource instances."
     }
 
 def check_resource_request(state: Dict[str, Any], process_id: int, request: List[int]) -> Dict[str, Any]:
@@ -0,0 +1,154 @@
+from typing import Dict, List, Any, Callable, Optional
+import time
+import numpy as np
+import networkx as nx
+from .graph import Graph
+from .deadlock import detect_deadlock
+from .ml_prediction import (
+    _basic_features, _scc_features, _wait_for_features,
+    _short_cycle_features, _cycle_count_features
+)
+
+# Features grouped by the computation that produces them. Features in a
+# group are computed together, so dropping a group is what saves time
+FEATURE_GROUPS: Dict[str, Callable[[nx.DiGraph], Dict[str, Any]]] = {
+    "basic": _basic_features,
+    "scc": _scc_features,
+    "waitFor": lambda G: _wait_for_features(G, sum(1 for _, t in G.nodes(data="type") if t == "process")),
+    "shortCycles": _short_cycle_features,
+    "cycles": _cycle_count_features
+}
+
+# The basic counts are needed to build any feature vector and are nearly free
+REQUIRED_GROUPS = ["basic"]
+
+# Accuracy that may be given up, relative to all features, to drop a group
+DEFAULT_TOLERANCE = 0.01
+
+CV_FOLDS = 5
+
+def feature_table(graphs: List[Graph]) -> Dict[str, Any]:
+    """
+    Compute every candidate feature for each graph and time each group
+    
+    Args:
+        graphs: Graphs to extract from
+    
+    Returns:
+        Dictionary with the feature names, the feature matrix and the mean
+        seconds per graph spent in each group
+    """
+    group_seconds = {group: 0.0 for group in FEATURE_GROUPS}
+    rows = []
+    names: Optional[List[str]] = None
+    for graph in graphs:
+        G = graph.to_networkx()
+        row = {}
+        for group, compute in FEATURE_GROUPS.items():
+            start = time.perf_counter()
+            row.update(compute(G))
+            group_seconds[group] += time.perf_counter() - start
+        if names is None:
+            names = list(row)
+        rows.append([row[name] for name in names])
+    
+    return {
+        "names": names or [],
+        "X": np.array(rows, dtype=np.float64),
+        "groupSeconds": {group: seconds / max(1, len(graphs)) for group, seconds in group_seconds.items()}
+    }
+
+def group_features(names: List[str]) -> Dict[str, List[str]]:
+    """Map each group to the feature names it produces"""
+    empty = Graph(nodes=[], edges=[]).to_networkx()
+    return {group: [name for name in compute(empty) if name in names] for group, compute in FEATURE_GROUPS.items()}
+
+def _cv_accuracy(X: np.ndarray, y: np.ndarray, folds: int) -> float:
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.model_selection import cross_val_score
+    
+    model = RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=-1)
+    return float(cross_val_score(model, X, y, cv=folds).mean())
+
+def select_features(graphs: List[Graph], labels: np.ndarray,
+                    tolerance: float = DEFAULT_TOLERANCE,
+                    folds: int = CV_FOLDS) -> Dict[str, Any]:
+    """
+    Choose a cheaper feature set that keeps accuracy within a tolerance
+    
+    Each group's extraction time, the random-forest importance of each
+    feature and the cross-validated accuracy without each group are
+    measured. Groups are then dropped greedily, most expensive first, as
+    long as accuracy stays within ``tolerance`` of the full feature set.
+    
+    Args:
+        graphs: Graphs of realistic size
+        labels: 1 for graphs that deadlock, 0 otherwise
+        tolerance: Accuracy that may be lost relative to all features
+        folds: Cross-validation folds
+    
+    Returns:
+        Report with per-feature cost and importance, ablation results, the
+        recommended features and a model fitted on them
+    """
+    from sklearn.ensemble import RandomForestClassifier
+    
+    table = feature_table(graphs)
+    names, X = table["names"], table["X"]
+    y = np.asarray(labels)
+    groups = group_features(names)
+    group_seconds = table["groupSeconds"]
+    
+    def columns(kept_groups):
+        kept = [name for group in kept_groups for name in groups[group]]
+        return kept, X[:, [names.index(name) for name in kept]]
+    
+    full_accuracy = _cv_accuracy(X, y, folds)
+    importances = RandomForestClassifier(n_estimators=100, random_state=42).fit(X, y).feature_importances_
+    
+    ablation = {}
+    for group in FEATURE_GROUPS:
+        if group in REQUIRED_GROUPS:
+            continue
+        _, X_without = columns([g for g in FEATURE_GROUPS if g != group])
+        ablation[group] = full_accuracy - _cv_accuracy(X_without, y, folds)
+    
+    kept_groups = list(FEATURE_GROUPS)
+    for group in sorted(ablation, key=lambda g: group_seconds[g], reverse=True):
+        candidate = [g for g in kept_groups if g != group]
+        accuracy = _cv_accuracy(columns(candidate)[1], y, folds)
+        if accuracy >= full_accuracy - tolerance:
+            kept_groups = candidate
+    
+    selected, X_selected = columns(kept_groups)
+    selected_accuracy = _cv_accuracy(X_selected, y, folds)
+    model = RandomForestClassifier(n_estimators=100, random_state=42).fit(X_selected, y)
+    
+    total_seconds = sum(group_seconds.values())
+    selected_seconds = sum(group_seconds[g] for g in kept_groups)
+    feature_group = {name: group for group, members in groups.items() for name in members}
+    
+    return {
+        "features": [
+            {
+                "name": name,
+                "group": feature_group[name],
+                # Features of a group share its cost
+                "groupSecondsPerGraph": group_seconds[feature_group[name]],
+                "importance": float(importance)
+            }
+            for name, importance in zip(names, importances)
+        ],
+        "groupSecondsPerGraph": group_seconds,
+        "ablationAccuracyDrop": ablation,
+        "fullAccuracy": full_accuracy,
+        "selectedGroups": kept_groups,
+        "selectedFeatures": selected,
+        "selectedAccuracy": selected_accuracy,
+        "extractionSpeedup": total_seconds / selected_seconds if selected_seconds > 0 else None,
+        "model": model
+    }
+
+def label_graphs(graphs: List[Graph]) -> np.ndarray:
+    """Label graphs as detect_deadlock reports them: 1 if some processes wait on each other in a cycle"""
+    return np.array([int(detect_deadlock(g)["hasDeadlock"]) for g in graphs])
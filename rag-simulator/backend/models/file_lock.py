@@ -0,0 +1,63 @@
+from typing import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Seconds between attempts while waiting for a lock held by another process on Windows
+RETRY_INTERVAL = 0.05
+
+@contextmanager
+def file_lock(path: Path, blocking: bool = True) -> Iterator[bool]:
+    """
+    Hold an exclusive lock on a file, shared by every process on the machine
+    
+    Unlike a threading.Lock, this also excludes other server workers and
+    command-line tools. The lock is released when the block exits, or by the
+    operating system if the process dies.
+    
+    Args:
+        path: Lock file, created if missing
+        blocking: Wait for the lock instead of giving up if it is held
+    
+    Yields:
+        Whether the lock was acquired; always True when blocking
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a+b") as f:
+        acquired = _acquire(f, blocking)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                _release(f)
+
+def _acquire(f, blocking: bool) -> bool:
+    if fcntl is not None:
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            return True
+        except BlockingIOError:
+            return False
+    while True:
+        f.seek(0)
+        try:
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            if not blocking:
+                return False
+            time.sleep(RETRY_INTERVAL)
+
+def _release(f) -> None:
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
 from typing import List, Dict, Optional, Any, Literal
 import networkx as nx
 
@@ -14,11 +14,25 @@ class Edge(BaseModel):
     source: str
     target: str
     type: Literal["request", "allocation"]
+    count: int = Field(1, ge=1)
 
 class Graph(BaseModel):
     nodes: List[Node]
     edges: List[Edge]
     
+    @model_validator(mode="after")
+    def check_allocations(self) -> "Graph":
+        """Reject graphs that allocate more units of a resource than it has"""
+        instances = {node.id: node.instances or 1 for node in self.nodes if node.type == "resource"}
+        allocated = {}
+        for edge in self.edges:
+            if edge.type == "allocation" and edge.source in instances:
+                allocated[edge.source] = allocated.get(edge.source, 0) + edge.count
+        for resource, units in allocated.items():
+            if units > instances[resource]:
+                raise ValueError(f"Resource {resource} has {instances[resource]} instances but {units} are allocated")
+        return self
+    
     def to_networkx(self) -> nx.DiGraph:
         """Convert the graph to a NetworkX DiGraph for analysis"""
         G = nx.DiGraph()
@@ -29,11 +43,17 @@ class Graph(BaseModel):
                        type=node.type, 
                        instances=node.instances if node.type == "resource" else None)
         
-        # Add edges
+        # Add edges, merging duplicate (source, target) pairs into one
+        # edge whose count is the total multiplicity
         for edge in self.edges:
-            G.add_edge(edge.source, edge.target, 
-                       id=edge.id, 
-                       type=edge.type)
+            count = edge.count
+            if G.has_edge(edge.source, edge.target):
+                G.edges[edge.source, edge.target]["count"] += count
+            else:
+                G.add_edge(edge.source, edge.target, 
+                           id=edge.id, 
+                           type=edge.type,
+                           count=count)
         
         return G
 
@@ -1,4 +1,5 @@
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
+from collections import Counter
 import re
 import random
 import networkx as nx
@@ -86,6 +87,31 @@ def validate_syntax(text: str) -> List[Dict[str, Any]]:
     
     return errors
 
+def build_edges(allocations: List[Tuple[str, str]], requests: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+    """
+    Build graph edges, merging repeated statements into one counted edge
+    
+    Args:
+        allocations: (resource, process) pairs, one per allocated instance
+        requests: (process, resource) pairs, one per requested instance
+        
+    Returns:
+        List of edge dictionaries with multiplicity counts
+    """
+    edges = []
+    
+    for edge_type, pairs in (("allocation", allocations), ("request", requests)):
+        for (source, target), count in Counter(pairs).items():
+            edges.append({
+                "id": f"e{len(edges)}",
+                "source": source,
+                "target": target,
+                "type": edge_type,
+                "count": count
+            })
+    
+    return edges
+
 def parse_language_to_graph(text: str) -> Dict[str, Any]:
     """
     Parse a language description into a resource allocation graph
@@ -157,7 +183,6 @@ def parse_formal_syntax(text: str) -> Dict[str, Any]:
     
     # Create graph
     nodes = []
-    edges = []
     
     # Layout calculations
     process_y_spacing = 100
@@ -184,23 +209,8 @@ def parse_formal_syntax(text: str) -> Dict[str, Any]:
             "instances": resource_instances.get(resource_id, 1)
         })
     
-    # Add allocation edges
-    for i, (source, target) in enumerate(allocations):
-        edges.append({
-            "id": f"e{i}",
-            "source": source,
-            "target": target,
-            "type": "allocation"
-        })
-    
-    # Add request edges
-    for i, (source, target) in enumerate(requests):
-        edges.append({
-            "id": f"e{len(allocations) + i}",
-            "source": source,
-            "target": target,
-            "type": "request"
-        })
+    # Add allocation and request edges
+    edges = build_edges(allocations, requests)
     
     return {
         "nodes": nodes,
@@ -366,7 +376,6 @@ def parse_natural_language(text: str) -> Dict[str, Any]:
     
     # Create graph
     nodes = []
-    edges = []
     
     # Layout calculations
     process_y_spacing = 100
@@ -393,23 +402,8 @@ def parse_natural_language(text: str) -> Dict[str, Any]:
             "instances": resource_instances.get(resource_id, 1)
         })
     
-    # Add allocation edges
-    for i, (source, target) in enumerate(allocations):
-        edges.append({
-            "id": f"e{i}",
-            "source": source,
-            "target": target,
-            "type": "allocation"
-        })
-    
-    # Add request edges
-    for i, (source, target) in enumerate(requests):
-        edges.append({
-            "id": f"e{len(allocations) + i}",
-            "source": source,
-            "target": target,
-            "type": "request"
-        })
+    # Add allocation and request edges
+    edges = build_edges(allocations, requests)
     
     return {
         "nodes": nodes,
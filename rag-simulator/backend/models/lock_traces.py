@@ -0,0 +1,375 @@
+from typing import Dict, List, Any, Optional, Iterable, Iterator, Set, Tuple
+from collections import OrderedDict, deque
+import json
+import logging
+import os
+import threading
+import time
+from .graph import Graph
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:  # orjson is optional; fall back to the standard library
+    _loads = json.loads
+
+logger = logging.getLogger(__name__)
+
+# Seconds between checks for new lines when following a file
+POLL_INTERVAL = 0.1
+
+# Most processes tracked at once; the least recently active is evicted beyond it
+MAX_PROCESSES = 100_000
+
+# Alerts kept for the status endpoint
+MAX_ALERTS = 1_000
+
+EVENT_TYPES = ("acquire", "release", "wait", "exit")
+
+def tail_lines(path: str, follow: bool = False, poll_interval: float = POLL_INTERVAL,
+               stop: Optional[threading.Event] = None) -> Iterator[bytes]:
+    """
+    Yield the complete lines of a file, optionally waiting for more
+    
+    A line is only yielded once its newline has been written. If the file
+    is truncated in place, reading restarts from the beginning; if it is
+    rotated (renamed away and a new file created at ``path``), the rest of
+    the old file is read and the new file is followed from its start.
+    
+    Args:
+        path: File to read
+        follow: Keep waiting for new lines at the end of the file
+        poll_interval: Seconds between checks for new data when following
+        stop: Event that ends following
+    """
+    f = open(path, "rb")
+    try:
+        inode = os.fstat(f.fileno()).st_ino
+        partial = b""
+        while True:
+            chunk = f.read(1 << 16)
+            if chunk:
+                lines = (partial + chunk).split(b"\n")
+                partial = lines.pop()
+                yield from lines
+                continue
+            if not follow or (stop is not None and stop.is_set()):
+                if partial:
+                    yield partial
+                return
+            try:
+                current = os.stat(path)
+            except FileNotFoundError:
+                current = None
+            if current is not None and current.st_ino != inode:
+                try:
+                    rotated = open(path, "rb")
+                except FileNotFoundError:
+                    rotated = None
+                if rotated is not None:
+                    # Finish what was written to the old file before switching
+                    lines = (partial + f.read()).split(b"\n")
+                    partial = lines.pop()
+                    yield from lines
+                    if partial:
+                        yield partial
+                    partial = b""
+                    f.close()
+                    f = rotated
+                    inode = os.fstat(f.fileno()).st_ino
+                    continue
+            elif current is not None and current.st_size < f.tell():
+                f.seek(0)
+                partial = b""
+                continue
+            if stop is not None:
+                stop.wait(poll_interval)
+            else:
+                time.sleep(poll_interval)
+    finally:
+        f.close()
+
+def parse_events(lines: Iterable[bytes], stats: Dict[str, int]) -> Iterator[Tuple]:
+    """
+    Parse JSON lines into event tuples, skipping malformed lines
+    
+    Each line is ``{"ts": seconds, "event": "acquire" | "release" | "wait" |
+    "exit", "process": id, "resource": id, "count": n, "capacity": n}``;
+    ``resource`` is not needed for "exit", ``count`` defaults to 1 (for
+    "release", to everything held) and ``capacity`` optionally declares the
+    instances of the resource.
+    
+    Args:
+        lines: Raw lines
+        stats: Counters; "malformed" is incremented per skipped line
+    
+    Yields:
+        (ts, event, process, resource, count, capacity) tuples
+    """
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            record = _loads(line)
+            event = record["event"]
+            if event not in EVENT_TYPES:
+                raise ValueError(event)
+            resource = record.get("resource")
+            if resource is None and event != "exit":
+                raise ValueError("resource")
+            count = record.get("count")
+            capacity = record.get("capacity")
+            for value in (count, capacity):
+                if value is not None and (isinstance(value, bool) or not isinstance(value, int) or value < 1):
+                    raise ValueError(value)
+            yield (
+                record.get("ts"),
+                event,
+                str(record["process"]),
+                None if resource is None else str(resource),
+                count,
+                capacity
+            )
+        except (ValueError, KeyError, TypeError, AttributeError):
+            stats["malformed"] += 1
+
+class LiveRAG:
+    """
+    Resource allocation graph kept up to date from lock events
+    
+    Only processes that hold or wait for something are kept, and resources
+    only while someone holds or waits for them, so memory follows the live
+    state rather than the length of the stream. Beyond ``max_processes``
+    the least recently active process is evicted as if it had exited.
+    
+    When a process starts waiting, the processes it transitively waits for
+    (the holders of its resource, their resources' holders, ...) are
+    searched. If every one of them is waiting for a resource without enough
+    free instances, none can release, and they are reported as deadlocked.
+    """
+    
+    def __init__(self, max_processes: int = MAX_PROCESSES):
+        self.max_processes = max_processes
+        self.holdings: Dict[str, Dict[str, int]] = {}
+        self.holders: Dict[str, Dict[str, int]] = {}
+        self.held: Dict[str, int] = {}
+        self.waiting: Dict[str, Tuple[str, int]] = {}
+        self.waiters: Dict[str, Set[str]] = {}
+        self.capacity: Dict[str, int] = {}
+        self.last_seen: "OrderedDict[str, None]" = OrderedDict()
+        self.deadlocked: Set[str] = set()
+        self.stats = {"events": 0, "malformed": 0, "deadlocks": 0, "evicted": 0}
+    
+    def apply(self, ts: Any, event: str, process: str, resource: Optional[str],
+              count: Optional[int] = None, capacity: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Apply one event
+        
+        Returns:
+            A deadlock alert if the event completed a deadlock, otherwise None
+        """
+        self.stats["events"] += 1
+        if capacity is not None and resource is not None:
+            self.capacity[resource] = capacity
+        
+        alert = None
+        if event == "acquire":
+            self.deadlocked.discard(process)
+            self._stop_waiting(process)
+            self._grant(process, resource, 1 if count is None else count)
+        elif event == "release":
+            self.deadlocked.discard(process)
+            self._release(process, resource, count)
+        elif event == "wait":
+            waiting = (resource, 1 if count is None else count)
+            # A repeated wait (e.g. a retry) leaves a deadlocked process deadlocked
+            if self.waiting.get(process) != waiting:
+                self.deadlocked.discard(process)
+                self._stop_waiting(process)
+                self.waiting[process] = waiting
+                self.waiters.setdefault(resource, set()).add(process)
+            alert = self._check_deadlock(ts, process)
+        else:
+            self._exit(process)
+        
+        if process in self.holdings or process in self.waiting:
+            self.last_seen[process] = None
+            self.last_seen.move_to_end(process)
+            if len(self.last_seen) > self.max_processes:
+                oldest = next(iter(self.last_seen))
+                self._exit(oldest)
+                self.stats["evicted"] += 1
+        else:
+            self.last_seen.pop(process, None)
+        return alert
+    
+    def _grant(self, process: str, resource: str, count: int) -> None:
+        holdings = self.holdings.setdefault(process, {})
+        holdings[resource] = holdings.get(resource, 0) + count
+        holders = self.holders.setdefault(resource, {})
+        holders[process] = holders.get(process, 0) + count
+        self.held[resource] = self.held.get(resource, 0) + count
+    
+    def _release(self, process: str, resource: str, count: Optional[int]) -> None:
+        holdings = self.holdings.get(process, {})
+        held = holdings.get(resource, 0)
+        count = held if count is None else min(count, held)
+        if count <= 0:
+            return
+        if held == count:
+            del holdings[resource]
+            del self.holders[resource][process]
+            if not holdings:
+                del self.holdings[process]
+        else:
+            holdings[resource] = held - count
+            self.holders[resource][process] -= count
+        self.held[resource] -= count
+        self._forget_resource(resource)
+    
+    def _stop_waiting(self, process: str) -> None:
+        waiting = self.waiting.pop(process, None)
+        if waiting is not None:
+            self.waiters[waiting[0]].discard(process)
+            self._forget_resource(waiting[0])
+    
+    def _exit(self, process: str) -> None:
+        self._stop_waiting(process)
+        for resource in list(self.holdings.get(process, {})):
+            self._release(process, resource, None)
+        self.last_seen.pop(process, None)
+        self.deadlocked.discard(process)
+    
+    def _forget_resource(self, resource: str) -> None:
+        if not self.holders.get(resource) and not self.waiters.get(resource):
+            self.holders.pop(resource, None)
+            self.waiters.pop(resource, None)
+            self.held.pop(resource, None)
+            if self.capacity.get(resource) == 1:
+                del self.capacity[resource]
+    
+    def _blocked(self, process: str) -> bool:
+        waiting = self.waiting.get(process)
+        if waiting is None:
+            return False
+        resource, count = waiting
+        held = self.held.get(resource, 0)
+        return held + count > max(self.capacity.get(resource, 1), held)
+    
+    def _check_deadlock(self, ts: Any, process: str) -> Optional[Dict[str, Any]]:
+        if not self._blocked(process):
+            return None
+        seen = {process}
+        stack = [process]
+        while stack:
+            resource = self.waiting[stack.pop()][0]
+            for holder in self.holders.get(resource, ()):
+                if holder not in seen:
+                    if not self._blocked(holder):
+                        return None
+                    seen.add(holder)
+                    stack.append(holder)
+        if seen <= self.deadlocked:
+            return None
+        self.deadlocked |= seen
+        self.stats["deadlocks"] += 1
+        return {
+            "type": "deadlock",
+            "ts": ts,
+            "processes": sorted(seen),
+            "waits": {p: self.waiting[p][0] for p in sorted(seen)}
+        }
+    
+    def to_graph(self) -> Graph:
+        """Return the live state as a resource allocation graph"""
+        processes = set(self.holdings) | set(self.waiting)
+        resources = set(self.holders) | set(self.waiters)
+        nodes = [{"id": p, "type": "process", "x": 0, "y": 0} for p in sorted(processes)]
+        nodes += [
+            {"id": r, "type": "resource", "x": 0, "y": 0,
+             "instances": max(self.capacity.get(r, 1), self.held.get(r, 0))}
+            for r in sorted(resources)
+        ]
+        edges = []
+        for resource, holders in self.holders.items():
+            for process, count in holders.items():
+                edges.append({"id": f"a{len(edges)}", "source": resource, "target": process,
+                              "type": "allocation", "count": count})
+        for process, (resource, count) in self.waiting.items():
+            edges.append({"id": f"r{len(edges)}", "source": process, "target": resource,
+                          "type": "request", "count": count})
+        return Graph(nodes=nodes, edges=edges)
+
+def detect_deadlocks(events: Iterable[Tuple], rag: LiveRAG) -> Iterator[Dict[str, Any]]:
+    """Apply events to a live graph and yield the alerts they raise"""
+    apply = rag.apply
+    for event in events:
+        alert = apply(*event)
+        if alert is not None:
+            yield alert
+
+def ingest(path: str, rag: Optional[LiveRAG] = None, follow: bool = False,
+           stop: Optional[threading.Event] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Stream a JSONL lock trace through a live graph and yield deadlock alerts
+    
+    Args:
+        path: JSONL file of lock events, see parse_events
+        rag: Graph to update, a new one if omitted
+        follow: Keep reading as the file grows
+        stop: Event that ends following
+    """
+    rag = rag if rag is not None else LiveRAG()
+    yield from detect_deadlocks(parse_events(tail_lines(path, follow, stop=stop), rag.stats), rag)
+
+class LockTraceWatcher:
+    """Background thread that follows a lock trace file for the API"""
+    
+    def __init__(self, max_alerts: int = MAX_ALERTS):
+        self.path: Optional[str] = None
+        self.rag = LiveRAG()
+        self.alerts: deque = deque(maxlen=max_alerts)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self, path: str) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self.path = path
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+    
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+    
+    def _run(self) -> None:
+        try:
+            lines = tail_lines(self.path, follow=True, stop=self._stop)
+            for event in parse_events(lines, self.rag.stats):
+                with self._lock:
+                    alert = self.rag.apply(*event)
+                    if alert is not None:
+                        self.alerts.append(alert)
+                if alert is not None:
+                    logger.warning(f"Deadlock in lock trace: {', '.join(alert['processes'])}")
+        except Exception as e:
+            logger.error(f"Lock trace ingestion of {self.path} stopped: {str(e)}")
+    
+    def status(self) -> Dict[str, Any]:
+        """Return the counters, recent alerts and live graph"""
+        with self._lock:
+            return {
+                "path": self.path,
+                "running": self._thread is not None and self._thread.is_alive(),
+                "stats": dict(self.rag.stats),
+                "alerts": list(self.alerts),
+                "graph": self.rag.to_graph().model_dump()
+            }
+
+# Process-wide watcher, started with the API when LOCK_TRACE_PATH is set
+lock_trace_watcher = LockTraceWatcher()
@@ -1,26 +1,343 @@
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Callable, Tuple
+from itertools import islice
 import numpy as np
 import networkx as nx
 import joblib
 from pathlib import Path
 import os
+import logging
+import threading
 from .graph import Graph
+from .compiled_forest import CompiledForest, compile_model
+from .model_registry import ModelRegistry, model_registry
+from .training_data import load_training_arrays
+
+logger = logging.getLogger(__name__)
 
 # Default model path
 MODEL_PATH = Path("data/models/deadlock_prediction_model.pkl")
 
-def extract_features(graph: Graph) -> Dict[str, Any]:
+# Model trained on the linear-time structural feature set
+STRUCTURAL_MODEL_PATH = Path("data/models/deadlock_prediction_model_v2.pkl")
+
+# Feature names, in model input order, for each model version. "v1" needs
+# full cycle enumeration; "v2" is computed in O(V+E) plus a bounded search
+FEATURE_SETS = {
+    "v1": [
+        "processCount", "resourceCount", "requestEdgeCount",
+        "allocationEdgeCount", "resourceUtilization", "cycleCount"
+    ],
+    "v2": [
+        "processCount", "resourceCount", "requestEdgeCount",
+        "allocationEdgeCount", "resourceUtilization",
+        "sccCount", "largestSccSize", "nodesInSccs",
+        "maxWaitForOutDegree", "meanWaitForOutDegree", "maxWaitForInDegree",
+        "shortCycleCount"
+    ]
+}
+
+# Feature set served for prediction: "v1", "v2", or "auto" for the one whose
+# model was trained or activated most recently
+PREDICTION_FEATURE_SET = os.environ.get("PREDICTION_FEATURE_SET", "auto")
+
+# Features named in an explanation, and the smallest contribution worth naming
+ATTRIBUTION_DRIVERS = 3
+ATTRIBUTION_THRESHOLD = 0.01
+
+# Cycles of at most this many nodes are counted, stopping at the cap
+SHORT_CYCLE_LENGTH = 4
+SHORT_CYCLE_CAP = 100
+
+class ModelHolder:
+    """
+    Process-wide holder for the deadlock prediction model
+    
+    The model is unpickled once and reloaded only when the file on disk
+    changes. Callers take a reference from ``get`` and keep using it, so a
+    reload swaps the model atomically for subsequent requests while in-flight
+    predictions finish on the previous one. Forests are served from their
+    compiled copy (see compiled_path), which loads without scikit-learn.
+    
+    When a registry is given, its active version is memory-mapped, so all
+    server workers share it. Whichever changed last is served: the active
+    version (activation, rollback, ``set``) or the file at ``path`` (written
+    by save_model from train_model.py and other tools that do not register).
+    """
+    
+    def __init__(self, path: Path, feature_set: Optional[str] = None,
+                 registry: Optional[ModelRegistry] = None):
+        self.path = path
+        self.feature_set = feature_set
+        self.registry = registry
+        self._model = None
+        self._signature = None
+        self._lock = threading.Lock()
+    
+    def get(self) -> Optional[Any]:
+        """Return the current model, reloading it if its source changed, or None if there is none"""
+        signature = self._current_signature()
+        if signature is None:
+            return None
+        
+        if signature != self._signature:
+            with self._lock:
+                if signature != self._signature:
+                    self._load(signature)
+        return self._model
+    
+    def signature(self) -> Optional[tuple]:
+        """Return a value identifying the model that would be served, or None if there is none"""
+        return self._current_signature()
+    
+    def updated_at(self) -> Optional[int]:
+        """Return when the served model last changed, in nanoseconds, or None if there is none"""
+        signature = self._current_signature()
+        return signature[1] if signature is not None else None
+    
+    def estimator(self) -> Optional[Any]:
+        """
+        Return the fitted estimator behind the model being served, for warm starts
+        
+        Returns:
+            The scikit-learn model, or None if no model is served or it was
+            registered without its estimator
+        """
+        signature = self._current_signature()
+        if signature is None:
+            return None
+        if signature[0] == "registry":
+            return self.registry.load_estimator(self.feature_set)
+        return joblib.load(self.path)
+    
+    def set(self, model: Any, metadata: Optional[Dict[str, Any]] = None) -> Optional[int]:
+        """
+        Write a new model to disk atomically and make it the current model
+        
+        Args:
+            model: The fitted model
+            metadata: Information recorded with the registry version, e.g. metrics
+            
+        Returns:
+            The new registry version, or None if the model was not registered
+        """
+        with self._lock:
+            save_model(model, self.path)
+            compiled = compile_model(model)
+            if self.registry is not None and isinstance(compiled, CompiledForest):
+                version = self.registry.register(self.feature_set, model, metadata)
+                self._model = self.registry.load(self.feature_set, version)
+                self._signature = ("registry",) + self.registry.active_signature(self.feature_set)
+                return version
+            if isinstance(compiled, CompiledForest):
+                self._signature = ("compiled",) + _file_signature(compiled_path(self.path))
+            else:
+                self._signature = ("pickle",) + _file_signature(self.path)
+            self._model = compiled
+            return None
+    
+    def _current_signature(self) -> Optional[tuple]:
+        file_signature = self._file_signature()
+        if self.registry is not None:
+            active_signature = self.registry.active_signature(self.feature_set)
+            # Ties go to the registry, since set writes the file before registering
+            if active_signature is not None and (file_signature is None or active_signature[0] >= file_signature[1]):
+                return ("registry",) + active_signature
+        return file_signature
+    
+    def _file_signature(self) -> Optional[tuple]:
+        model_signature = _file_signature(self.path)
+        if model_signature is None:
+            return None
+        
+        # The compiled copy is written after the pickle, so it is current
+        # unless the pickle has been replaced since
+        compiled_signature = _file_signature(compiled_path(self.path))
+        if compiled_signature is not None and compiled_signature[0] >= model_signature[0]:
+            return ("compiled",) + compiled_signature
+        return ("pickle",) + model_signature
+    
+    def _load(self, signature) -> None:
+        try:
+            if signature[0] == "registry":
+                model = self.registry.load(self.feature_set)
+            elif signature[0] == "compiled":
+                model = CompiledForest.load(compiled_path(self.path))
+            else:
+                model = compile_model(joblib.load(self.path))
+        except Exception as e:
+            # Keep serving the previous model if the new file cannot be read
+            logger.error(f"Error loading model from {self.path}: {str(e)}")
+            return
+        self._model = model
+        self._signature = signature
+        logger.info(f"Loaded deadlock prediction model from {self.path}")
+
+def _file_signature(path: Path) -> Optional[tuple]:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+def compiled_path(path: Path) -> Path:
+    """Return where the compiled copy of the model at ``path`` is stored"""
+    path = Path(path)
+    return path.with_name(f"{path.name}.forest.npz")
+
+def save_model(model: Any, path: Path = MODEL_PATH) -> None:
+    """
+    Save a model so that readers never see a partially written file
+    
+    Tree ensembles are also written in compiled form next to the pickle.
+    
+    Args:
+        model: The model to save
+        path: Destination path
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    _write_atomically(path, lambda f: joblib.dump(model, f))
+    
+    compiled = compile_model(model)
+    if isinstance(compiled, CompiledForest):
+        _write_atomically(compiled_path(path), compiled.save)
+
+def _write_atomically(path: Path, write: Callable[[Any], None]) -> None:
+    # The temporary name records the writing process so that a supervisor can
+    # remove it if that process is killed mid-write (see temp_model_files)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp_path, "wb") as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if tmp_path.exists():
+            os.unlink(tmp_path)
+        raise
+
+def temp_model_files(path: Path, pid: int) -> List[Path]:
+    """Return temporary files left next to ``path`` by save_model in process ``pid``"""
+    path = Path(path)
+    return [
+        tmp_path
+        for target in (path, compiled_path(path))
+        for tmp_path in path.parent.glob(f"{target.name}.{pid}.*.tmp")
+    ]
+
+class TrainingCancelled(Exception):
+    """Raised when training is cancelled before the new model is saved"""
+
+model_holders = {
+    "v1": ModelHolder(MODEL_PATH, "v1", model_registry),
+    "v2": ModelHolder(STRUCTURAL_MODEL_PATH, "v2", model_registry)
+}
+model_holder = model_holders["v1"]
+
+def extract_features(graph: Graph,
+                     G: Optional[nx.DiGraph] = None,
+                     cycles: Optional[List[List[str]]] = None) -> Dict[str, Any]:
     """
     Extract features from a resource allocation graph for machine learning
     
     Args:
         graph: The resource allocation graph
+        G: Precomputed NetworkX graph, built from ``graph`` if omitted
+        cycles: Precomputed simple cycles of ``G``, enumerated if omitted
         
     Returns:
         Dictionary of features
     """
-    G = graph.to_networkx()
+    if G is None:
+        G = graph.to_networkx()
+    
+    features = _basic_features(G)
+    
+    # Cycle detection
+    if cycles is not None:
+        features["cycleCount"] = len(cycles)
+    else:
+        features.update(_cycle_count_features(G))
+    
+    return features
+
+def extract_structural_features(graph: Graph, G: Optional[nx.DiGraph] = None) -> Dict[str, Any]:
+    """
+    Extract the linear-time structural feature set ("v2") for machine learning
     
+    Cycle enumeration is replaced by strongly connected components, wait-for
+    degree statistics and a capped count of short cycles, so the cost grows
+    with the size of the graph rather than with the number of cycles.
+    
+    Args:
+        graph: The resource allocation graph
+        G: Precomputed NetworkX graph, built from ``graph`` if omitted
+        
+    Returns:
+        Dictionary of features
+    """
+    if G is None:
+        G = graph.to_networkx()
+    
+    features = _basic_features(G)
+    features.update(_scc_features(G))
+    features.update(_wait_for_features(G, features["processCount"]))
+    features.update(_short_cycle_features(G, features["sccCount"] > 0))
+    
+    return features
+
+def _scc_features(G: nx.DiGraph) -> Dict[str, Any]:
+    """Strongly connected components; those with more than one node contain cycles"""
+    sccs = [c for c in nx.strongly_connected_components(G) if len(c) > 1]
+    return {
+        "sccCount": len(sccs),
+        "largestSccSize": max((len(c) for c in sccs), default=0),
+        "nodesInSccs": sum(len(c) for c in sccs)
+    }
+
+def _wait_for_features(G: nx.DiGraph, process_count: int) -> Dict[str, Any]:
+    """
+    Wait-for degrees (P waits for Q if P requests a resource Q holds), summed
+    per resource instead of building the process-to-process graph
+    """
+    holder_count = {}
+    requester_count = {}
+    for u, v, attr in G.edges(data=True):
+        if attr.get('type') == 'allocation':
+            holder_count[u] = holder_count.get(u, 0) + 1
+        else:
+            requester_count[v] = requester_count.get(v, 0) + 1
+    
+    out_degree = {}
+    in_degree = {}
+    for u, v, attr in G.edges(data=True):
+        if attr.get('type') == 'request':
+            # Exclude the requester itself if it also holds the resource
+            out_degree[u] = out_degree.get(u, 0) + holder_count.get(v, 0) - int(G.has_edge(v, u))
+        else:
+            in_degree[v] = in_degree.get(v, 0) + requester_count.get(u, 0) - int(G.has_edge(v, u))
+    
+    return {
+        "maxWaitForOutDegree": max(out_degree.values(), default=0),
+        "meanWaitForOutDegree": sum(out_degree.values()) / process_count if process_count > 0 else 0,
+        "maxWaitForInDegree": max(in_degree.values(), default=0)
+    }
+
+def _short_cycle_features(G: nx.DiGraph, has_cycles: bool = True) -> Dict[str, Any]:
+    """Capped count of short cycles, which only exist inside non-trivial components"""
+    if not has_cycles:
+        return {"shortCycleCount": 0}
+    short_cycles = nx.simple_cycles(G, length_bound=SHORT_CYCLE_LENGTH)
+    return {"shortCycleCount": sum(1 for _ in islice(short_cycles, SHORT_CYCLE_CAP))}
+
+def _cycle_count_features(G: nx.DiGraph) -> Dict[str, Any]:
+    """Number of simple cycles, by full enumeration"""
+    try:
+        return {"cycleCount": len(list(nx.simple_cycles(G)))}
+    except:
+        return {"cycleCount": 0}
+
+def _basic_features(G: nx.DiGraph) -> Dict[str, Any]:
+    """Node, edge and utilization counts shared by every feature set"""
     # Basic counts
     process_nodes = [n for n, attr in G.nodes(data=True) if attr.get('type') == 'process']
     resource_nodes = [n for n, attr in G.nodes(data=True) if attr.get('type') == 'resource']
@@ -28,35 +345,43 @@ def extract_features(graph: Graph) -> Dict[str, Any]:
     process_count = len(process_nodes)
     resource_count = len(resource_nodes)
     
-    # Edge counts
-    request_edges = [(u, v) for u, v, attr in G.edges(data=True) if attr.get('type') == 'request']
-    allocation_edges = [(u, v) for u, v, attr in G.edges(data=True) if attr.get('type') == 'allocation']
-    
-    request_edge_count = len(request_edges)
-    allocation_edge_count = len(allocation_edges)
+    # Edge counts, weighted by multiplicity so that an edge with count 3
+    # contributes the same as three unit edges
+    request_edge_count = sum(attr.get('count', 1) for _, _, attr in G.edges(data=True) if attr.get('type') == 'request')
+    allocation_edge_count = sum(attr.get('count', 1) for _, _, attr in G.edges(data=True) if attr.get('type') == 'allocation')
     
     # Resource utilization
     total_instances = sum(G.nodes[r].get('instances', 1) for r in resource_nodes)
     resource_utilization = allocation_edge_count / total_instances if total_instances > 0 else 0
     
-    # Cycle detection
-    try:
-        cycles = list(nx.simple_cycles(G))
-        cycle_count = len(cycles)
-    except:
-        cycle_count = 0
-    
-    # Feature vector
-    features = {
+    return {
         "processCount": process_count,
         "resourceCount": resource_count,
         "requestEdgeCount": request_edge_count,
         "allocationEdgeCount": allocation_edge_count,
-        "resourceUtilization": resource_utilization,
-        "cycleCount": cycle_count
+        "resourceUtilization": resource_utilization
     }
+
+def active_feature_set() -> str:
+    """
+    Return the feature set of the model used for prediction
     
-    return features
+    PREDICTION_FEATURE_SET fixes it; with "auto", the feature set whose model
+    changed last is served, so retraining either one takes effect. Without
+    any model, v1 features feed the heuristic.
+    """
+    if PREDICTION_FEATURE_SET in FEATURE_SETS:
+        return PREDICTION_FEATURE_SET
+    updated = {feature_set: holder.updated_at() for feature_set, holder in model_holders.items()}
+    trained = [feature_set for feature_set in FEATURE_SETS if updated[feature_set] is not None]
+    if not trained:
+        return "v1"
+    return max(trained, key=lambda feature_set: updated[feature_set])
+
+def prediction_model_signature() -> tuple:
+    """Return a value that changes whenever predict_deadlock would use a different model"""
+    feature_set = active_feature_set()
+    return (feature_set, model_holders[feature_set].signature())
 
 def predict_deadlock(graph: Graph) -> Dict[str, Any]:
     """
@@ -68,39 +393,61 @@ def predict_deadlock(graph: Graph) -> Dict[str, Any]:
     Returns:
         Dictionary with prediction results
     """
-    # Extract features
-    features = extract_features(graph)
+    # Extract features for the active model version
+    feature_set = active_feature_set()
+    if feature_set == "v2":
+        features = extract_structural_features(graph)
+    else:
+        features = extract_features(graph)
     
-    # Check if model exists
-    if not MODEL_PATH.exists():
+    return predict_from_features(features, feature_set)
+
+def predict_from_features(features: Dict[str, Any], feature_set: str = "v1") -> Dict[str, Any]:
+    """
+    Predict the likelihood of deadlock from already extracted graph features
+    
+    Args:
+        features: Graph features from extract_features or extract_structural_features
+        feature_set: Feature set the features belong to ("v1" or "v2")
+        
+    Returns:
+        Dictionary with prediction results
+    """
+    # Get the loaded model, if one exists
+    model = model_holders[feature_set].get()
+    attributions = None
+    base_value = None
+    if model is None:
         # If no model exists, use a simple heuristic
         deadlock_probability = simple_heuristic_prediction(features)
     else:
-        # Load the model
-        model = joblib.load(MODEL_PATH)
-        
         # Create feature vector
-        X = np.array([
-            features["processCount"],
-            features["resourceCount"],
-            features["requestEdgeCount"],
-            features["allocationEdgeCount"],
-            features["resourceUtilization"],
-            features["cycleCount"]
-        ]).reshape(1, -1)
+        X = np.array([features[name] for name in FEATURE_SETS[feature_set]]).reshape(1, -1)
         
         # Make prediction
         deadlock_probability = float(model.predict_proba(X)[0, 1])
+        
+        # Credit the prediction to the features the trees actually split on
+        if isinstance(model, CompiledForest):
+            base_value, contributions = model.attributions(X)
+            attributions = attributions_by_name(contributions[0], feature_set)
     
     # Generate explanation
-    explanation = generate_prediction_explanation(features, deadlock_probability)
+    explanation = generate_prediction_explanation(features, deadlock_probability, attributions)
     
     return {
         "deadlockProbability": deadlock_probability,
         "features": features,
-        "explanation": explanation
+        "modelVersion": feature_set,
+        "explanation": explanation,
+        "baseValue": base_value,
+        "attributions": attributions
     }
 
+def attributions_by_name(contributions: np.ndarray, feature_set: str) -> Dict[str, float]:
+    """Label one row of feature contributions with the feature names"""
+    return {name: float(value) for name, value in zip(FEATURE_SETS[feature_set], contributions)}
+
 def simple_heuristic_prediction(features: Dict[str, Any]) -> float:
     """
     Simple heuristic for deadlock prediction when no ML model is available
@@ -115,7 +462,7 @@ def simple_heuristic_prediction(features: Dict[str, Any]) -> float:
     probability = 0.0
     
     # If cycles exist, high probability of deadlock
-    if features["cycleCount"] > 0:
+    if features.get("cycleCount", features.get("sccCount", 0)) > 0:
         probability += 0.7
     
     # High resource utilization increases deadlock probability
@@ -129,13 +476,15 @@ def simple_heuristic_prediction(features: Dict[str, Any]) -> float:
     # Cap probability at 1.0
     return min(1.0, probability)
 
-def generate_prediction_explanation(features: Dict[str, Any], probability: float) -> str:
+def generate_prediction_explanation(features: Dict[str, Any], probability: float,
+                                    attributions: Optional[Dict[str, float]] = None) -> str:
     """
     Generate an explanation for the deadlock prediction
     
     Args:
         features: Graph features
         probability: Predicted probability of deadlock
+        attributions: Per-feature contributions to the probability, if the model provides them
         
     Returns:
         Explanation string
@@ -148,8 +497,10 @@ def generate_prediction_explanation(features: Dict[str, Any], probability: float
         explanation = "Low risk of deadlock detected. "
     
     # Add feature-specific explanations
-    if features["cycleCount"] > 0:
+    if features.get("cycleCount", 0) > 0:
         explanation += f"The graph contains {features['cycleCount']} cycles, which is a necessary condition for deadlock. "
+    elif features.get("sccCount", 0) > 0:
+        explanation += f"{features['nodesInSccs']} nodes lie on cycles, which is a necessary condition for deadlock. "
     
     if features["resourceUtilization"] > 0.8:
         explanation += "Resource utilization is very high, increasing the risk of deadlock. "
@@ -159,14 +510,60 @@ def generate_prediction_explanation(features: Dict[str, Any], probability: float
     if features["requestEdgeCount"] > features["allocationEdgeCount"]:
         explanation += "There are more resource requests than allocations, which may indicate resource contention. "
     
+    if attributions:
+        # Name the features that moved this prediction the most
+        drivers = sorted(attributions.items(), key=lambda item: abs(item[1]), reverse=True)[:ATTRIBUTION_DRIVERS]
+        drivers = [f"{name} ({value:+.2f})" for name, value in drivers if abs(value) >= ATTRIBUTION_THRESHOLD]
+        if drivers:
+            explanation += f"The model's prediction is driven most by {', '.join(drivers)}. "
+    
     return explanation
 
-def train_model(training_data: Dict[str, Any]) -> Dict[str, Any]:
+# Number of trees in the forest and how many are grown between progress reports
+N_ESTIMATORS = 100
+TRAINING_STEP = 10
+
+def validate_training_data(training_data: Dict[str, Any]) -> Tuple[str, np.ndarray, np.ndarray]:
+    """
+    Check training data against its feature set before any model is fitted
+    
+    Args:
+        training_data: Training data with features and labels, given inline
+            or as .npy paths (see load_training_arrays), and optionally the
+            "feature_set" the feature columns belong to
+        
+    Returns:
+        Tuple of the feature set name, the feature matrix and the labels
+    """
+    feature_set = training_data.get("feature_set", "v1")
+    if feature_set not in FEATURE_SETS:
+        raise ValueError(f"Unknown feature set: {feature_set}")
+    
+    X, y = load_training_arrays(training_data)
+    
+    # Reject data that would produce a model the feature set cannot feed
+    expected_width = len(FEATURE_SETS[feature_set])
+    if X.ndim != 2 or X.shape[1] != expected_width:
+        raise ValueError(
+            f"Feature set {feature_set} expects rows of {expected_width} features, got shape {X.shape}"
+        )
+    if y.ndim != 1 or len(y) != len(X):
+        raise ValueError(f"Got {len(X)} feature rows but {y.size} labels")
+    
+    return feature_set, X, y
+
+def train_model(training_data: Dict[str, Any],
+                progress_callback: Optional[Callable[[float], None]] = None,
+                before_save: Optional[Callable[[], bool]] = None) -> Dict[str, Any]:
     """
     Train a machine learning model for deadlock prediction
     
     Args:
-        training_data: Training data with features and labels
+        training_data: Training data with features and labels, and optionally
+            the "feature_set" ("v1" or "v2") the feature columns belong to
+        progress_callback: Called with the fraction of trees fitted so far
+        before_save: Called just before the model is saved; returning False
+            abandons the run with TrainingCancelled and leaves the current model
         
     Returns:
         Dictionary with training results
@@ -175,16 +572,19 @@ def train_model(training_data: Dict[str, Any]) -> Dict[str, Any]:
     from sklearn.model_selection import train_test_split
     from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
     
-    # Extract features and labels
-    X = np.array(training_data["features"])
-    y = np.array(training_data["labels"])
+    feature_set, X, y = validate_training_data(training_data)
     
     # Split data
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
     
-    # Train model
-    model = RandomForestClassifier(n_estimators=100, random_state=42)
-    model.fit(X_train, y_train)
+    # Train model, growing the forest in steps so progress can be reported.
+    # warm_start draws the same tree seeds as a single fit would
+    model = RandomForestClassifier(n_estimators=0, random_state=42, warm_start=True)
+    for n_estimators in range(TRAINING_STEP, N_ESTIMATORS + 1, TRAINING_STEP):
+        model.set_params(n_estimators=n_estimators)
+        model.fit(X_train, y_train)
+        if progress_callback is not None:
+            progress_callback(n_estimators / N_ESTIMATORS)
     
     # Evaluate model
     y_pred = model.predict(X_test)
@@ -193,14 +593,19 @@ def train_model(training_data: Dict[str, Any]) -> Dict[str, Any]:
     recall = recall_score(y_test, y_pred)
     f1 = f1_score(y_test, y_pred)
     
-    # Save model
-    joblib.dump(model, MODEL_PATH)
+    # Save model and swap it in for subsequent predictions
+    if before_save is not None and not before_save():
+        raise TrainingCancelled("Training was cancelled before the model was saved")
+    registry_version = model_holders[feature_set].set(model, {
+        "accuracy": float(accuracy),
+        "precision": float(precision),
+        "recall": float(recall),
+        "f1": float(f1),
+        "samples": int(len(X))
+    })
     
     # Feature importance
-    feature_names = training_data.get("feature_names", [
-        "processCount", "resourceCount", "requestEdgeCount", 
-        "allocationEdgeCount", "resourceUtilization", "cycleCount"
-    ])
+    feature_names = training_data.get("feature_names", FEATURE_SETS[feature_set])
     
     feature_importance = {
         name: float(importance) 
@@ -213,6 +618,8 @@ def train_model(training_data: Dict[str, Any]) -> Dict[str, Any]:
         "recall": float(recall),
         "f1": float(f1),
         "feature_importance": feature_importance,
-        "model_path": str(MODEL_PATH)
+        "feature_set": feature_set,
+        "model_path": str(model_holders[feature_set].path),
+        "registry_version": registry_version
     }
 
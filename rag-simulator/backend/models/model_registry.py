@@ -0,0 +1,261 @@
+from typing import Dict, List, Any, Optional
+from pathlib import Path
+import json
+import os
+import shutil
+import threading
+import time
+import joblib
+import numpy as np
+from .compiled_forest import CompiledForest, compile_model
+from .file_lock import file_lock
+
+# Versioned compiled models, one directory per feature set
+REGISTRY_PATH = Path("data/models/registry")
+
+# Number of previously active versions remembered for rollback
+MAX_HISTORY = 20
+
+# Fitted estimator stored with a version, for warm-starting updates
+ESTIMATOR_FILE = "estimator.joblib"
+
+class ModelRegistry:
+    """
+    Versioned store of compiled models that worker processes share through mmap
+    
+    Each version is a directory of .npy arrays, one per CompiledForest array,
+    that is loaded with ``mmap_mode="r"``. Every worker process maps the same
+    files, so the model occupies one copy in the page cache however many
+    workers serve it. The active version of each feature set is recorded in
+    ``active.json``, which is replaced atomically on activation and rollback;
+    the read-modify-write holds ``active.lock`` so that concurrent workers do
+    not lose each other's history.
+    A fitted scikit-learn model is also kept as ``estimator.joblib`` so that
+    it can be warm-started later; serving never loads it.
+    
+    Layout::
+    
+        registry/<feature set>/active.json
+        registry/<feature set>/active.lock
+        registry/<feature set>/<version>/meta.json
+        registry/<feature set>/<version>/<array>.npy
+        registry/<feature set>/<version>/estimator.joblib
+    """
+    
+    def __init__(self, root: Path = REGISTRY_PATH):
+        self.root = Path(root)
+        self._lock = threading.Lock()
+    
+    def register(self, feature_set: str, model: Any,
+                 metadata: Optional[Dict[str, Any]] = None,
+                 activate: bool = True) -> int:
+        """
+        Store a model as a new version
+        
+        Args:
+            feature_set: Feature set the model was trained on
+            model: A fitted forest or a CompiledForest
+            metadata: Extra JSON-serializable information, e.g. training metrics
+            activate: Whether to make the new version the active one
+        
+        Returns:
+            The new version number
+        """
+        compiled = compile_model(model)
+        if not isinstance(compiled, CompiledForest):
+            raise ValueError(f"Cannot register {type(model).__name__}: only tree ensembles are supported")
+        
+        base = self.root / feature_set
+        base.mkdir(parents=True, exist_ok=True)
+        
+        # Write into a private directory and rename it into place, so readers
+        # never see a partial version
+        tmp_dir = base / f".{os.getpid()}.{threading.get_ident()}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir()
+        try:
+            for name, array in compiled.arrays().items():
+                np.save(tmp_dir / f"{name}.npy", array, allow_pickle=False)
+            if not isinstance(model, CompiledForest):
+                joblib.dump(model, tmp_dir / ESTIMATOR_FILE)
+            size_bytes = sum(f.stat().st_size for f in tmp_dir.glob("*.npy"))
+            
+            start = time.perf_counter()
+            self._load_dir(tmp_dir)
+            load_time_ms = (time.perf_counter() - start) * 1000
+            
+            meta = {
+                "featureSet": feature_set,
+                "createdAt": time.time(),
+                "sizeBytes": size_bytes,
+                "loadTimeMs": load_time_ms,
+                "metadata": metadata or {}
+            }
+            
+            while True:
+                version = self._next_version(base)
+                meta["version"] = version
+                (tmp_dir / "meta.json").write_text(json.dumps(meta))
+                try:
+                    os.rename(tmp_dir, base / str(version))
+                    break
+                except OSError:
+                    # Another process took this version number first
+                    if not (base / str(version)).exists():
+                        raise
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        
+        if activate:
+            self.activate(feature_set, version)
+        return version
+    
+    def list_versions(self, feature_set: str) -> List[Dict[str, Any]]:
+        """
+        List the stored versions of a feature set, newest first
+        
+        Args:
+            feature_set: Feature set to list
+        
+        Returns:
+            Version metadata including size, load time and whether it is active
+        """
+        active = self.active_version(feature_set)
+        versions = []
+        for version in sorted(self._versions(self.root / feature_set), reverse=True):
+            meta = json.loads((self.root / feature_set / str(version) / "meta.json").read_text())
+            meta["active"] = version == active
+            versions.append(meta)
+        return versions
+    
+    def active_version(self, feature_set: str) -> Optional[int]:
+        """Return the active version of a feature set, or None if none is active"""
+        state = self._read_active(feature_set)
+        return state["version"] if state else None
+    
+    def active_signature(self, feature_set: str) -> Optional[tuple]:
+        """Return a value that changes whenever the active version changes, or None"""
+        try:
+            stat = os.stat(self._active_path(feature_set))
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+    
+    def activate(self, feature_set: str, version: int) -> None:
+        """
+        Make a stored version the active one
+        
+        Args:
+            feature_set: Feature set of the version
+            version: Version to activate
+        """
+        version = int(version)
+        if version not in self._versions(self.root / feature_set):
+            raise KeyError(f"Model version {version} of {feature_set} not found")
+        with self._lock, file_lock(self._lock_path(feature_set)):
+            state = self._read_active(feature_set) or {"version": None, "history": []}
+            history = state["history"]
+            if state["version"] is not None and state["version"] != version:
+                history = (history + [state["version"]])[-MAX_HISTORY:]
+            self._write_active(feature_set, {"version": version, "history": history})
+    
+    def rollback(self, feature_set: str) -> int:
+        """
+        Reactivate the version that was active before the current one
+        
+        Args:
+            feature_set: Feature set to roll back
+        
+        Returns:
+            The version that is now active
+        """
+        with self._lock, file_lock(self._lock_path(feature_set)):
+            state = self._read_active(feature_set)
+            history = list(state["history"]) if state else []
+            versions = self._versions(self.root / feature_set)
+            while history:
+                version = history.pop()
+                if version in versions:
+                    self._write_active(feature_set, {"version": version, "history": history})
+                    return version
+        raise ValueError(f"No earlier version of {feature_set} to roll back to")
+    
+    def load(self, feature_set: str, version: Optional[int] = None) -> CompiledForest:
+        """
+        Map a stored version into memory
+        
+        Args:
+            feature_set: Feature set of the version
+            version: Version to load, the active one if omitted
+        
+        Returns:
+            The compiled forest backed by read-only memory maps
+        """
+        if version is None:
+            version = self.active_version(feature_set)
+            if version is None:
+                raise KeyError(f"No active model version for {feature_set}")
+        path = self.root / feature_set / str(version)
+        if not path.is_dir():
+            raise KeyError(f"Model version {version} of {feature_set} not found")
+        return self._load_dir(path)
+    
+    def load_estimator(self, feature_set: str, version: Optional[int] = None) -> Optional[Any]:
+        """
+        Load the fitted estimator a version was compiled from
+        
+        Args:
+            feature_set: Feature set of the version
+            version: Version to load, the active one if omitted
+        
+        Returns:
+            The unpickled estimator, or None if the version was registered
+            from a compiled forest or there is no active version
+        """
+        if version is None:
+            version = self.active_version(feature_set)
+            if version is None:
+                return None
+        path = self.root / feature_set / str(version) / ESTIMATOR_FILE
+        if not path.exists():
+            return None
+        return joblib.load(path)
+    
+    def temp_dirs(self, pid: int) -> List[Path]:
+        """Return version directories left half-written by process ``pid``"""
+        return list(self.root.glob(f"*/.{pid}.*.tmp"))
+    
+    def _load_dir(self, path: Path) -> CompiledForest:
+        arrays = {f.stem: np.load(f, mmap_mode="r", allow_pickle=False) for f in path.glob("*.npy")}
+        return CompiledForest.from_arrays(arrays)
+    
+    def _active_path(self, feature_set: str) -> Path:
+        return self.root / feature_set / "active.json"
+    
+    def _lock_path(self, feature_set: str) -> Path:
+        return self.root / feature_set / "active.lock"
+    
+    def _read_active(self, feature_set: str) -> Optional[Dict[str, Any]]:
+        try:
+            return json.loads(self._active_path(feature_set).read_text())
+        except FileNotFoundError:
+            return None
+    
+    def _write_active(self, feature_set: str, state: Dict[str, Any]) -> None:
+        path = self._active_path(feature_set)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_text(json.dumps(state))
+        os.replace(tmp_path, path)
+    
+    @staticmethod
+    def _versions(base: Path) -> List[int]:
+        if not base.is_dir():
+            return []
+        return [int(p.name) for p in base.iterdir() if p.is_dir() and p.name.isdigit()]
+    
+    def _next_version(self, base: Path) -> int:
+        return max(self._versions(base), default=0) + 1
+
+# Process-wide registry used by the model holders and the API
+model_registry = ModelRegistry()
@@ -0,0 +1,217 @@
+from typing import Dict, List, Any, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from pathlib import Path
+import io
+import os
+import pickle
+import tempfile
+import time
+import numpy as np
+from .compiled_forest import CompiledForest, compile_model
+
+# Hyperparameter grids searched for each model family
+MODEL_FAMILIES: Dict[str, Dict[str, List[Any]]] = {
+    "random_forest": {
+        "n_estimators": [50, 100, 200],
+        "max_depth": [None, 8, 16],
+        "min_samples_leaf": [1, 4]
+    },
+    "extra_trees": {
+        "n_estimators": [100, 200],
+        "max_depth": [None, 16],
+        "min_samples_leaf": [1, 4]
+    },
+    "gradient_boosting": {
+        "max_iter": [100, 200],
+        "learning_rate": [0.05, 0.1],
+        "max_leaf_nodes": [15, 31]
+    },
+    "logistic_regression": {
+        "C": [0.1, 1.0, 10.0]
+    }
+}
+
+CV_FOLDS = 5
+
+# Single-row predictions timed per candidate when measuring serving latency
+LATENCY_ROUNDS = 200
+
+def build_model(family: str, params: Dict[str, Any]) -> Any:
+    """
+    Create an unfitted model of a family with the given hyperparameters
+    
+    Args:
+        family: Key of MODEL_FAMILIES
+        params: Hyperparameters for the model
+    
+    Returns:
+        The scikit-learn estimator
+    """
+    from sklearn.ensemble import RandomForestClassifier, ExtraTreesClassifier, HistGradientBoostingClassifier
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import StandardScaler
+    
+    if family == "random_forest":
+        return RandomForestClassifier(random_state=42, **params)
+    if family == "extra_trees":
+        return ExtraTreesClassifier(random_state=42, **params)
+    if family == "gradient_boosting":
+        return HistGradientBoostingClassifier(random_state=42, **params)
+    if family == "logistic_regression":
+        return make_pipeline(StandardScaler(), LogisticRegression(max_iter=1000, **params))
+    raise ValueError(f"Unknown model family: {family}")
+
+def parameter_grid(grid: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """Expand a grid of value lists into every combination"""
+    names = sorted(grid)
+    return [dict(zip(names, values)) for values in product(*(grid[name] for name in names))]
+
+# The dataset each worker maps from disk, set once per process by _init_worker
+_shared: Dict[str, np.ndarray] = {}
+
+def _init_worker(data_dir: str) -> None:
+    # Memory-mapped, so every worker reads the same page-cache copy
+    for name in ("X", "y", "fold"):
+        _shared[name] = np.load(Path(data_dir) / f"{name}.npy", mmap_mode="r")
+
+def _fit_fold(task: Tuple[str, Dict[str, Any], int]) -> float:
+    family, params, fold = task
+    X, y = _shared["X"], _shared["y"]
+    held_out = np.asarray(_shared["fold"]) == fold
+    model = build_model(family, params)
+    model.fit(X[~held_out], y[~held_out])
+    return float((model.predict(X[held_out]) == y[held_out]).mean())
+
+def measure_serving_cost(model: Any, X: np.ndarray, rounds: int = LATENCY_ROUNDS) -> Dict[str, Any]:
+    """
+    Measure what a fitted model costs to store and to serve
+    
+    Forests are measured in the compiled form the API serves them in.
+    
+    Args:
+        model: Fitted model
+        X: Rows to predict on
+        rounds: Single-row predictions to time
+    
+    Returns:
+        Model size in bytes and median single-row and per-row batch latency in milliseconds
+    """
+    served = compile_model(model)
+    if isinstance(served, CompiledForest):
+        buffer = io.BytesIO()
+        served.save(buffer)
+        size_bytes = buffer.tell()
+    else:
+        size_bytes = len(pickle.dumps(model))
+    
+    rows = np.asarray(X[:rounds])
+    timings = []
+    for i in range(len(rows)):
+        start = time.perf_counter()
+        served.predict_proba(rows[i:i + 1])
+        timings.append(time.perf_counter() - start)
+    
+    start = time.perf_counter()
+    served.predict_proba(np.asarray(X))
+    batch_seconds = time.perf_counter() - start
+    
+    return {
+        "sizeBytes": size_bytes,
+        "latencyMs": float(np.median(timings) * 1000) if timings else 0.0,
+        "batchLatencyPerRowMs": batch_seconds * 1000 / max(1, len(X)),
+        "compiled": isinstance(served, CompiledForest)
+    }
+
+def search_models(X: np.ndarray, y: np.ndarray,
+                  families: Optional[List[str]] = None,
+                  grids: Optional[Dict[str, Dict[str, List[Any]]]] = None,
+                  folds: int = CV_FOLDS,
+                  workers: Optional[int] = None,
+                  test_size: float = 0.2) -> Dict[str, Any]:
+    """
+    Cross-validated hyperparameter search over several model families
+    
+    Every (configuration, fold) fit runs as its own task on a process pool.
+    The dataset is written once to .npy files that the workers memory-map,
+    so it is not pickled into every task. The best configuration of each
+    family is refitted on the whole training split and scored on a held-out
+    test split, together with its size and prediction latency.
+    
+    Args:
+        X: Feature matrix
+        y: Labels
+        families: Families to compare, all of MODEL_FAMILIES if omitted
+        grids: Grids overriding MODEL_FAMILIES
+        folds: Cross-validation folds
+        workers: Worker processes, one per CPU if omitted
+        test_size: Fraction of rows held out for the final comparison
+    
+    Returns:
+        Dictionary with every configuration's CV score and the per-family comparison
+    """
+    from sklearn.model_selection import StratifiedKFold, train_test_split
+    
+    grids = {**MODEL_FAMILIES, **(grids or {})}
+    families = families or list(MODEL_FAMILIES)
+    for family in families:
+        if family not in grids:
+            raise ValueError(f"Unknown model family: {family}")
+    
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    y = np.ascontiguousarray(y)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=42, stratify=y)
+    fold_of_row = np.empty(len(y_train), dtype=np.int32)
+    splitter = StratifiedKFold(n_splits=folds, shuffle=True, random_state=42)
+    for fold, (_, test_index) in enumerate(splitter.split(X_train, y_train)):
+        fold_of_row[test_index] = fold
+    
+    configurations = [(family, params) for family in families for params in parameter_grid(grids[family])]
+    tasks = [(family, params, fold) for family, params in configurations for fold in range(folds)]
+    
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        np.save(Path(tmp_dir) / "X.npy", X_train)
+        np.save(Path(tmp_dir) / "y.npy", y_train)
+        np.save(Path(tmp_dir) / "fold.npy", fold_of_row)
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1,
+                                 initializer=_init_worker,
+                                 initargs=(tmp_dir,)) as pool:
+            scores = list(pool.map(_fit_fold, tasks, chunksize=max(1, len(tasks) // 64)))
+    search_seconds = time.perf_counter() - start
+    
+    results = []
+    for i, (family, params) in enumerate(configurations):
+        fold_scores = scores[i * folds:(i + 1) * folds]
+        results.append({
+            "family": family,
+            "params": params,
+            "cvAccuracy": float(np.mean(fold_scores)),
+            "cvStd": float(np.std(fold_scores))
+        })
+    
+    comparison = []
+    best_models = {}
+    for family in families:
+        best = max((r for r in results if r["family"] == family), key=lambda r: r["cvAccuracy"])
+        model = build_model(family, best["params"])
+        fit_start = time.perf_counter()
+        model.fit(X_train, y_train)
+        fit_seconds = time.perf_counter() - fit_start
+        comparison.append({
+            **best,
+            "testAccuracy": float((model.predict(X_test) == y_test).mean()),
+            "fitSeconds": fit_seconds,
+            **measure_serving_cost(model, X_test)
+        })
+        best_models[family] = model
+    
+    comparison.sort(key=lambda r: r["testAccuracy"], reverse=True)
+    return {
+        "results": results,
+        "comparison": comparison,
+        "models": best_models,
+        "searchSeconds": search_seconds,
+        "tasks": len(tasks)
+    }
@@ -0,0 +1,244 @@
+from typing import Dict, List, Any, Optional
+import math
+import time
+from statistics import NormalDist
+import numpy as np
+from .graph import Graph
+from .bankers import graph_to_state
+from . import parallel
+
+DEFAULT_TRIALS = 10_000
+MAX_TRIALS = 1_000_000
+
+# Trials simulated together as one batch of arrays, and per pool task
+TRIALS_PER_TASK = 2_000
+
+# Largest per-trial step tensor (trials x P x S x R int64) one task may build;
+# batches shrink to fit, and a single trial that does not fit is rejected
+MAX_TASK_BYTES = 256 * 2**20
+
+# Seconds an estimate may run before it stops with the trials done so far
+DEFAULT_TIME_BUDGET = 5.0
+
+def build_programs(graph: Graph, patterns: Optional[Dict[str, List[Dict[str, Any]]]] = None) -> Dict[str, Any]:
+    """
+    Turn a graph and future request patterns into per-process step tensors
+    
+    Every process first waits for its current requests (its request edges),
+    then acquires the steps of its pattern in order, and finally releases
+    everything it holds. A step is ``{"resource": id, "count": n,
+    "probability": p}``; it is taken in a trial with probability ``p``
+    (default 1) and skipped otherwise.
+    
+    Args:
+        graph: The resource allocation graph
+        patterns: Future requests keyed by process id
+    
+    Returns:
+        Dictionary with the initial allocation and available vectors, the
+        P x S x R step needs, the P x S step probabilities and the ids
+    """
+    state = graph_to_state(graph)
+    process_index = {p: i for i, p in enumerate(state["processIds"])}
+    resource_index = {r: j for j, r in enumerate(state["resourceIds"])}
+    patterns = patterns or {}
+    
+    for process in patterns:
+        if process not in process_index:
+            raise ValueError(f"Pattern for unknown process: {process}")
+    steps = 1 + max((len(pattern) for pattern in patterns.values()), default=0)
+    
+    n_processes, n_resources = len(process_index), len(resource_index)
+    trial_bytes = n_processes * steps * n_resources * np.dtype(np.int64).itemsize
+    if trial_bytes > MAX_TASK_BYTES:
+        raise ValueError(
+            f"Graph and patterns are too large to simulate: one trial needs {trial_bytes} bytes "
+            f"of steps, more than {MAX_TASK_BYTES}"
+        )
+    need = np.zeros((n_processes, steps, n_resources), dtype=np.int64)
+    probability = np.zeros((n_processes, steps))
+    need[:, 0] = np.array(state["need"], dtype=np.int64).reshape(n_processes, n_resources)
+    probability[:, 0] = 1.0
+    
+    for process, pattern in patterns.items():
+        i = process_index[process]
+        for s, step in enumerate(pattern, start=1):
+            resource = step.get("resource")
+            if resource not in resource_index:
+                raise ValueError(f"Pattern of {process} requests unknown resource: {resource}")
+            count = step.get("count", 1)
+            p = step.get("probability", 1.0)
+            if isinstance(count, bool) or not isinstance(count, int) or count < 1:
+                raise ValueError(f"Pattern of {process} has an invalid count: {count}")
+            if not isinstance(p, (int, float)) or not 0 <= p <= 1:
+                raise ValueError(f"Pattern of {process} has an invalid probability: {p}")
+            need[i, s, resource_index[resource]] = count
+            probability[i, s] = p
+    
+    return {
+        "allocation": np.array(state["allocation"], dtype=np.int64).reshape(n_processes, n_resources),
+        "available": np.array(state["available"], dtype=np.int64),
+        "need": need,
+        "probability": probability,
+        "processIds": state["processIds"]
+    }
+
+def simulate_trials(programs: Dict[str, Any], trials: int, seed: Any) -> Dict[str, Any]:
+    """
+    Run random interleavings of the programs as one batch of arrays
+    
+    In every trial a scheduler repeatedly picks, uniformly at random, one
+    process that can move: either its next step fits in the available
+    instances, or it has no steps left and releases what it holds. A trial
+    deadlocks when unfinished processes remain but none can move. All trials
+    advance together, one scheduling decision per trial per iteration.
+    
+    Args:
+        programs: Output of build_programs
+        trials: Number of trials
+        seed: Seed for numpy.random.default_rng
+    
+    Returns:
+        Number of trials, number of deadlocks and per-process deadlock counts
+    """
+    rng = np.random.default_rng(seed)
+    need = programs["need"]
+    n_processes, steps, _ = need.shape
+    
+    # Skipped steps become empty steps, which always fit
+    taken = rng.random((trials, n_processes, steps)) < programs["probability"]
+    trial_need = need[None] * taken[..., None]
+    
+    allocation = np.broadcast_to(programs["allocation"], (trials,) + programs["allocation"].shape).copy()
+    available = np.broadcast_to(programs["available"], (trials, len(programs["available"]))).copy()
+    step = np.zeros((trials, n_processes), dtype=np.int64)
+    done = np.zeros((trials, n_processes), dtype=bool)
+    running = ~done.all(axis=1)
+    deadlocked = np.zeros((trials, n_processes), dtype=bool)
+    rows = np.arange(trials)
+    
+    # Each iteration finishes a step or a process in every running trial
+    for _ in range(n_processes * (steps + 1)):
+        if not running.any():
+            break
+        finished_steps = step == steps
+        next_need = np.take_along_axis(trial_need, np.minimum(step, steps - 1)[:, :, None, None], axis=2)[:, :, 0]
+        fits = (next_need <= available[:, None, :]).all(axis=2)
+        movable = ~done & (finished_steps | fits) & running[:, None]
+        
+        stuck = running & ~movable.any(axis=1)
+        deadlocked[stuck] = ~done[stuck]
+        running &= ~stuck
+        
+        # Pick one movable process per trial at random
+        scores = np.where(movable, rng.random(movable.shape), -1.0)
+        chosen = scores.argmax(axis=1)
+        active = running & movable[rows, chosen]
+        t, p = rows[active], chosen[active]
+        
+        releasing = finished_steps[t, p]
+        rt, rp = t[releasing], p[releasing]
+        available[rt] += allocation[rt, rp]
+        allocation[rt, rp] = 0
+        done[rt, rp] = True
+        
+        at, ap = t[~releasing], p[~releasing]
+        acquired = next_need[at, ap]
+        allocation[at, ap] += acquired
+        available[at] -= acquired
+        step[at, ap] += 1
+        
+        running &= ~done.all(axis=1)
+    
+    return {
+        "trials": trials,
+        "deadlocks": int(deadlocked.any(axis=1).sum()),
+        "processDeadlocks": deadlocked.sum(axis=0).tolist()
+    }
+
+def wilson_interval(successes: int, trials: int, confidence: float) -> List[float]:
+    """Wilson score interval for a binomial proportion"""
+    if trials == 0:
+        return [0.0, 1.0]
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    p = successes / trials
+    denominator = 1 + z * z / trials
+    centre = (p + z * z / (2 * trials)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / denominator
+    return [float(max(0.0, centre - margin)), float(min(1.0, centre + margin))]
+
+def estimate_deadlock_probability(graph: Graph,
+                                  patterns: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+                                  trials: int = DEFAULT_TRIALS,
+                                  time_budget: float = DEFAULT_TIME_BUDGET,
+                                  confidence: float = 0.95,
+                                  seed: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Estimate the probability that a system deadlocks by simulating interleavings
+    
+    Trials run in batches of TRIALS_PER_TASK, fewer for systems whose step
+    tensors would exceed MAX_TASK_BYTES, spread over the shared worker pool,
+    each batch with its own seed derived from ``seed``. New batches
+    stop being started once ``time_budget`` seconds have passed, so the
+    estimate may rest on fewer trials than requested; the confidence
+    interval reflects the trials actually run.
+    
+    Args:
+        graph: The resource allocation graph
+        patterns: Future requests keyed by process id, see build_programs
+        trials: Number of trials requested
+        time_budget: Wall-clock seconds after which no new batches start
+        confidence: Confidence level of the interval
+        seed: Seed for reproducible estimates
+    
+    Returns:
+        Dictionary with the estimated probability, its confidence interval and run statistics
+    """
+    if isinstance(trials, bool) or not isinstance(trials, int) or not 1 <= trials <= MAX_TRIALS:
+        raise ValueError(f"trials must be an integer between 1 and {MAX_TRIALS}")
+    if not isinstance(time_budget, (int, float)) or time_budget <= 0:
+        raise ValueError("time_budget must be a positive number of seconds")
+    if not isinstance(confidence, (int, float)) or not 0 < confidence < 1:
+        raise ValueError("confidence must be between 0 and 1")
+    
+    programs = build_programs(graph, patterns)
+    batch = min(TRIALS_PER_TASK, MAX_TASK_BYTES // max(programs["need"].nbytes, 1))
+    sizes = [min(batch, trials - start) for start in range(0, trials, batch)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    
+    start = time.perf_counter()
+    results = []
+    next_task = 0
+    while next_task < len(sizes):
+        if results and time.perf_counter() - start >= time_budget:
+            break
+        # Start one wave of tasks per worker and check the budget between waves
+        wave = range(next_task, min(len(sizes), next_task + parallel.MAX_WORKERS))
+        if parallel.MAX_WORKERS == 1:
+            results.extend(simulate_trials(programs, sizes[i], seeds[i]) for i in wave)
+        else:
+            pool = parallel.get_process_pool()
+            futures = [pool.submit(simulate_trials, programs, sizes[i], seeds[i]) for i in wave]
+            results.extend(future.result() for future in futures)
+        next_task = wave.stop
+    elapsed = time.perf_counter() - start
+    
+    run = sum(r["trials"] for r in results)
+    deadlocks = sum(r["deadlocks"] for r in results)
+    process_deadlocks = np.sum([r["processDeadlocks"] for r in results], axis=0)
+    
+    return {
+        "probability": deadlocks / run,
+        "confidenceInterval": wilson_interval(deadlocks, run, confidence),
+        "confidence": confidence,
+        "trials": run,
+        "requestedTrials": trials,
+        "deadlocks": deadlocks,
+        "processDeadlockRates": {
+            process: float(count) / run
+            for process, count in zip(programs["processIds"], np.atleast_1d(process_deadlocks))
+        },
+        "budgetExhausted": run < trials,
+        "elapsedSeconds": elapsed,
+        "trialsPerSecond": run / elapsed if elapsed > 0 else 0.0
+    }
@@ -0,0 +1,233 @@
+from typing import Dict, List, Any, Optional
+from pathlib import Path
+import json
+import logging
+import os
+import threading
+import time
+import numpy as np
+from .graph import Graph
+from .file_lock import file_lock
+from .ml_prediction import (
+    FEATURE_SETS, model_holders, extract_features, extract_structural_features
+)
+
+logger = logging.getLogger(__name__)
+
+# Labelled feature rows waiting to be learned, one log per feature set
+FEATURE_LOG_DIR = Path("data/feedback/feature_log")
+
+# One JSON line per model update with its training cost
+UPDATE_LOG_PATH = FEATURE_LOG_DIR / "updates.jsonl"
+
+# Held while a model is updated, so that only one server worker learns each row
+UPDATE_LOCK_PATH = FEATURE_LOG_DIR / "update.lock"
+
+# Rows needed before an update runs, trees grown per update and the
+# largest forest kept (the oldest trees are dropped beyond it)
+MIN_UPDATE_ROWS = 32
+TREES_PER_UPDATE = 10
+MAX_TREES = 300
+
+# Seconds between scheduled checks for new rows
+UPDATE_INTERVAL_SECONDS = 60
+
+class FeatureLog:
+    """
+    Append-only log of labelled feature rows for one feature set
+    
+    Rows are stored as raw float64 records (features followed by the label),
+    so appending is a single write and reading maps the file without parsing.
+    A cursor file records the row up to which the log has been learned.
+    """
+    
+    def __init__(self, feature_set: str, directory: Path = FEATURE_LOG_DIR):
+        self.feature_set = feature_set
+        self.width = len(FEATURE_SETS[feature_set]) + 1
+        self.path = Path(directory) / f"{feature_set}.f64"
+        self.cursor_path = Path(directory) / f"{feature_set}.cursor"
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        try:
+            return os.path.getsize(self.path) // (self.width * 8)
+        except FileNotFoundError:
+            return 0
+    
+    def append(self, features: np.ndarray, labels: np.ndarray) -> None:
+        """Append rows of features with their labels"""
+        rows = np.column_stack([np.asarray(features, dtype=np.float64), np.asarray(labels, dtype=np.float64)])
+        if rows.shape[1] != self.width:
+            raise ValueError(f"Feature set {self.feature_set} expects {self.width - 1} features per row")
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "ab") as f:
+                f.write(rows.tobytes())
+    
+    def pending(self) -> int:
+        """Return the number of rows not yet learned"""
+        return len(self) - self.cursor()
+    
+    def read_pending(self) -> np.ndarray:
+        """Return the rows appended since the cursor, as a read-only array"""
+        start, end = self.cursor(), len(self)
+        if end <= start:
+            return np.empty((0, self.width))
+        data = np.memmap(self.path, dtype=np.float64, mode="r", shape=(end, self.width))
+        return data[start:end]
+    
+    def cursor(self) -> int:
+        try:
+            return int(self.cursor_path.read_text())
+        except FileNotFoundError:
+            return 0
+    
+    def advance_to(self, end: int) -> None:
+        """Mark the rows before row ``end`` as learned"""
+        tmp_path = self.cursor_path.with_name(f"{self.cursor_path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(str(end))
+        os.replace(tmp_path, self.cursor_path)
+
+# Process-wide feature logs, one per feature set
+feature_logs = {feature_set: FeatureLog(feature_set) for feature_set in FEATURE_SETS}
+
+def record_labelled_graph(graph: Graph, label: int) -> Dict[str, int]:
+    """
+    Add a graph with a known outcome to the feature log of every feature set
+    
+    Args:
+        graph: The resource allocation graph
+        label: 1 if the graph deadlocks, 0 otherwise
+    
+    Returns:
+        Number of rows waiting to be learned per feature set
+    """
+    if isinstance(label, bool) or label not in (0, 1):
+        raise ValueError("Label must be 0 or 1")
+    
+    G = graph.to_networkx()
+    extracted = {"v1": extract_features(graph, G), "v2": extract_structural_features(graph, G)}
+    pending = {}
+    for feature_set, names in FEATURE_SETS.items():
+        log = feature_logs[feature_set]
+        log.append(np.array([[extracted[feature_set][name] for name in names]]), np.array([label]))
+        pending[feature_set] = log.pending()
+    return pending
+
+def update_model(feature_set: str, min_rows: int = MIN_UPDATE_ROWS) -> Optional[Dict[str, Any]]:
+    """
+    Grow the model of a feature set with trees fitted on the pending rows
+    
+    The forest being served is warm-started: its trees are kept,
+    TREES_PER_UPDATE new trees are fitted on the new rows only, and the oldest
+    trees are dropped once the forest exceeds MAX_TREES. The cost is that of
+    fitting a few small trees rather than retraining on everything seen so far.
+    
+    Updates hold UPDATE_LOCK_PATH, so when every server worker runs a
+    scheduler only one of them learns a given batch; the others find the
+    lock taken and skip the round.
+    
+    Args:
+        feature_set: Feature set whose model is updated
+        min_rows: Pending rows required before an update runs
+    
+    Returns:
+        The update record with its training cost, or None if nothing was learned
+    """
+    with file_lock(UPDATE_LOCK_PATH, blocking=False) as acquired:
+        if not acquired:
+            return None
+        return _update_model(feature_set, min_rows)
+
+def _update_model(feature_set: str, min_rows: int) -> Optional[Dict[str, Any]]:
+    from sklearn.ensemble import RandomForestClassifier
+    
+    log = feature_logs[feature_set]
+    start_row = log.cursor()
+    rows = np.array(log.read_pending())
+    if len(rows) < min_rows:
+        return None
+    X, y = rows[:, :-1], rows[:, -1].astype(int)
+    if len(np.unique(y)) < 2:
+        # Trees need both outcomes; wait for more rows
+        return None
+    
+    start = time.perf_counter()
+    holder = model_holders[feature_set]
+    model = holder.estimator()
+    if not isinstance(model, RandomForestClassifier) or model.n_features_in_ != X.shape[1]:
+        model = RandomForestClassifier(n_estimators=0, random_state=42)
+    model.set_params(warm_start=True, n_estimators=len(getattr(model, "estimators_", [])) + TREES_PER_UPDATE)
+    model.fit(X, y)
+    if len(model.estimators_) > MAX_TREES:
+        model.estimators_ = model.estimators_[-MAX_TREES:]
+        model.n_estimators = MAX_TREES
+    fit_seconds = time.perf_counter() - start
+    
+    record = {
+        "featureSet": feature_set,
+        "rows": int(len(rows)),
+        "trees": len(model.estimators_),
+        "fitSeconds": fit_seconds,
+        "timestamp": time.time()
+    }
+    record["registryVersion"] = holder.set(model, {"onlineUpdate": True, "rows": record["rows"]})
+    record["totalSeconds"] = time.perf_counter() - start
+    log.advance_to(start_row + len(rows))
+    
+    UPDATE_LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with open(UPDATE_LOG_PATH, "a") as f:
+        f.write(json.dumps(record) + "\n")
+    logger.info(f"Updated {feature_set} model with {record['rows']} rows in {fit_seconds:.3f}s")
+    return record
+
+def recent_updates(limit: int = 50) -> List[Dict[str, Any]]:
+    """Return the most recent update records, newest first"""
+    try:
+        with open(UPDATE_LOG_PATH) as f:
+            lines = f.readlines()[-limit:]
+    except FileNotFoundError:
+        return []
+    return [json.loads(line) for line in reversed(lines)]
+
+class OnlineUpdateScheduler:
+    """Background thread that applies pending rows to the models, away from requests"""
+    
+    def __init__(self, interval: float = UPDATE_INTERVAL_SECONDS):
+        self.interval = interval
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+    
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+    
+    def trigger(self) -> None:
+        """Run a check now instead of at the next interval"""
+        self._wake.set()
+    
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            for feature_set in FEATURE_SETS:
+                try:
+                    update_model(feature_set)
+                except Exception as e:
+                    logger.error(f"Online update of {feature_set} model failed: {str(e)}")
+
+# Process-wide scheduler started with the API
+online_updates = OnlineUpdateScheduler()
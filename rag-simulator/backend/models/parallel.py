@@ -0,0 +1,90 @@
+from typing import Callable, List, Any, Optional, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import logging
+import math
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Inputs smaller than this are processed in the calling process, where the
+# cost of shipping work to the pool would outweigh the parallel speed-up
+MIN_PARALLEL_ITEMS = 64
+
+# Number of worker processes in the shared pool
+MAX_WORKERS = os.cpu_count() or 1
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """
+    Return the process-wide worker pool, creating it on first use
+    
+    Returns:
+        A ProcessPoolExecutor with MAX_WORKERS workers
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=MAX_WORKERS)
+        return _pool
+
+def shutdown_process_pool() -> None:
+    """Shut down the process-wide worker pool if it was started"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    """Drop a broken pool so the next caller gets a fresh one"""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def map_chunks(func: Callable[[List[Any]], List[Any]],
+               items: Sequence[Any],
+               chunk_size: Optional[int] = None) -> List[Any]:
+    """
+    Apply a chunk function across the worker pool and return the results in input order
+    
+    Args:
+        func: Picklable top-level function mapping a list of items to a list of results
+        items: Items to process
+        chunk_size: Items per task, chosen from the input size and worker count if omitted
+        
+    Returns:
+        Flattened list with one result per item, in the order of ``items``
+    """
+    if chunk_size is not None and (isinstance(chunk_size, bool) or not isinstance(chunk_size, int) or chunk_size < 1):
+        raise ValueError("chunk_size must be a positive integer")
+    
+    items = list(items)
+    if MAX_WORKERS == 1 or len(items) < MIN_PARALLEL_ITEMS:
+        return func(items)
+    
+    if chunk_size is None:
+        # A few chunks per worker keeps the pool balanced when items vary in cost
+        chunk_size = max(1, math.ceil(len(items) / (MAX_WORKERS * 4)))
+    
+    chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+    
+    def run(pool: ProcessPoolExecutor) -> List[Any]:
+        results = []
+        for chunk_result in pool.map(func, chunks):
+            results.extend(chunk_result)
+        return results
+    
+    pool = get_process_pool()
+    try:
+        return run(pool)
+    except BrokenProcessPool:
+        # A worker died (e.g. killed for memory); retry once on a new pool
+        logger.error("Worker pool broke; restarting it and retrying the batch")
+        _discard_pool(pool)
+        return run(get_process_pool())
@@ -0,0 +1,67 @@
+from typing import Any, Callable, Dict
+import json
+import logging
+import os
+import numpy as np
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the standard library
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+def _default(obj: Any) -> Any:
+    """Convert NumPy values that the JSON encoders cannot handle natively"""
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def _dumps_stdlib(content: Any) -> bytes:
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def _dumps_orjson(content: Any) -> bytes:
+    # orjson writes NumPy arrays directly from their buffers, without building lists
+    return orjson.dumps(content, default=_default,
+                        option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+
+JSON_ENCODERS: Dict[str, Callable[[Any], bytes]] = {"stdlib": _dumps_stdlib}
+if orjson is not None:
+    JSON_ENCODERS["orjson"] = _dumps_orjson
+
+# Encoder used for API responses, overridable with the RAG_JSON_ENCODER variable
+_encoder_name = os.environ.get("RAG_JSON_ENCODER", "orjson" if orjson is not None else "stdlib")
+if _encoder_name not in JSON_ENCODERS:
+    logger.warning(f"Unknown or unavailable JSON encoder {_encoder_name!r}, using stdlib")
+    _encoder_name = "stdlib"
+_dumps = JSON_ENCODERS[_encoder_name]
+
+def set_json_encoder(name: str) -> None:
+    """
+    Select the encoder used for API responses
+    
+    Args:
+        name: Name of a registered encoder in JSON_ENCODERS
+    """
+    global _dumps
+    if name not in JSON_ENCODERS:
+        raise ValueError(f"Unknown JSON encoder: {name}")
+    _dumps = JSON_ENCODERS[name]
+
+def dumps(content: Any) -> bytes:
+    """Serialize content, including NumPy arrays and scalars, with the selected encoder"""
+    return _dumps(content)
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered with the selected fast encoder
+    
+    The app's default response class, so endpoints return plain dicts and
+    every response is encoded by orjson when it is installed.
+    """
+    
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,214 @@
+from typing import Dict, List, Any, Callable, Optional
+import threading
+import time
+import uuid
+from .graph import Graph, Node, Edge
+
+# Sessions idle for longer than this are dropped on the next store access
+SESSION_TTL_SECONDS = 60 * 60
+MAX_SESSIONS = 1000
+
+class GraphSession:
+    """
+    A server-side graph that clients edit with small operations
+
+    Analysis results are cached per session and dropped whenever an edit
+    changes the structure of the graph. All access goes through ``lock`` so
+    concurrent requests on the same session see a consistent graph.
+    """
+
+    def __init__(self, session_id: str, graph: Graph):
+        self.id = session_id
+        self.graph = graph
+        self.version = 0
+        self.lock = threading.Lock()
+        self.last_access = time.monotonic()
+        self._cache: Dict[str, Any] = {}
+
+    def apply(self, operations: List[Dict[str, Any]]) -> int:
+        """
+        Apply a list of edit operations to the graph
+
+        The operations are applied to a copy that replaces the graph only if
+        every operation succeeds, so a failing batch leaves the session as it was.
+
+        Args:
+            operations: Edit operations, each with an "op" key
+
+        Returns:
+            The new graph version
+        """
+        if not isinstance(operations, list):
+            raise ValueError("Edit operations must be a list")
+        with self.lock:
+            self.last_access = time.monotonic()
+            graph = self.graph.model_copy(deep=True)
+            structural = False
+            for operation in operations:
+                if not isinstance(operation, dict):
+                    raise ValueError("Each edit operation must be an object")
+                structural |= self._apply_operation(graph, operation)
+            # Re-run model validation, e.g. allocations against instances
+            self.graph = Graph.model_validate(graph.model_dump())
+            if structural:
+                self.version += 1
+                self._cache.clear()
+            return self.version
+
+    def analysis(self, name: str, compute: Callable[[Graph], Any], key: Any = None) -> Dict[str, Any]:
+        """
+        Return a cached analysis result, computing it for the current version if needed
+
+        Args:
+            name: Cache key of the analysis
+            compute: Function computing the analysis from the graph
+            key: Anything else the result depends on, e.g. the model that
+                computed it; a different key recomputes the result
+
+        Returns:
+            Dictionary with the graph version and the analysis result
+        """
+        with self.lock:
+            self.last_access = time.monotonic()
+            cached = self._cache.get(name)
+            if cached is None or cached[0] != key:
+                cached = self._cache[name] = (key, compute(self.graph))
+            return {"version": self.version, "result": cached[1]}
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the current graph and its version"""
+        with self.lock:
+            self.last_access = time.monotonic()
+            return {"version": self.version, "graph": self.graph.model_dump()}
+
+    def _apply_operation(self, graph: Graph, operation: Dict[str, Any]) -> bool:
+        """Apply one edit operation and return whether it changed the graph structure"""
+        op = operation.get("op")
+
+        if op == "addNode":
+            node = Node(**_require_object(operation, "node"))
+            if _find_node(graph, node.id) is not None:
+                raise ValueError(f"Node {node.id} already exists")
+            graph.nodes.append(node)
+            return True
+
+        if op == "removeNode":
+            node_id = _require_field(operation, "id")
+            if _find_node(graph, node_id) is None:
+                raise ValueError(f"Node {node_id} does not exist")
+            graph.nodes = [n for n in graph.nodes if n.id != node_id]
+            graph.edges = [e for e in graph.edges if e.source != node_id and e.target != node_id]
+            return True
+
+        if op == "moveNode":
+            node = _require_node(graph, _require_field(operation, "id"))
+            try:
+                node.x = float(operation.get("x", node.x))
+                node.y = float(operation.get("y", node.y))
+            except (TypeError, ValueError):
+                raise ValueError("moveNode requires numeric x and y")
+            # Layout changes do not affect any analysis
+            return False
+
+        if op == "setInstances":
+            node = _require_node(graph, _require_field(operation, "id"))
+            if node.type != "resource":
+                raise ValueError(f"Node {node.id} is not a resource")
+            node.instances = _positive_int(operation, "instances")
+            return True
+
+        if op == "addEdge":
+            edge = Edge(**_require_object(operation, "edge"))
+            if any(e.id == edge.id for e in graph.edges):
+                raise ValueError(f"Edge {edge.id} already exists")
+            _require_node(graph, edge.source)
+            _require_node(graph, edge.target)
+            graph.edges.append(edge)
+            return True
+
+        if op == "removeEdge":
+            edge_id = _require_field(operation, "id")
+            edges = [e for e in graph.edges if e.id != edge_id]
+            if len(edges) == len(graph.edges):
+                raise ValueError(f"Edge {edge_id} does not exist")
+            graph.edges = edges
+            return True
+
+        if op == "setCount":
+            edge_id = _require_field(operation, "id")
+            edge = next((e for e in graph.edges if e.id == edge_id), None)
+            if edge is None:
+                raise ValueError(f"Edge {edge_id} does not exist")
+            edge.count = _positive_int(operation, "count")
+            return True
+
+        raise ValueError(f"Unknown edit operation: {op}")
+
+def _require_field(operation: Dict[str, Any], name: str) -> Any:
+    if operation.get(name) is None:
+        raise ValueError(f"Operation {operation.get('op')} requires '{name}'")
+    return operation[name]
+
+def _require_object(operation: Dict[str, Any], name: str) -> Dict[str, Any]:
+    value = _require_field(operation, name)
+    if not isinstance(value, dict):
+        raise ValueError(f"Operation {operation.get('op')} requires '{name}' to be an object")
+    return value
+
+def _positive_int(operation: Dict[str, Any], name: str) -> int:
+    value = _require_field(operation, name)
+    if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+        raise ValueError(f"Operation {operation.get('op')} requires '{name}' to be an integer of at least 1")
+    return value
+
+def _find_node(graph: Graph, node_id: str) -> Optional[Node]:
+    return next((n for n in graph.nodes if n.id == node_id), None)
+
+def _require_node(graph: Graph, node_id: str) -> Node:
+    node = _find_node(graph, node_id)
+    if node is None:
+        raise ValueError(f"Node {node_id} does not exist")
+    return node
+
+class SessionStore:
+    """Thread-safe registry of graph sessions with idle expiry"""
+
+    def __init__(self, ttl: float = SESSION_TTL_SECONDS, max_sessions: int = MAX_SESSIONS):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._sessions: Dict[str, GraphSession] = {}
+        self._lock = threading.Lock()
+
+    def create(self, graph: Graph) -> GraphSession:
+        """Create a new session holding the given graph"""
+        with self._lock:
+            self._expire()
+            if len(self._sessions) >= self.max_sessions:
+                oldest = min(self._sessions.values(), key=lambda s: s.last_access)
+                del self._sessions[oldest.id]
+            session = GraphSession(uuid.uuid4().hex, graph)
+            self._sessions[session.id] = session
+            return session
+
+    def get(self, session_id: str) -> GraphSession:
+        """Look up a session, raising KeyError if it does not exist or has expired"""
+        with self._lock:
+            self._expire()
+            if session_id not in self._sessions:
+                raise KeyError(f"Session {session_id} not found")
+            return self._sessions[session_id]
+
+    def delete(self, session_id: str) -> None:
+        """Remove a session, raising KeyError if it does not exist"""
+        with self._lock:
+            if self._sessions.pop(session_id, None) is None:
+                raise KeyError(f"Session {session_id} not found")
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        expired = [sid for sid, s in self._sessions.items() if now - s.last_access > self.ttl]
+        for sid in expired:
+            del self._sessions[sid]
+
+# Process-wide session store used by the API
+session_store = SessionStore()
@@ -0,0 +1,451 @@
+from typing import Dict, List, Any, Optional, Iterator, Set
+from array import array
+from collections import deque
+import heapq
+import random
+import time
+
+# Trace event types
+ACQUIRE = 0
+RELEASE = 1
+WAIT = 2
+DEADLOCK = 3
+ABORT = 4
+FINISH = 5
+
+EVENT_NAMES = ["acquire", "release", "wait", "deadlock", "abort", "finish"]
+
+DEFAULT_MAX_EVENTS = 1_000_000
+MAX_EVENTS = 10_000_000
+
+# Trace events returned in an API response; the full trace stays in the Simulation
+DEFAULT_TRACE_LIMIT = 10_000
+
+# Heap entry kinds
+_RESUME = 0
+_RECOVER = 1
+
+class SimulationTrace:
+    """
+    Event trace stored column-wise in typed arrays
+    
+    Each event takes 21 bytes (a float64 timestamp, a byte for the type and
+    three int32 columns), so millions of events fit in tens of megabytes.
+    """
+    
+    def __init__(self):
+        self.time = array("d")
+        self.type = array("B")
+        self.process = array("i")
+        self.resource = array("i")
+        self.count = array("i")
+    
+    def __len__(self) -> int:
+        return len(self.time)
+    
+    def append(self, at: float, event_type: int, process: int, resource: int, count: int) -> None:
+        self.time.append(at)
+        self.type.append(event_type)
+        self.process.append(process)
+        self.resource.append(resource)
+        self.count.append(count)
+    
+    def to_dict(self, limit: Optional[int] = None) -> Dict[str, Any]:
+        """Return the first ``limit`` events as JSON-friendly columns"""
+        end = len(self) if limit is None else min(limit, len(self))
+        return {
+            "time": self.time[:end].tolist(),
+            "type": [EVENT_NAMES[t] for t in self.type[:end]],
+            "process": self.process[:end].tolist(),
+            "resource": self.resource[:end].tolist(),
+            "count": self.count[:end].tolist(),
+            "truncated": end < len(self)
+        }
+
+def _script_ops(script: List[Dict[str, Any]], resource_index: Dict[str, int], capacities: List[int]) -> List[tuple]:
+    if not isinstance(script, list):
+        raise ValueError("A process script must be a list of steps")
+    ops = []
+    for step in script:
+        if not isinstance(step, dict):
+            raise ValueError(f"Script step must be an object: {step}")
+        op = step.get("op")
+        if op in ("acquire", "release"):
+            resource = step.get("resource")
+            if resource not in resource_index:
+                raise ValueError(f"Script step refers to unknown resource: {resource}")
+            count = step.get("count", 1 if op == "acquire" else None)
+            if count is not None and (isinstance(count, bool) or not isinstance(count, int) or count < 1):
+                raise ValueError(f"Script step has an invalid count: {count}")
+            if op == "acquire" and count > capacities[resource_index[resource]]:
+                raise ValueError(f"Script step acquires {count} of {resource}, which has fewer instances")
+            ops.append((op, resource_index[resource], count))
+        elif op == "hold":
+            duration = step.get("duration", 0)
+            if not isinstance(duration, (int, float)) or duration < 0:
+                raise ValueError(f"Script step has an invalid duration: {duration}")
+            ops.append((op, float(duration), None))
+        else:
+            raise ValueError(f"Unknown script operation: {op}")
+    return ops
+
+def _number(settings: Dict[str, Any], name: str, default: float) -> float:
+    """Read a non-negative number setting, raising ValueError for anything else"""
+    value = settings.get(name, default)
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not value >= 0:
+        raise ValueError(f"{name} must be a non-negative number")
+    return float(value)
+
+def _random_config(config: Any) -> Dict[str, Any]:
+    """Validate the settings of a random process"""
+    if config is None:
+        config = {}
+    if not isinstance(config, dict):
+        raise ValueError("random must be an object of think/hold settings")
+    max_acquires = config.get("maxAcquires", 2)
+    if isinstance(max_acquires, bool) or not isinstance(max_acquires, int) or max_acquires < 1:
+        raise ValueError(f"maxAcquires must be a positive integer: {max_acquires}")
+    return {
+        "thinkTime": _number(config, "thinkTime", 1.0),
+        "holdTime": _number(config, "holdTime", 1.0),
+        "maxAcquires": max_acquires
+    }
+
+def _random_ops(config: Dict[str, Any], capacities: List[int], rng: random.Random) -> Iterator[tuple]:
+    """Endless think / acquire / hold / release-all cycles"""
+    think_time = config["thinkTime"]
+    hold_time = config["holdTime"]
+    max_acquires = min(config["maxAcquires"], len(capacities))
+    while True:
+        yield ("hold", rng.expovariate(1 / think_time) if think_time > 0 else 0.0, None)
+        for resource in rng.sample(range(len(capacities)), rng.randint(1, max_acquires)):
+            yield ("acquire", resource, 1)
+        yield ("hold", rng.expovariate(1 / hold_time) if hold_time > 0 else 0.0, None)
+        yield ("end", None, None)
+
+class Simulation:
+    """
+    Heap-based discrete-event simulation of processes sharing resources
+    
+    Processes follow a script of acquire/hold/release steps, repeated a given
+    number of times, or random think/acquire/hold/release cycles. A blocked
+    acquire waits in the resource's FIFO queue. Every time a process blocks,
+    the processes it transitively waits for (holders of and waiters on its
+    resource) are searched; if all of them are blocked, none can ever
+    release, so they are deadlocked. The search stops at the first process
+    that can still move, so checks stay local instead of re-analysing the
+    whole system.
+    
+    With ``on_deadlock="recover"`` the blocking process of each deadlock is
+    aborted after ``recovery_delay`` (releasing everything and restarting its
+    behaviour); with ``"stop"`` the run ends at the first deadlock.
+    """
+    
+    def __init__(self, spec: Dict[str, Any]):
+        resources = spec.get("resources") or {}
+        processes = spec.get("processes") or []
+        if not resources or not processes:
+            raise ValueError("Simulation requires resources and processes")
+        if not isinstance(resources, dict) or not isinstance(processes, list):
+            raise ValueError("resources must be an object and processes a list")
+        self.resource_ids = list(resources)
+        self.capacities = []
+        for resource, capacity in resources.items():
+            if isinstance(capacity, bool) or not isinstance(capacity, int) or capacity < 1:
+                raise ValueError(f"Resource {resource} has an invalid capacity: {capacity}")
+            self.capacities.append(capacity)
+        resource_index = {r: j for j, r in enumerate(self.resource_ids)}
+        
+        self.until = _number(spec, "until", float("inf"))
+        self.max_events = spec.get("maxEvents", DEFAULT_MAX_EVENTS)
+        if isinstance(self.max_events, bool) or not isinstance(self.max_events, int) or not 1 <= self.max_events <= MAX_EVENTS:
+            raise ValueError(f"maxEvents must be an integer between 1 and {MAX_EVENTS}")
+        self.on_deadlock = spec.get("onDeadlock", "stop")
+        if self.on_deadlock not in ("stop", "recover"):
+            raise ValueError("onDeadlock must be 'stop' or 'recover'")
+        self.recovery_delay = _number(spec, "recoveryDelay", 0.0)
+        trace_limit = spec.get("traceLimit", DEFAULT_TRACE_LIMIT)
+        if trace_limit is not None and (isinstance(trace_limit, bool) or not isinstance(trace_limit, int) or trace_limit < 0):
+            raise ValueError(f"traceLimit must be a non-negative integer or null: {trace_limit}")
+        self.rng = random.Random(spec.get("seed"))
+        
+        self.process_ids = []
+        self._behaviours = []
+        for process in processes:
+            if not isinstance(process, dict):
+                raise ValueError(f"Process must be an object: {process}")
+            self.process_ids.append(str(process.get("id", f"P{len(self.process_ids)}")))
+            if "random" in process:
+                self._behaviours.append(("random", _random_config(process["random"]), None))
+            else:
+                repeat = process.get("repeat", 1)
+                if repeat is not None and (isinstance(repeat, bool) or not isinstance(repeat, int) or repeat < 1):
+                    raise ValueError(f"Process {self.process_ids[-1]} has an invalid repeat: {repeat}")
+                self._behaviours.append(("script", _script_ops(process.get("script", []), resource_index, self.capacities), repeat))
+        if len(set(self.process_ids)) != len(self.process_ids):
+            raise ValueError("Process ids must be unique")
+        
+        n_processes = len(self.process_ids)
+        self.available = list(self.capacities)
+        self.allocation = [dict() for _ in range(n_processes)]
+        self.holders: List[Set[int]] = [set() for _ in self.capacities]
+        self.queues: List[deque] = [deque() for _ in self.capacities]
+        self.blocked: List[Optional[tuple]] = [None] * n_processes
+        self.wait_start = [0.0] * n_processes
+        self.deadlocked_since: List[Optional[float]] = [None] * n_processes
+        self.cycles_left = [behaviour[2] for behaviour in self._behaviours]
+        self.ops = [self._new_ops(i) for i in range(n_processes)]
+        self.recovery_pending: Set[int] = set()
+        
+        self.trace = SimulationTrace()
+        self.now = 0.0
+        self._heap: List[tuple] = []
+        self._seq = 0
+        self.completions = 0
+        self.waits = 0
+        self.total_wait_time = 0.0
+        self.deadlocks = 0
+        self.first_deadlock_time: Optional[float] = None
+        self.deadlocked_time = 0.0
+        self.aborts = 0
+        self.stopped = False
+    
+    def _new_ops(self, process: int) -> Iterator[tuple]:
+        kind, config, _ = self._behaviours[process]
+        if kind == "random":
+            return _random_ops(config, self.capacities, self.rng)
+        return iter(config + [("end", None, None)])
+    
+    def _push(self, at: float, kind: int, process: int) -> None:
+        self._seq += 1
+        heapq.heappush(self._heap, (at, self._seq, kind, process))
+    
+    def run(self) -> Dict[str, Any]:
+        """
+        Run until the time limit, the event limit, the first deadlock (with
+        ``on_deadlock="stop"``) or until every process has finished
+        
+        An operation that records several events, like finishing (which
+        releases everything and wakes waiters), is cut short at the event
+        limit, so the trace never exceeds ``max_events`` and still replays
+        to the simulation's final state.
+        
+        Returns:
+            Run metrics
+        """
+        start = time.perf_counter()
+        for process in range(len(self.process_ids)):
+            self._push(0.0, _RESUME, process)
+        while self._heap and not self.stopped and not self._at_event_limit():
+            at, _, kind, process = heapq.heappop(self._heap)
+            if at > self.until:
+                self.now = self.until
+                break
+            self.now = at
+            if kind == _RESUME:
+                self._step(process)
+            else:
+                self._recover(process)
+        return self.metrics(time.perf_counter() - start)
+    
+    def _step(self, process: int) -> None:
+        ops = self.ops[process]
+        while not self._at_event_limit():
+            op, arg, count = next(ops)
+            if op == "acquire":
+                if not self._acquire(process, arg, count):
+                    return
+            elif op == "release":
+                held = self.allocation[process].get(arg, 0)
+                self._release(process, arg, held if count is None else min(count, held))
+            elif op == "hold":
+                self._push(self.now + arg, _RESUME, process)
+                return
+            else:
+                self._release_all(process, FINISH)
+                self.completions += 1
+                if self.cycles_left[process] is not None:
+                    self.cycles_left[process] -= 1
+                    if self.cycles_left[process] == 0:
+                        return
+                # Restart through the heap so a script without holds cannot spin
+                self.ops[process] = self._new_ops(process) if self._behaviours[process][0] == "script" else ops
+                self._push(self.now, _RESUME, process)
+                return
+    
+    def _acquire(self, process: int, resource: int, count: int) -> bool:
+        if not self.queues[resource] and count <= self.available[resource]:
+            self._grant(process, resource, count)
+            return True
+        self.blocked[process] = (resource, count)
+        self.queues[resource].append(process)
+        self.wait_start[process] = self.now
+        self.waits += 1
+        self.trace.append(self.now, WAIT, process, resource, count)
+        self._check_deadlock(process)
+        return False
+    
+    def _grant(self, process: int, resource: int, count: int) -> None:
+        self.available[resource] -= count
+        self.allocation[process][resource] = self.allocation[process].get(resource, 0) + count
+        self.holders[resource].add(process)
+        self.trace.append(self.now, ACQUIRE, process, resource, count)
+    
+    def _release(self, process: int, resource: int, count: int) -> None:
+        if count <= 0 or self._at_event_limit():
+            return
+        held = self.allocation[process][resource] - count
+        if held:
+            self.allocation[process][resource] = held
+        else:
+            del self.allocation[process][resource]
+            self.holders[resource].discard(process)
+        self.available[resource] += count
+        self.trace.append(self.now, RELEASE, process, resource, count)
+        self._wake(resource)
+    
+    def _release_all(self, process: int, event_type: int) -> None:
+        self.trace.append(self.now, event_type, process, -1, sum(self.allocation[process].values()))
+        for resource, count in list(self.allocation[process].items()):
+            self._release(process, resource, count)
+    
+    def _wake(self, resource: int) -> None:
+        queue = self.queues[resource]
+        while queue and self.blocked[queue[0]][1] <= self.available[resource] and not self._at_event_limit():
+            process = queue.popleft()
+            _, count = self.blocked[process]
+            self.blocked[process] = None
+            self.total_wait_time += self.now - self.wait_start[process]
+            if self.deadlocked_since[process] is not None:
+                self.deadlocked_time += self.now - self.deadlocked_since[process]
+                self.deadlocked_since[process] = None
+            self._grant(process, resource, count)
+            self._push(self.now, _RESUME, process)
+    
+    def _at_event_limit(self) -> bool:
+        return len(self.trace) >= self.max_events
+    
+    def _waits_for(self, process: int) -> Optional[Set[int]]:
+        """Return the processes whose progress ``process`` is waiting on, or None if one can move"""
+        seen = {process}
+        stack = [process]
+        while stack:
+            blocked = self.blocked[stack.pop()]
+            if blocked is None:
+                return None
+            resource = blocked[0]
+            for other in self.holders[resource] | set(self.queues[resource]):
+                if other not in seen:
+                    if self.blocked[other] is None:
+                        return None
+                    seen.add(other)
+                    stack.append(other)
+        return seen
+    
+    def _check_deadlock(self, process: int) -> None:
+        closure = self._waits_for(process)
+        if closure is None:
+            return
+        new = [p for p in closure if self.deadlocked_since[p] is None]
+        if len(new) == len(closure):
+            self.deadlocks += 1
+            if self.first_deadlock_time is None:
+                self.first_deadlock_time = self.now
+            if not self._at_event_limit():
+                self.trace.append(self.now, DEADLOCK, process, self.blocked[process][0], len(closure))
+        for p in new:
+            self.deadlocked_since[p] = self.now
+        if self.on_deadlock == "stop":
+            self.stopped = True
+        elif not closure & self.recovery_pending:
+            self.recovery_pending.add(process)
+            self._push(self.now + self.recovery_delay, _RECOVER, process)
+    
+    def _recover(self, victim: int) -> None:
+        self.recovery_pending.discard(victim)
+        if self.blocked[victim] is None:
+            return
+        members = self._waits_for(victim) or set()
+        resource, _ = self.blocked[victim]
+        self.queues[resource].remove(victim)
+        self.blocked[victim] = None
+        self.total_wait_time += self.now - self.wait_start[victim]
+        self.deadlocked_time += self.now - self.deadlocked_since[victim]
+        self.deadlocked_since[victim] = None
+        self.aborts += 1
+        self._release_all(victim, ABORT)
+        # The queue it left may now be able to move
+        self._wake(resource)
+        self.ops[victim] = self._new_ops(victim)
+        self._push(self.now, _RESUME, victim)
+        
+        # The other members stay deadlocked unless the abort freed them or a
+        # process they wait for. Their dependencies lie within the members,
+        # so the still-deadlocked ones are the largest subset that depends
+        # only on itself.
+        stuck = {p for p in members if self.blocked[p] is not None}
+        changed = True
+        while changed:
+            changed = False
+            for process in list(stuck):
+                resource = self.blocked[process][0]
+                if not (self.holders[resource] | set(self.queues[resource])) <= stuck:
+                    stuck.discard(process)
+                    changed = True
+        for process in members - stuck:
+            if self.deadlocked_since[process] is not None:
+                self.deadlocked_time += self.now - self.deadlocked_since[process]
+                self.deadlocked_since[process] = None
+        if stuck and not stuck & self.recovery_pending:
+            # Abort the member that blocked last, as at detection
+            victim = max(stuck, key=lambda p: self.wait_start[p])
+            self.recovery_pending.add(victim)
+            self._push(self.now + self.recovery_delay, _RECOVER, victim)
+    
+    def metrics(self, wall_seconds: float) -> Dict[str, Any]:
+        """Return the run metrics so far"""
+        deadlocked_time = self.deadlocked_time + sum(
+            self.now - since for since in self.deadlocked_since if since is not None
+        )
+        return {
+            "simulatedTime": self.now,
+            "events": len(self.trace),
+            "completions": self.completions,
+            "throughput": self.completions / self.now if self.now > 0 else 0.0,
+            "waits": self.waits,
+            "meanWaitTime": self.total_wait_time / self.waits if self.waits else 0.0,
+            "deadlocks": self.deadlocks,
+            "firstDeadlockTime": self.first_deadlock_time,
+            "deadlockedProcessTime": deadlocked_time,
+            "aborts": self.aborts,
+            "deadlocked": self.stopped,
+            "wallSeconds": wall_seconds,
+            "eventsPerSecond": len(self.trace) / wall_seconds if wall_seconds > 0 else 0.0
+        }
+
+def run_simulation(spec: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run a discrete-event simulation and return its metrics and trace
+    
+    Args:
+        spec: ``resources`` (id to capacity), ``processes`` (each with an
+            ``id`` and either a ``script`` of ``{"op": "acquire" | "hold" |
+            "release", ...}`` steps with an optional ``repeat`` count, null
+            for forever, or ``random`` think/hold settings), and optionally
+            ``until``, ``maxEvents``, ``seed``, ``onDeadlock``,
+            ``recoveryDelay`` and ``traceLimit``
+    
+    Returns:
+        Dictionary with the metrics, the trace columns and the process and resource ids
+    """
+    simulation = Simulation(spec)
+    return simulation_result(simulation, simulation.run(), spec)
+
+def simulation_result(simulation: Simulation, metrics: Dict[str, Any], spec: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the response of a finished run"""
+    return {
+        "metrics": metrics,
+        "trace": simulation.trace.to_dict(spec.get("traceLimit", DEFAULT_TRACE_LIMIT)),
+        "processIds": simulation.process_ids,
+        "resourceIds": simulation.resource_ids
+    }
@@ -0,0 +1,379 @@
+from typing import Dict, List, Any, Optional, Tuple, BinaryIO
+from pathlib import Path
+import re
+import struct
+import uuid
+import numpy as np
+from .graph import Graph
+from .simulation import ACQUIRE, RELEASE, WAIT, ABORT, FINISH, EVENT_NAMES, Simulation, simulation_result
+
+# Binary trace layout (all little-endian):
+#
+#   header        HEADER_FORMAT, HEADER_SIZE bytes
+#   records       n_events x RECORD_DTYPE (21 bytes each)
+#   strings       process ids then resource ids, each a uint32 byte length
+#                 followed by UTF-8 bytes
+#   capacities    n_resources x int32
+#   checkpoints   n_checkpoints x (allocation P x R int32, waiting resource
+#                 P int32, waiting count P int32); checkpoint i is the state
+#                 before record i * checkpoint_interval
+#
+# Records are written first and the header is rewritten on close, so a
+# trace can be streamed to disk without knowing its length in advance.
+MAGIC = b"RAGT"
+VERSION = 1
+HEADER_FORMAT = "<4sHHQIIIIQQQ"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+RECORD_DTYPE = np.dtype([
+    ("time", "<f8"),
+    ("type", "u1"),
+    ("process", "<i4"),
+    ("resource", "<i4"),
+    ("count", "<i4")
+])
+
+DEFAULT_CHECKPOINT_INTERVAL = 65_536
+
+# Traces saved by the API, one file per trace id
+TRACE_DIR = Path("data/traces")
+
+# Saved traces are deleted oldest first once either limit is exceeded
+MAX_TRACES = 100
+MAX_TRACE_BYTES = 2 * 2**30
+
+def apply_records(records: np.ndarray, allocation: np.ndarray,
+                  waiting_resource: np.ndarray, waiting_count: np.ndarray) -> None:
+    """
+    Apply trace records to a state in place, without a per-record Python loop
+    
+    Allocation changes are additive, so they are summed with ``np.add.at``.
+    Whether a process is waiting depends only on its last WAIT, ACQUIRE,
+    ABORT or FINISH record: a process acquires only when it is not waiting.
+    
+    Args:
+        records: Records in RECORD_DTYPE, in order
+        allocation: P x R allocation matrix
+        waiting_resource: Resource each process waits for, -1 if none
+        waiting_count: Instances each process waits for
+    """
+    types = records["type"]
+    process = records["process"]
+    resource = records["resource"]
+    count = records["count"]
+    
+    signs = np.where(types == ACQUIRE, 1, np.where(types == RELEASE, -1, 0))
+    moved = signs != 0
+    np.add.at(allocation, (process[moved], resource[moved]), signs[moved] * count[moved])
+    
+    marks = np.flatnonzero(np.isin(types, (WAIT, ACQUIRE, ABORT, FINISH)))
+    if len(marks):
+        # Last marking record per process
+        last_process, first = np.unique(process[marks][::-1], return_index=True)
+        last = marks[::-1][first]
+        waits = types[last] == WAIT
+        waiting_resource[last_process] = np.where(waits, resource[last], -1)
+        waiting_count[last_process] = np.where(waits, count[last], 0)
+
+class TraceWriter:
+    """
+    Streams trace records to a binary trace file
+    
+    Checkpoints of the allocation and waiting state are taken every
+    ``checkpoint_interval`` records while writing, so readers can rebuild the
+    state at any step by replaying at most one interval.
+    """
+    
+    def __init__(self, path: Path, process_ids: List[str], resource_ids: List[str],
+                 capacities: List[int], checkpoint_interval: int = DEFAULT_CHECKPOINT_INTERVAL):
+        if len(capacities) != len(resource_ids):
+            raise ValueError("Every resource needs a capacity")
+        if checkpoint_interval < 1:
+            raise ValueError("checkpoint_interval must be positive")
+        self.path = Path(path)
+        self.process_ids = list(process_ids)
+        self.resource_ids = list(resource_ids)
+        self.capacities = np.asarray(capacities, dtype="<i4")
+        self.checkpoint_interval = checkpoint_interval
+        
+        n_processes, n_resources = len(self.process_ids), len(self.resource_ids)
+        self._allocation = np.zeros((n_processes, n_resources), dtype="<i4")
+        self._waiting_resource = np.full(n_processes, -1, dtype="<i4")
+        self._waiting_count = np.zeros(n_processes, dtype="<i4")
+        self._checkpoints: List[bytes] = []
+        self._pending: List[np.ndarray] = []
+        self._pending_count = 0
+        self.n_events = 0
+        
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file: Optional[BinaryIO] = open(self.path, "wb")
+        self._file.write(b"\0" * HEADER_SIZE)
+    
+    def __enter__(self) -> "TraceWriter":
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+    
+    def append(self, at: float, event_type: int, process: int, resource: int, count: int) -> None:
+        """Append one record"""
+        self.append_records(np.array([(at, event_type, process, resource, count)], dtype=RECORD_DTYPE))
+    
+    def append_records(self, records: np.ndarray) -> None:
+        """Append records given as an array of RECORD_DTYPE"""
+        records = np.asarray(records, dtype=RECORD_DTYPE)
+        while len(records):
+            # Split at checkpoint boundaries
+            room = self.checkpoint_interval - self.n_events % self.checkpoint_interval
+            if self.n_events % self.checkpoint_interval == 0:
+                self._flush()
+                self._checkpoint()
+            head, records = records[:room], records[room:]
+            self._pending.append(head)
+            self._pending_count += len(head)
+            self.n_events += len(head)
+            if self._pending_count >= self.checkpoint_interval:
+                self._flush()
+    
+    def _flush(self) -> None:
+        if not self._pending:
+            return
+        records = np.concatenate(self._pending)
+        apply_records(records, self._allocation, self._waiting_resource, self._waiting_count)
+        self._file.write(records.tobytes())
+        self._pending = []
+        self._pending_count = 0
+    
+    def _checkpoint(self) -> None:
+        self._checkpoints.append(
+            self._allocation.tobytes() + self._waiting_resource.tobytes() + self._waiting_count.tobytes()
+        )
+    
+    def close(self) -> None:
+        """Write the string tables, capacities and checkpoints, then the header"""
+        if self._file is None:
+            return
+        self._flush()
+        f = self._file
+        records_offset = HEADER_SIZE
+        strings_offset = f.tell()
+        for name in self.process_ids + self.resource_ids:
+            encoded = name.encode("utf-8")
+            f.write(struct.pack("<I", len(encoded)))
+            f.write(encoded)
+        f.write(self.capacities.tobytes())
+        checkpoints_offset = f.tell()
+        for checkpoint in self._checkpoints:
+            f.write(checkpoint)
+        f.seek(0)
+        f.write(struct.pack(
+            HEADER_FORMAT, MAGIC, VERSION, HEADER_SIZE, self.n_events,
+            len(self.process_ids), len(self.resource_ids), self.checkpoint_interval, len(self._checkpoints),
+            records_offset, strings_offset, checkpoints_offset
+        ))
+        f.close()
+        self._file = None
+
+def write_simulation_trace(path: Path, simulation: Simulation,
+                           checkpoint_interval: int = DEFAULT_CHECKPOINT_INTERVAL) -> int:
+    """
+    Write the full trace of a simulation run as a binary trace file
+    
+    Args:
+        path: Output file
+        simulation: A Simulation that has been run
+        checkpoint_interval: Records between state checkpoints
+    
+    Returns:
+        Number of records written
+    """
+    trace = simulation.trace
+    records = np.empty(len(trace), dtype=RECORD_DTYPE)
+    records["time"] = np.frombuffer(trace.time, dtype=np.float64)
+    records["type"] = np.frombuffer(trace.type, dtype=np.uint8)
+    records["process"] = np.frombuffer(trace.process, dtype=np.int32)
+    records["resource"] = np.frombuffer(trace.resource, dtype=np.int32)
+    records["count"] = np.frombuffer(trace.count, dtype=np.int32)
+    with TraceWriter(path, simulation.process_ids, simulation.resource_ids,
+                     simulation.capacities, checkpoint_interval) as writer:
+        writer.append_records(records)
+    return len(records)
+
+class TraceReader:
+    """
+    Memory-mapped reader of a binary trace file
+    
+    Records are mapped, not read, so opening a trace costs the same however
+    long it is, and ``state_at(k)`` replays at most one checkpoint interval.
+    """
+    
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            header = f.read(HEADER_SIZE)
+            if len(header) < HEADER_SIZE:
+                raise ValueError("Not a trace file: too short")
+            (magic, version, header_size, self.n_events, n_processes, n_resources,
+             self.checkpoint_interval, n_checkpoints, records_offset, strings_offset,
+             checkpoints_offset) = struct.unpack(HEADER_FORMAT, header)
+            if magic != MAGIC:
+                raise ValueError("Not a trace file: bad magic")
+            if version != VERSION:
+                raise ValueError(f"Unsupported trace version: {version}")
+            
+            f.seek(strings_offset)
+            names = []
+            for _ in range(n_processes + n_resources):
+                (length,) = struct.unpack("<I", f.read(4))
+                names.append(f.read(length).decode("utf-8"))
+            self.process_ids = names[:n_processes]
+            self.resource_ids = names[n_processes:]
+            self.capacities = np.frombuffer(f.read(4 * n_resources), dtype="<i4").copy()
+        
+        self.records = np.memmap(self.path, dtype=RECORD_DTYPE, mode="r",
+                                 offset=records_offset, shape=(self.n_events,)) if self.n_events else np.empty(0, RECORD_DTYPE)
+        checkpoint_size = 4 * (n_processes * n_resources + 2 * n_processes)
+        self._checkpoints = np.memmap(self.path, dtype=np.uint8, mode="r", offset=checkpoints_offset,
+                                      shape=(n_checkpoints, checkpoint_size)) if n_checkpoints else None
+    
+    def __len__(self) -> int:
+        return self.n_events
+    
+    def __getitem__(self, index: Any) -> np.ndarray:
+        return self.records[index]
+    
+    def state_at(self, step: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Rebuild the state before record ``step`` (0 is the start, len(self) the end)
+        
+        Returns:
+            Tuple of the P x R allocation matrix and the resource and count
+            each process waits for (-1 and 0 if it is not waiting)
+        """
+        if not 0 <= step <= self.n_events:
+            raise IndexError(f"Step {step} is outside the trace (0..{self.n_events})")
+        n_processes, n_resources = len(self.process_ids), len(self.resource_ids)
+        if self._checkpoints is None:
+            allocation = np.zeros((n_processes, n_resources), dtype=np.int64)
+            waiting_resource = np.full(n_processes, -1, dtype=np.int64)
+            waiting_count = np.zeros(n_processes, dtype=np.int64)
+            start = 0
+        else:
+            index = min(step // self.checkpoint_interval, len(self._checkpoints) - 1)
+            snapshot = np.frombuffer(self._checkpoints[index], dtype="<i4").astype(np.int64)
+            cells = n_processes * n_resources
+            allocation = snapshot[:cells].reshape(n_processes, n_resources)
+            waiting_resource = snapshot[cells:cells + n_processes].copy()
+            waiting_count = snapshot[cells + n_processes:].copy()
+            start = index * self.checkpoint_interval
+        apply_records(np.asarray(self.records[start:step]), allocation, waiting_resource, waiting_count)
+        return allocation, waiting_resource, waiting_count
+    
+    def graph_at(self, step: int) -> Graph:
+        """Return the resource allocation graph before record ``step``"""
+        allocation, waiting_resource, waiting_count = self.state_at(step)
+        nodes = [{"id": p, "type": "process", "x": 0, "y": 0} for p in self.process_ids]
+        nodes += [
+            {"id": r, "type": "resource", "x": 0, "y": 0, "instances": int(capacity)}
+            for r, capacity in zip(self.resource_ids, self.capacities)
+        ]
+        edges = []
+        for i, j in zip(*np.nonzero(allocation)):
+            edges.append({"id": f"a{i}-{j}", "source": self.resource_ids[j], "target": self.process_ids[i],
+                          "type": "allocation", "count": int(allocation[i, j])})
+        for i in np.flatnonzero(waiting_resource >= 0):
+            edges.append({"id": f"r{i}", "source": self.process_ids[i],
+                          "target": self.resource_ids[waiting_resource[i]],
+                          "type": "request", "count": int(waiting_count[i])})
+        return Graph(nodes=nodes, edges=edges)
+
+def trace_path(trace_id: str) -> Path:
+    """Return the file of a saved trace, raising KeyError if there is none"""
+    if not re.fullmatch(r"[0-9a-f]{32}", trace_id or ""):
+        raise KeyError(f"Trace {trace_id} not found")
+    path = TRACE_DIR / f"{trace_id}.ragt"
+    if not path.exists():
+        raise KeyError(f"Trace {trace_id} not found")
+    return path
+
+def run_recorded_simulation(spec: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run a simulation and save its full trace for replay
+    
+    Returns:
+        The run_simulation result with the ``traceId`` of the saved trace
+    """
+    simulation = Simulation(spec)
+    result = simulation_result(simulation, simulation.run(), spec)
+    trace_id = uuid.uuid4().hex
+    path = TRACE_DIR / f"{trace_id}.ragt"
+    write_simulation_trace(path, simulation)
+    prune_traces(keep=path)
+    result["traceId"] = trace_id
+    return result
+
+def prune_traces(keep: Optional[Path] = None) -> List[str]:
+    """
+    Delete the oldest saved traces until at most MAX_TRACES remain, taking
+    at most MAX_TRACE_BYTES together
+    
+    Args:
+        keep: Trace that is never deleted, e.g. the one just saved
+    
+    Returns:
+        Ids of the deleted traces
+    """
+    traces = []
+    for path in TRACE_DIR.glob("*.ragt"):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        traces.append((stat.st_mtime_ns, stat.st_size, path))
+    traces.sort(key=lambda trace: trace[0])
+    
+    count = len(traces)
+    total = sum(size for _, size, _ in traces)
+    deleted = []
+    for _, size, path in traces:
+        if count <= MAX_TRACES and total <= MAX_TRACE_BYTES:
+            break
+        if keep is not None and path == Path(keep):
+            continue
+        # Another worker may have pruned it already
+        path.unlink(missing_ok=True)
+        count -= 1
+        total -= size
+        deleted.append(path.stem)
+    return deleted
+
+def trace_step(trace_id: str, step: int) -> Dict[str, Any]:
+    """
+    Return the graph of a saved trace before record ``step``
+    
+    Args:
+        trace_id: Id returned by run_recorded_simulation
+        step: Record index, 0 for the start and the trace length for the end
+    
+    Returns:
+        Dictionary with the graph, the step, the trace length and the record at the step
+    """
+    reader = TraceReader(trace_path(trace_id))
+    if isinstance(step, bool) or not isinstance(step, int) or not 0 <= step <= len(reader):
+        raise ValueError(f"step must be between 0 and {len(reader)}")
+    record = None
+    if step < len(reader):
+        at, event_type, process, resource, count = reader[step].tolist()
+        record = {
+            "time": at,
+            "type": EVENT_NAMES[event_type],
+            "process": reader.process_ids[process],
+            "resource": reader.resource_ids[resource] if resource >= 0 else None,
+            "count": count
+        }
+    return {
+        "graph": reader.graph_at(step).model_dump(),
+        "step": step,
+        "events": len(reader),
+        "nextEvent": record
+    }
@@ -0,0 +1,229 @@
+from typing import Dict, List, Any, Optional, Tuple
+from pathlib import Path
+import io
+import uuid
+import zipfile
+import numpy as np
+from numpy.lib.format import open_memmap, read_magic, read_array_header_1_0, read_array_header_2_0
+
+# Uploaded training sets and the arrays converted from them
+UPLOAD_DIR = Path("data/uploads")
+
+# Bytes read from an upload per step, and the largest upload accepted
+UPLOAD_CHUNK_BYTES = 1 << 20
+MAX_UPLOAD_BYTES = 4 << 30
+
+# CSV lines parsed per block while converting
+CSV_BLOCK_LINES = 100_000
+
+LABEL_COLUMN = "label"
+
+async def save_upload(upload: Any, directory: Path = UPLOAD_DIR) -> Path:
+    """
+    Stream an uploaded file to disk without holding it in memory
+    
+    Args:
+        upload: FastAPI UploadFile
+        directory: Directory to store the file in
+    
+    Returns:
+        Path of the stored file
+    """
+    suffix = Path(upload.filename or "").suffix.lower()
+    if suffix not in (".csv", ".npz"):
+        raise ValueError("Training data must be a .csv or .npz file")
+    
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{uuid.uuid4().hex}{suffix}"
+    size = 0
+    try:
+        with open(path, "wb") as f:
+            while True:
+                chunk = await upload.read(UPLOAD_CHUNK_BYTES)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > MAX_UPLOAD_BYTES:
+                    raise ValueError(f"Upload exceeds {MAX_UPLOAD_BYTES} bytes")
+                f.write(chunk)
+    except BaseException:
+        path.unlink(missing_ok=True)
+        raise
+    return path
+
+def prepare_training_file(path: Path, feature_set: str, feature_names: List[str]) -> Dict[str, Any]:
+    """
+    Convert an uploaded file into .npy arrays that training memory-maps
+    
+    CSV files hold one row per sample with the label in the last column, or
+    a header row naming the feature columns (in any order) and a "label"
+    column. NPZ files hold a 2-D "features" array and a 1-D "labels" array.
+    
+    Args:
+        path: Uploaded .csv or .npz file
+        feature_set: Feature set the columns belong to
+        feature_names: Feature names of that set, in model input order
+    
+    Returns:
+        Training data for train_model, referring to the arrays by path
+    """
+    path = Path(path)
+    features_path = path.with_name(f"{path.stem}.features.npy")
+    labels_path = path.with_name(f"{path.stem}.labels.npy")
+    try:
+        if path.suffix == ".csv":
+            _convert_csv(path, feature_names, features_path, labels_path)
+        elif path.suffix == ".npz":
+            _extract_npz(path, features_path, labels_path)
+        else:
+            raise ValueError("Training data must be a .csv or .npz file")
+    except BaseException:
+        features_path.unlink(missing_ok=True)
+        labels_path.unlink(missing_ok=True)
+        raise
+    finally:
+        path.unlink(missing_ok=True)
+    
+    return {
+        "feature_set": feature_set,
+        "features_path": str(features_path),
+        "labels_path": str(labels_path)
+    }
+
+def load_training_arrays(training_data: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Return the features and labels of training data
+    
+    Arrays given by path are memory-mapped rather than read into memory.
+    
+    Args:
+        training_data: Either "features" and "labels" lists or
+            "features_path" and "labels_path" .npy files
+    
+    Returns:
+        Tuple of the feature matrix and the labels
+    """
+    if "features_path" in training_data:
+        try:
+            X = np.load(training_data["features_path"], mmap_mode="r", allow_pickle=False)
+            y = np.load(training_data["labels_path"], mmap_mode="r", allow_pickle=False)
+        except KeyError as e:
+            raise ValueError(f"Training data requires {e}")
+        except (OSError, ValueError) as e:
+            raise ValueError(f"Cannot read training arrays: {str(e)}")
+        for name, array in (("features", X), ("labels", y)):
+            if not (np.issubdtype(array.dtype, np.number) or array.dtype == np.bool_):
+                raise ValueError(f"Training {name} must be numeric, got {array.dtype}")
+        return X, y
+    
+    try:
+        X = np.array(training_data["features"], dtype=float)
+        y = np.array(training_data["labels"])
+    except KeyError as e:
+        raise ValueError(f"Training data requires {e}")
+    except (TypeError, ValueError):
+        raise ValueError("Training features must be a rectangular list of numbers")
+    return X, y
+
+def remove_training_files(training_data: Dict[str, Any]) -> None:
+    """Delete the arrays converted from an upload once they are no longer needed"""
+    for key in ("features_path", "labels_path"):
+        if key in training_data:
+            Path(training_data[key]).unlink(missing_ok=True)
+
+def _convert_csv(path: Path, feature_names: List[str], features_path: Path, labels_path: Path) -> None:
+    with open(path) as f:
+        first = f.readline()
+        header = _parse_header(first)
+        width = len(header) if header else len(first.split(","))
+        rows = sum(1 for line in f if line.strip()) + (0 if header or not first.strip() else 1)
+    if rows == 0:
+        raise ValueError("CSV file contains no rows")
+    
+    if header:
+        missing = [name for name in feature_names + [LABEL_COLUMN] if name not in header]
+        if missing:
+            raise ValueError(f"CSV header is missing columns: {', '.join(missing)}")
+        feature_columns = [header.index(name) for name in feature_names]
+        label_column = header.index(LABEL_COLUMN)
+    else:
+        if width != len(feature_names) + 1:
+            raise ValueError(f"Expected {len(feature_names)} feature columns and a label column, got {width} columns")
+        feature_columns = list(range(len(feature_names)))
+        label_column = width - 1
+    
+    X = open_memmap(features_path, mode="w+", dtype=np.float64, shape=(rows, len(feature_names)))
+    y = open_memmap(labels_path, mode="w+", dtype=np.int64, shape=(rows,))
+    written = 0
+    with open(path) as f:
+        if header:
+            f.readline()
+        block: List[str] = []
+        for line in f:
+            if line.strip():
+                block.append(line)
+            if len(block) == CSV_BLOCK_LINES:
+                written = _write_block(block, width, feature_columns, label_column, X, y, written)
+                block = []
+        if block:
+            written = _write_block(block, width, feature_columns, label_column, X, y, written)
+    X.flush()
+    y.flush()
+    del X, y
+
+def _parse_header(line: str) -> Optional[List[str]]:
+    cells = [cell.strip() for cell in line.split(",")]
+    try:
+        [float(cell) for cell in cells]
+        return None
+    except ValueError:
+        return cells
+
+def _write_block(block: List[str], width: int, feature_columns: List[int], label_column: int,
+                 X: np.ndarray, y: np.ndarray, start: int) -> int:
+    try:
+        data = np.loadtxt(io.StringIO("".join(block)), delimiter=",", ndmin=2, dtype=np.float64)
+    except ValueError as e:
+        raise ValueError(f"Malformed CSV near row {start + 1}: {str(e)}")
+    if data.shape[1] != width:
+        raise ValueError(f"Expected {width} columns near row {start + 1}, got {data.shape[1]}")
+    labels = data[:, label_column]
+    if not np.array_equal(labels, np.round(labels)):
+        raise ValueError(f"Labels must be whole numbers (near row {start + 1})")
+    end = start + len(data)
+    X[start:end] = data[:, feature_columns]
+    y[start:end] = labels.astype(np.int64)
+    return end
+
+def _extract_npz(path: Path, features_path: Path, labels_path: Path) -> None:
+    # Members of an .npz are .npy files; copying them out lets them be mapped
+    try:
+        archive = zipfile.ZipFile(path)
+    except zipfile.BadZipFile:
+        raise ValueError("Not a valid .npz file")
+    with archive:
+        for name, target in (("features", features_path), ("labels", labels_path)):
+            member = f"{name}.npy"
+            if member not in archive.namelist():
+                raise ValueError(f".npz file requires a '{name}' array")
+            with archive.open(member) as source:
+                _check_npy_header(source, name)
+            with archive.open(member) as source, open(target, "wb") as destination:
+                while True:
+                    chunk = source.read(UPLOAD_CHUNK_BYTES)
+                    if not chunk:
+                        break
+                    destination.write(chunk)
+
+def _check_npy_header(source: Any, name: str) -> None:
+    try:
+        version = read_magic(source)
+        if version == (1, 0):
+            _, _, dtype = read_array_header_1_0(source)
+        else:
+            _, _, dtype = read_array_header_2_0(source)
+    except ValueError as e:
+        raise ValueError(f"Array '{name}' is not a valid .npy array: {str(e)}")
+    if dtype.hasobject:
+        raise ValueError(f"Array '{name}' must not contain Python objects")
@@ -0,0 +1,236 @@
+from typing import Dict, List, Any, Optional
+import multiprocessing
+import queue
+import shutil
+import threading
+import time
+import uuid
+import logging
+from .ml_prediction import train_model, validate_training_data, model_holders, temp_model_files, TrainingCancelled
+from .model_registry import model_registry
+from .training_data import remove_training_files
+
+logger = logging.getLogger(__name__)
+
+# Finished jobs kept for status queries before the oldest are forgotten
+MAX_FINISHED_JOBS = 100
+
+# Seconds a cancel waits for a worker that is saving its model
+COMMIT_WAIT_SECONDS = 60
+
+# Jobs allowed to run at once; each one is a process fitting a forest
+MAX_RUNNING_JOBS = 2
+
+# Spawned workers start from a clean interpreter instead of forking the
+# server with its threads and open sockets
+_mp_context = multiprocessing.get_context("spawn")
+
+def _train_worker(training_data: Dict[str, Any], messages, cancel_event, commit_lock, committed) -> None:
+    """Fit and save a model in the worker process, reporting back through a queue"""
+    holding_lock = False
+    
+    def before_save() -> bool:
+        # Held until the swap is recorded, so a cancel either happens before
+        # the model is replaced or finds the job already committed
+        nonlocal holding_lock
+        commit_lock.acquire()
+        holding_lock = True
+        return not cancel_event.is_set()
+    
+    try:
+        result = train_model(
+            training_data,
+            lambda progress: messages.put(("progress", progress)),
+            before_save
+        )
+        committed.value = 1
+        messages.put(("completed", result))
+    except TrainingCancelled:
+        messages.put(("cancelled", None))
+    except Exception as e:
+        messages.put(("failed", str(e)))
+    finally:
+        if holding_lock:
+            commit_lock.release()
+
+class TooManyTrainingJobs(Exception):
+    """Raised when a job is submitted while MAX_RUNNING_JOBS are already running"""
+
+class TrainingJob:
+    """A model training run executing in its own process"""
+
+    def __init__(self, training_data: Dict[str, Any]):
+        self.id = uuid.uuid4().hex
+        self.feature_set = training_data.get("feature_set", "v1")
+        self._training_data = training_data
+        self.status = "queued"
+        self.progress = 0.0
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._messages = _mp_context.Queue()
+        self._cancel_event = _mp_context.Event()
+        self._commit_lock = _mp_context.Lock()
+        self._committed = _mp_context.Value("b", 0)
+        self._process = _mp_context.Process(
+            target=_train_worker,
+            args=(training_data, self._messages, self._cancel_event, self._commit_lock, self._committed),
+            daemon=True
+        )
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """Start the worker process and a thread that follows its progress"""
+        with self._lock:
+            self._process.start()
+            self.status = "running"
+            self.started_at = time.time()
+        threading.Thread(target=self._monitor, daemon=True).start()
+
+    def cancel(self) -> bool:
+        """
+        Cancel the job if it is still running
+
+        The worker checks for cancellation before swapping in its model and
+        holds a lock across the swap, so a cancelled job never replaces the
+        model and a job that already replaced it is reported as completed.
+        This can block for up to COMMIT_WAIT_SECONDS while a worker saves its
+        model, so the API calls it from the executor.
+
+        Returns:
+            True if the job was cancelled, False if it had already finished
+        """
+        with self._lock:
+            if self.status not in ("queued", "running"):
+                return False
+            self._cancel_event.set()
+            if not self._commit_lock.acquire(timeout=COMMIT_WAIT_SECONDS):
+                return False
+            try:
+                if self._committed.value:
+                    # The new model is already live; the monitor marks it completed
+                    return False
+                self._process.terminate()
+                self.status = "cancelled"
+                self.finished_at = time.time()
+            finally:
+                self._commit_lock.release()
+        self._process.join()
+        self._remove_temp_files()
+        remove_training_files(self._training_data)
+        return True
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the job status as a JSON-serializable dictionary"""
+        return {
+            "jobId": self.id,
+            "status": self.status,
+            "progress": self.progress,
+            "featureSet": self.feature_set,
+            "result": self.result,
+            "error": self.error,
+            "createdAt": self.created_at,
+            "startedAt": self.started_at,
+            "finishedAt": self.finished_at
+        }
+
+    def _monitor(self) -> None:
+        while True:
+            alive = self._process.is_alive()
+            try:
+                kind, payload = self._messages.get(timeout=0.5)
+            except queue.Empty:
+                # Only give up once the process had exited before an empty read
+                if not alive:
+                    self._finish("failed", error="Training process exited unexpectedly")
+                    break
+                continue
+
+            if kind == "progress":
+                self.progress = payload
+            elif kind == "completed":
+                self._finish("completed", result=payload)
+                break
+            elif kind == "cancelled":
+                break
+            else:
+                self._finish("failed", error=payload)
+                break
+        self._process.join()
+
+    def _remove_temp_files(self) -> None:
+        for tmp_path in temp_model_files(model_holders[self.feature_set].path, self._process.pid):
+            try:
+                tmp_path.unlink()
+            except FileNotFoundError:
+                pass
+        for tmp_dir in model_registry.temp_dirs(self._process.pid):
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def _finish(self, status: str, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None) -> None:
+        if status == "failed":
+            self._remove_temp_files()
+        remove_training_files(self._training_data)
+        with self._lock:
+            if self.status == "cancelled":
+                return
+            self.status = status
+            self.result = result
+            self.error = error
+            self.finished_at = time.time()
+        if status == "completed":
+            # Pick up the new model file now rather than on the next prediction
+            model_holders[self.feature_set].get()
+            logger.info(f"Training job {self.id} completed")
+        else:
+            logger.error(f"Training job {self.id} failed: {error}")
+
+class TrainingJobManager:
+    """Registry of training jobs"""
+
+    def __init__(self):
+        self._jobs: Dict[str, TrainingJob] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, training_data: Dict[str, Any]) -> TrainingJob:
+        """
+        Start a new training job
+
+        Raises ValueError for malformed training data and TooManyTrainingJobs
+        when MAX_RUNNING_JOBS jobs are already running.
+        """
+        validate_training_data(training_data)
+        with self._lock:
+            running = sum(1 for job in self._jobs.values() if job.status in ("queued", "running"))
+            if running >= MAX_RUNNING_JOBS:
+                raise TooManyTrainingJobs(f"{running} training jobs are already running; try again later")
+            self._forget_finished()
+            job = TrainingJob(training_data)
+            self._jobs[job.id] = job
+        job.start()
+        return job
+
+    def get(self, job_id: str) -> TrainingJob:
+        """Look up a job, raising KeyError if it does not exist"""
+        with self._lock:
+            if job_id not in self._jobs:
+                raise KeyError(f"Training job {job_id} not found")
+            return self._jobs[job_id]
+
+    def list(self) -> List[TrainingJob]:
+        """Return all known jobs, newest first"""
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda job: job.created_at, reverse=True)
+
+    def _forget_finished(self) -> None:
+        finished = sorted(
+            (job for job in self._jobs.values() if job.finished_at is not None),
+            key=lambda job: job.finished_at
+        )
+        for job in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job.id]
+
+# Process-wide job manager used by the API
+training_jobs = TrainingJobManager()
@@ -0,0 +1,60 @@
+import argparse
+import json
+import joblib
+import numpy as np
+from models.ml_prediction import FEATURE_SETS, model_holders
+from models.model_search import MODEL_FAMILIES, CV_FOLDS, search_models
+from train_structural_model import generate_structural_training_data
+
+def load_dataset(path):
+    """Load features and labels from an .npz file with "features" and "labels" arrays"""
+    with np.load(path) as data:
+        return data["features"], data["labels"]
+
+def print_comparison(report):
+    print(f"Searched {report['tasks']} fits in {report['searchSeconds']:.1f}s\n")
+    print(f"{'family':<20} {'cv acc':>8} {'test acc':>9} {'latency ms':>11} {'size KiB':>9}  params")
+    for row in report["comparison"]:
+        print(f"{row['family']:<20} {row['cvAccuracy']:>8.4f} {row['testAccuracy']:>9.4f} "
+              f"{row['latencyMs']:>11.3f} {row['sizeBytes'] / 1024:>9.1f}  {row['params']}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cross-validated model search for deadlock prediction")
+    parser.add_argument("--data", help="Dataset .npz with features and labels; structural data is generated if omitted")
+    parser.add_argument("--samples", type=int, default=5000, help="Graphs to generate when no dataset is given")
+    parser.add_argument("--feature-set", choices=sorted(FEATURE_SETS), default="v2",
+                        help="Feature set of the dataset, used by --save")
+    parser.add_argument("--families", default=",".join(MODEL_FAMILIES),
+                        help="Comma-separated model families to compare")
+    parser.add_argument("--folds", type=int, default=CV_FOLDS)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes, one per CPU by default")
+    parser.add_argument("--report", help="Write the full report as JSON to this path")
+    parser.add_argument("--output", help="Save the most accurate model with joblib to this path")
+    parser.add_argument("--save", action="store_true",
+                        help="Make the most accurate model the active model of --feature-set")
+    args = parser.parse_args()
+    
+    if args.data:
+        X, y = load_dataset(args.data)
+    else:
+        X, y = generate_structural_training_data(args.samples)
+    
+    report = search_models(X, y, families=args.families.split(","), folds=args.folds, workers=args.workers)
+    print_comparison(report)
+    
+    best = report["comparison"][0]
+    best_model = report["models"][best["family"]]
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump({key: value for key, value in report.items() if key != "models"}, f, indent=2)
+    if args.output:
+        joblib.dump(best_model, args.output)
+        print(f"\nBest model saved to {args.output}")
+    if args.save:
+        if X.shape[1] != len(FEATURE_SETS[args.feature_set]):
+            parser.error(f"Dataset has {X.shape[1]} features but {args.feature_set} expects {len(FEATURE_SETS[args.feature_set])}")
+        version = model_holders[args.feature_set].set(best_model, {
+            "family": best["family"], "params": best["params"], "testAccuracy": best["testAccuracy"]
+        })
+        print(f"\nBest model ({best['family']}) saved for {args.feature_set}" +
+              (f" as registry version {version}" if version else ""))
@@ -0,0 +1,40 @@
+import argparse
+import json
+import random
+from models.feature_selection import DEFAULT_TOLERANCE, label_graphs, select_features
+from models.ml_prediction import save_model
+from train_structural_model import generate_random_graph
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recommend a cheaper feature set for deadlock prediction")
+    parser.add_argument("--samples", type=int, default=2000, help="Random graphs to evaluate on")
+    parser.add_argument("--max-processes", type=int, default=40)
+    parser.add_argument("--max-resources", type=int, default=20)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Accuracy that may be lost relative to all features")
+    parser.add_argument("--report", default="data/models/feature_selection.json")
+    parser.add_argument("--model", default="data/models/deadlock_prediction_model_selected.pkl")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    
+    rng = random.Random(args.seed)
+    graphs = [generate_random_graph(rng, args.max_processes, args.max_resources) for _ in range(args.samples)]
+    report = select_features(graphs, label_graphs(graphs), tolerance=args.tolerance)
+    
+    print(f"{'feature':<24} {'group':<12} {'group ms':>9} {'importance':>11}")
+    for feature in sorted(report["features"], key=lambda f: f["importance"], reverse=True):
+        print(f"{feature['name']:<24} {feature['group']:<12} "
+              f"{feature['groupSecondsPerGraph'] * 1000:>9.3f} {feature['importance']:>11.4f}")
+    
+    print("\nAccuracy lost without each group:")
+    for group, drop in report["ablationAccuracyDrop"].items():
+        print(f"  {group:<12} {drop:+.4f}")
+    
+    print(f"\nAll features: {report['fullAccuracy']:.4f}")
+    print(f"Selected ({', '.join(report['selectedGroups'])}): {report['selectedAccuracy']:.4f}, "
+          f"extraction {report['extractionSpeedup']:.1f}x faster")
+    
+    save_model(report.pop("model"), args.model)
+    with open(args.report, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nModel saved to {args.model}, report to {args.report}")
@@ -26,6 +26,10 @@ def setup_backend():
     print("Training initial ML model...")
     subprocess.check_call([sys.executable, "train_model.py"])
     
+    # Train the structural-feature model used for fast prediction
+    print("Training structural ML model...")
+    subprocess.check_call([sys.executable, "train_structural_model.py"])
+    
     print("Backend setup complete!")
 
 if __name__ == "__main__":
@@ -0,0 +1,51 @@
+import sys
+from pathlib import Path
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    """Run every test in an empty directory so data/ paths stay isolated"""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data" / "models").mkdir(parents=True)
+    from models import ml_prediction
+    for holder in ml_prediction.model_holders.values():
+        holder._model = None
+        holder._signature = None
+    return tmp_path
+
+@pytest.fixture
+def client(workdir):
+    from fastapi.testclient import TestClient
+    import main
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+def make_graph(processes, resources, allocations=(), requests=()):
+    """
+    Build graph data from compact descriptions
+
+    Args:
+        processes: Process ids
+        resources: Mapping of resource id to instances
+        allocations: (resource, process, count) triples
+        requests: (process, resource, count) triples
+    """
+    nodes = [{"id": p, "type": "process", "x": 0, "y": 0} for p in processes]
+    nodes += [{"id": r, "type": "resource", "x": 0, "y": 0, "instances": n} for r, n in resources.items()]
+    edges = []
+    for source, target, count in allocations:
+        edges.append({"id": f"e{len(edges)}", "source": source, "target": target, "type": "allocation", "count": count})
+    for source, target, count in requests:
+        edges.append({"id": f"e{len(edges)}", "source": source, "target": target, "type": "request", "count": count})
+    return {"nodes": nodes, "edges": edges}
+
+def deadlocked_pair():
+    """Two processes each holding the single instance the other requests"""
+    return make_graph(
+        ["P0", "P1"], {"R0": 1, "R1": 1},
+        allocations=[("R0", "P0", 1), ("R1", "P1", 1)],
+        requests=[("P0", "R1", 1), ("P1", "R0", 1)]
+    )
@@ -0,0 +1,56 @@
+import networkx as nx
+from models import analysis, bankers, deadlock
+from models.graph import Graph
+from models.deadlock import detect_deadlock
+from conftest import make_graph, deadlocked_pair
+
+def _multi_instance_deadlock():
+    return make_graph(
+        ["P1", "P3"], {"R1": 2, "R2": 2},
+        allocations=[("R1", "P1", 2), ("R2", "P3", 2)],
+        requests=[("P1", "R2", 1), ("P3", "R1", 1)]
+    )
+
+def test_analysis_matches_individual_endpoints():
+    graph = Graph(**_multi_instance_deadlock())
+    result = analysis.analyze_graph(graph)
+    assert result["detection"] == detect_deadlock(graph)
+    assert result["bankers"]["deadlocked"] == ["P1", "P3"]
+    assert set(result["timings"]) >= {"convert", "cycles", "bankers", "detection", "features", "prediction", "total"}
+
+def test_shared_stages_run_once(monkeypatch):
+    calls = {"state": 0, "cycles": 0}
+    original_state = bankers.graph_to_state
+    original_cycles = nx.simple_cycles
+
+    def counting_state(graph):
+        calls["state"] += 1
+        return original_state(graph)
+
+    def counting_cycles(G, *args, **kwargs):
+        calls["cycles"] += 1
+        return original_cycles(G, *args, **kwargs)
+
+    monkeypatch.setattr(analysis, "graph_to_state", counting_state)
+    monkeypatch.setattr(deadlock, "graph_to_state", counting_state)
+    monkeypatch.setattr(nx, "simple_cycles", counting_cycles)
+    analysis.analyze_graph(Graph(**_multi_instance_deadlock()))
+    assert calls == {"state": 1, "cycles": 1}
+
+def test_bankers_explanation_uses_process_ids():
+    graph = Graph(**make_graph(
+        ["P1", "P3"], {"R1": 1},
+        allocations=[("R1", "P1", 1)],
+        requests=[("P3", "R1", 1)]
+    ))
+    bankers_result = analysis.analyze_graph(graph)["bankers"]
+    assert bankers_result["safeSequence"] == ["P1", "P3"]
+    text = " ".join(bankers_result["explanation"])
+    assert "Process P1 can complete" in text
+    assert "P1 → P3" in text
+    assert "Process 0" not in text
+
+def test_analyze_endpoint(client):
+    response = client.post("/api/analyze", json=deadlocked_pair())
+    assert response.status_code == 200
+    assert response.json()["detection"]["hasDeadlock"]
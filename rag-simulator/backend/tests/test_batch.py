@@ -0,0 +1,78 @@
+import os
+import signal
+import numpy as np
+import pytest
+from models import parallel, ml_prediction
+from models.batch import detect_deadlock_batch, predict_deadlock_batch
+from models.graph import Graph
+from models.deadlock import detect_deadlock
+from models.ml_prediction import predict_deadlock
+from conftest import make_graph, deadlocked_pair
+
+def _graphs(n):
+    safe = make_graph(["P0"], {"R0": 1}, requests=[("P0", "R0", 1)])
+    graphs = [deadlocked_pair() if i % 3 == 0 else safe for i in range(n)]
+    graphs[5] = {"nodes": "broken"}
+    return graphs
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(parallel, "MAX_WORKERS", 2)
+    monkeypatch.setattr(parallel, "MIN_PARALLEL_ITEMS", 4)
+    yield
+    parallel.shutdown_process_pool()
+
+def test_detect_batch_keeps_order_and_per_item_errors(pool):
+    graphs = _graphs(40)
+    results = detect_deadlock_batch(graphs, chunk_size=3)
+    assert len(results) == 40
+    assert results[5]["result"] is None and results[5]["error"]
+    for i, item in enumerate(results):
+        if i != 5:
+            assert item["error"] is None
+            assert item["result"] == detect_deadlock(Graph(**graphs[i]))
+
+@pytest.mark.parametrize("chunk_size", [0, -1, 1.5])
+def test_invalid_chunk_size_is_rejected(chunk_size):
+    with pytest.raises(ValueError):
+        detect_deadlock_batch(_graphs(10), chunk_size=chunk_size)
+
+def test_broken_pool_is_replaced(pool):
+    graphs = _graphs(20)
+    detect_deadlock_batch(graphs)
+    broken = parallel.get_process_pool()
+    os.kill(next(iter(broken._processes)), signal.SIGKILL)
+    results = detect_deadlock_batch(graphs)
+    assert len(results) == 20
+    assert parallel.get_process_pool() is not broken
+
+def test_predict_batch_matches_single_predictions(pool):
+    graphs = _graphs(12)
+    results = predict_deadlock_batch(graphs)
+    assert results[5]["error"]
+    for i, item in enumerate(results):
+        if i != 5:
+            single = predict_deadlock(Graph(**graphs[i]))
+            assert item["deadlockProbability"] == pytest.approx(single["deadlockProbability"])
+
+def test_batch_endpoint_rejects_zero_chunk_size(client):
+    response = client.post("/api/batch/detect-deadlock", json={"graphs": _graphs(10), "chunkSize": 0})
+    assert response.status_code == 400
+
+def test_batch_predict_endpoint_uses_one_model_call(client, monkeypatch):
+    from sklearn.ensemble import RandomForestClassifier
+    rng = np.random.default_rng(0)
+    X = rng.random((50, 6))
+    model = RandomForestClassifier(n_estimators=5, random_state=0).fit(X, (X[:, 5] > 0.5).astype(int))
+    calls = []
+    real_predict_proba = model.predict_proba
+    monkeypatch.setattr(model, "predict_proba", lambda X: calls.append(len(X)) or real_predict_proba(X))
+    monkeypatch.setattr(ml_prediction.model_holders["v1"], "get", lambda: model)
+
+    graphs = _graphs(10)
+    response = client.post("/api/batch/predict-deadlock", json={"graphs": graphs})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert calls == [9]
+    assert results[5] == {"error": results[5]["error"]} and results[5]["error"]
+    assert all(item["modelVersion"] == "v1" for i, item in enumerate(results) if i != 5)
@@ -0,0 +1,85 @@
+import subprocess
+import sys
+import numpy as np
+import pytest
+from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier, RandomForestRegressor
+from models import ml_prediction
+from models.compiled_forest import CompiledForest, compile_model
+from models.graph import Graph
+from conftest import BACKEND_DIR, deadlocked_pair
+
+def _data(rows=300, columns=6):
+    rng = np.random.default_rng(1)
+    X = rng.random((rows, columns)) * 10
+    y = ((X[:, 0] + X[:, 5]) > 10).astype(int)
+    return X, y
+
+@pytest.mark.parametrize("model_class", [RandomForestClassifier, ExtraTreesClassifier])
+def test_classifier_matches_sklearn(model_class):
+    X, y = _data()
+    model = model_class(n_estimators=20, random_state=0).fit(X[:200], y[:200])
+    compiled = CompiledForest.from_sklearn(model)
+    np.testing.assert_allclose(compiled.predict_proba(X[200:]), model.predict_proba(X[200:]))
+    np.testing.assert_array_equal(compiled.predict(X[200:]), model.predict(X[200:]))
+
+def test_regressor_matches_sklearn():
+    X, y = _data()
+    model = RandomForestRegressor(n_estimators=20, random_state=0).fit(X[:200], X[:200, 1] * y[:200])
+    compiled = CompiledForest.from_sklearn(model)
+    np.testing.assert_allclose(compiled.predict(X[200:]), model.predict(X[200:]))
+
+def test_save_and_load_round_trip(tmp_path):
+    X, y = _data()
+    compiled = CompiledForest.from_sklearn(RandomForestClassifier(n_estimators=5, random_state=0).fit(X, y))
+    compiled.save(tmp_path / "forest.npz")
+    loaded = CompiledForest.load(tmp_path / "forest.npz")
+    np.testing.assert_array_equal(loaded.predict_proba(X), compiled.predict_proba(X))
+
+def test_wrong_width_is_rejected():
+    X, y = _data()
+    compiled = CompiledForest.from_sklearn(RandomForestClassifier(n_estimators=2, random_state=0).fit(X, y))
+    with pytest.raises(ValueError):
+        compiled.predict_proba(X[:, :5])
+
+def test_unsupported_models_are_left_as_they_are():
+    model = {"not": "a forest"}
+    assert compile_model(model) is model
+
+def test_saved_model_is_served_compiled(workdir):
+    X, y = _data()
+    model = RandomForestClassifier(n_estimators=10, random_state=0).fit(X, y)
+    ml_prediction.save_model(model, ml_prediction.MODEL_PATH)
+    assert ml_prediction.compiled_path(ml_prediction.MODEL_PATH).exists()
+    
+    served = ml_prediction.model_holders["v1"].get()
+    assert isinstance(served, CompiledForest)
+    np.testing.assert_allclose(served.predict_proba(X), model.predict_proba(X))
+
+def test_prediction_does_not_import_sklearn(workdir):
+    X, y = _data()
+    ml_prediction.save_model(RandomForestClassifier(n_estimators=5, random_state=0).fit(X, y), ml_prediction.MODEL_PATH)
+    script = (
+        "import sys\n"
+        f"sys.path.insert(0, {str(BACKEND_DIR)!r})\n"
+        "from models.graph import Graph\n"
+        "from models.ml_prediction import predict_deadlock\n"
+        f"result = predict_deadlock(Graph(**{deadlocked_pair()!r}))\n"
+        "assert 0.0 <= result['deadlockProbability'] <= 1.0\n"
+        "assert not any(name.startswith('sklearn') for name in sys.modules)\n"
+    )
+    subprocess.run([sys.executable, "-c", script], check=True, cwd=workdir)
+
+def test_attributions_add_up_to_the_prediction():
+    X, y = _data()
+    model = RandomForestClassifier(n_estimators=20, random_state=0).fit(X, y)
+    base, contributions = CompiledForest.from_sklearn(model).attributions(X[:50])
+    assert contributions.shape == (50, 6)
+    np.testing.assert_allclose(base + contributions.sum(axis=1), model.predict_proba(X[:50])[:, 1], atol=1e-12)
+    # Only features 0 and 5 determine the label
+    assert np.abs(contributions[:, [0, 5]]).sum() > np.abs(contributions[:, 1:5]).sum()
+
+def test_regressor_attributions_add_up():
+    X, y = _data()
+    model = RandomForestRegressor(n_estimators=10, random_state=0).fit(X, X[:, 2])
+    base, contributions = CompiledForest.from_sklearn(model).attributions(X[:20])
+    np.testing.assert_allclose(base + contributions.sum(axis=1), model.predict(X[:20]), atol=1e-12)
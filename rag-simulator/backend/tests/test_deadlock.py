@@ -0,0 +1,78 @@
+import pytest
+from pydantic import ValidationError
+from models.graph import Graph
+from models.deadlock import detect_deadlock
+from models.ml_prediction import extract_features
+from models.language_parser import parse_language_to_graph
+from conftest import make_graph, deadlocked_pair
+
+def test_single_instance_cycle_is_deadlock():
+    result = detect_deadlock(Graph(**deadlocked_pair()))
+    assert result["hasDeadlock"]
+    assert set(result["cycle"]) == {"P0", "P1", "R0", "R1"}
+
+def test_counted_multi_instance_cycle_is_deadlock():
+    graph = make_graph(
+        ["P0", "P1"], {"R0": 2, "R1": 2},
+        allocations=[("R0", "P0", 2), ("R1", "P1", 2)],
+        requests=[("P0", "R1", 1), ("P1", "R0", 1)]
+    )
+    result = detect_deadlock(Graph(**graph))
+    assert result["hasDeadlock"]
+    assert result["deadlockedProcesses"] == ["P0", "P1"]
+
+def test_multi_instance_cycle_with_spare_unit_is_not_deadlock():
+    graph = make_graph(
+        ["P0", "P1"], {"R0": 2, "R1": 2},
+        allocations=[("R0", "P0", 1), ("R1", "P1", 2)],
+        requests=[("P0", "R1", 1), ("P1", "R0", 1)]
+    )
+    assert not detect_deadlock(Graph(**graph))["hasDeadlock"]
+
+def test_unrelated_blocked_process_is_not_reported_as_deadlock():
+    graph = make_graph(
+        ["P1", "P3", "P4"], {"R1": 2, "R2": 2, "R3": 1},
+        allocations=[("R1", "P1", 1), ("R2", "P3", 2)],
+        requests=[("P1", "R2", 1), ("P3", "R1", 1), ("P4", "R3", 5)]
+    )
+    result = detect_deadlock(Graph(**graph))
+    assert not result["hasDeadlock"]
+    assert "P4" in result["explanation"]
+
+def test_deadlock_alongside_blocked_process_returns_cycle_through_deadlocked():
+    graph = make_graph(
+        ["P0", "P1", "P4"], {"R0": 2, "R1": 2, "R3": 1},
+        allocations=[("R0", "P0", 2), ("R1", "P1", 2)],
+        requests=[("P0", "R1", 1), ("P1", "R0", 1), ("P4", "R3", 5)]
+    )
+    result = detect_deadlock(Graph(**graph))
+    assert result["hasDeadlock"]
+    assert result["deadlockedProcesses"] == ["P0", "P1"]
+    assert set(result["cycle"]) == {"P0", "P1", "R0", "R1"}
+
+@pytest.mark.parametrize("count", [0, -5])
+def test_non_positive_counts_are_rejected(count):
+    graph = make_graph(["P0"], {"R0": 1}, requests=[("P0", "R0", count)])
+    with pytest.raises(ValidationError):
+        Graph(**graph)
+
+def test_over_allocation_is_rejected():
+    graph = make_graph(["P0"], {"R0": 2}, allocations=[("R0", "P0", 3)])
+    with pytest.raises(ValidationError):
+        Graph(**graph)
+
+def test_duplicate_edges_merge_into_counts():
+    graph = make_graph(["P0"], {"R0": 3}, allocations=[("R0", "P0", 1), ("R0", "P0", 2)])
+    G = Graph(**graph).to_networkx()
+    assert G.edges["R0", "P0"]["count"] == 3
+    features = extract_features(Graph(**graph))
+    assert features["allocationEdgeCount"] == 3
+    assert features["resourceUtilization"] == 1.0
+
+def test_parser_emits_counted_edges():
+    graph = parse_language_to_graph(
+        "create_graph { processes = [P0, P1] resources = [R0] "
+        "allocations { R0 -> P0; R0 -> P0; } requests { P1 -> R0; } }"
+    )
+    allocation = [e for e in graph["edges"] if e["type"] == "allocation"]
+    assert len(allocation) == 1 and allocation[0]["count"] == 2
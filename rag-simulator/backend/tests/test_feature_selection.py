@@ -0,0 +1,47 @@
+import random
+import numpy as np
+from models.feature_selection import FEATURE_GROUPS, feature_table, group_features, label_graphs, select_features
+from models.graph import Graph
+from models.ml_prediction import FEATURE_SETS, extract_features, extract_structural_features
+from train_structural_model import generate_random_graph
+from conftest import deadlocked_pair, make_graph
+
+def _graphs(n, seed=0):
+    rng = random.Random(seed)
+    return [generate_random_graph(rng) for _ in range(n)]
+
+def test_feature_table_matches_the_served_extractors():
+    graph = Graph(**deadlocked_pair())
+    table = feature_table([graph])
+    row = dict(zip(table["names"], table["X"][0]))
+    served = {**extract_features(graph), **extract_structural_features(graph)}
+    assert set(row) == set(FEATURE_SETS["v1"]) | set(FEATURE_SETS["v2"])
+    for name, value in row.items():
+        assert value == served[name]
+    assert set(table["groupSeconds"]) == set(FEATURE_GROUPS)
+
+def test_every_feature_belongs_to_one_group():
+    names = feature_table([Graph(**deadlocked_pair())])["names"]
+    groups = group_features(names)
+    assert sorted(name for members in groups.values() for name in members) == sorted(names)
+    assert groups["cycles"] == ["cycleCount"]
+
+def test_selection_keeps_accuracy_within_tolerance():
+    graphs = _graphs(300)
+    labels = label_graphs(graphs)
+    report = select_features(graphs, labels, tolerance=0.02, folds=3)
+    assert "basic" in report["selectedGroups"]
+    assert report["selectedAccuracy"] >= report["fullAccuracy"] - 0.02
+    assert set(report["ablationAccuracyDrop"]) == set(FEATURE_GROUPS) - {"basic"}
+    assert report["model"].n_features_in_ == len(report["selectedFeatures"])
+    assert report["extractionSpeedup"] >= 1.0
+
+def test_labels_match_deadlock_detection():
+    safe = Graph(nodes=[{"id": "P0", "type": "process", "x": 0, "y": 0}], edges=[])
+    # P4 can never get 5 instances of R3, but blocked is not deadlocked
+    blocked = Graph(**make_graph(
+        ["P1", "P3", "P4"], {"R1": 2, "R2": 2, "R3": 1},
+        allocations=[("R1", "P1", 1), ("R2", "P3", 2)],
+        requests=[("P1", "R2", 1), ("P3", "R1", 1), ("P4", "R3", 5)]
+    ))
+    assert label_graphs([Graph(**deadlocked_pair()), safe, blocked]).tolist() == [1, 0, 0]
@@ -0,0 +1,145 @@
+import time
+import pytest
+from models.bankers import check_safety, graph_to_state
+from models.deadlock import detect_deadlock
+from models.lock_importers import import_lock_dump
+
+PROC_LOCKS = """\
+1: POSIX  ADVISORY  WRITE 100 08:01:11 0 EOF
+1: -> POSIX  ADVISORY  WRITE 200 08:01:11 0 EOF
+2: FLOCK  ADVISORY  WRITE 200 08:01:22 0 EOF
+2: -> FLOCK  ADVISORY  WRITE 100 08:01:22 0 EOF
+3: POSIX  ADVISORY  READ 300 08:01:33 0 EOF
+"""
+
+PG_LOCKS = """\
+locktype,database,relation,page,tuple,virtualxid,transactionid,pid,mode,granted
+transactionid,,,,,,901,11,ExclusiveLock,t
+transactionid,,,,,,902,12,ExclusiveLock,t
+transactionid,,,,,,902,11,ShareLock,f
+transactionid,,,,,,901,12,ShareLock,f
+relation,5,1234,,,,,11,RowExclusiveLock,t
+relation,5,1234,,,,,12,RowExclusiveLock,t
+"""
+
+JVM_DUMP = """\
+Full thread dump OpenJDK 64-Bit Server VM:
+
+"worker-1" #12 prio=5 os_prio=0 tid=0x1 nid=0x2 waiting for monitor entry
+   java.lang.Thread.State: BLOCKED (on object monitor)
+\tat Account.transfer(Account.java:10)
+\t- waiting to lock <0x00000000aaaa> (a Account)
+\t- locked <0x00000000bbbb> (a Account)
+\t- locked <0x00000000bbbb> (a Account)
+
+"worker-2" #13 prio=5 os_prio=0 tid=0x3 nid=0x4 waiting for monitor entry
+   java.lang.Thread.State: BLOCKED (on object monitor)
+\tat Account.transfer(Account.java:10)
+\t- waiting to lock <0x00000000bbbb> (a Account)
+\t- locked <0x00000000aaaa> (a Account)
+
+"waiter" #14 prio=5 os_prio=0 tid=0x5 nid=0x6 in Object.wait()
+   java.lang.Thread.State: WAITING (on object monitor)
+\t- waiting on <0x00000000cccc> (a java.lang.Object)
+
+   Locked ownable synchronizers:
+\t- <0x00000000dddd> (a java.util.concurrent.locks.ReentrantLock$NonfairSync)
+"""
+
+def test_proc_locks_crossed_waits_deadlock():
+    result = import_lock_dump(PROC_LOCKS.splitlines(True))
+    assert result["format"] == "proc-locks"
+    assert result["rows"] == 5
+    assert result["processes"] == 3 and result["resources"] == 3
+    assert result["deadlockedProcesses"] == ["pid:100", "pid:200"]
+    assert detect_deadlock(result["graph"])["hasDeadlock"]
+
+def test_pg_locks_crossed_transactions_deadlock():
+    result = import_lock_dump(PG_LOCKS.splitlines(True))
+    assert result["format"] == "pg-locks"
+    assert result["rows"] == 6
+    assert result["deadlockedProcesses"] == ["pid:11", "pid:12"]
+    graph = result["graph"]
+    shared = next(n for n in graph.nodes if n.id == "relation:database=5:relation=1234")
+    # Both sessions hold the shared relation lock, so it has two instances
+    assert shared.instances == 2
+    assert detect_deadlock(graph)["hasDeadlock"]
+
+def test_pg_locks_count_each_holder_once_per_object():
+    lines = PG_LOCKS.splitlines(True)
+    # Session 11 also holds a second mode of the shared relation
+    result = import_lock_dump(lines + ["relation,5,1234,,,,,11,AccessShareLock,t\n"], "pg-locks")
+    assert result["rows"] == 7
+    graph = result["graph"]
+    shared = next(n for n in graph.nodes if n.id == "relation:database=5:relation=1234")
+    assert shared.instances == 2
+    allocations = [e for e in graph.edges if e.source == shared.id]
+    assert sorted((e.target, e.count) for e in allocations) == [("pid:11", 1), ("pid:12", 1)]
+
+def test_granted_waits_alone_are_not_a_deadlock():
+    lines = PG_LOCKS.splitlines(True)
+    result = import_lock_dump([lines[0], lines[1], lines[3]], "pg-locks")
+    assert result["deadlockedProcesses"] == []
+    assert not detect_deadlock(result["graph"])["hasDeadlock"]
+
+def test_jvm_threads_waiting_on_each_others_monitors():
+    result = import_lock_dump(JVM_DUMP.splitlines(True))
+    assert result["format"] == "jvm-threads"
+    assert result["deadlockedProcesses"] == ["thread:worker-1", "thread:worker-2"]
+    edges = {(e.source, e.target, e.type, e.count) for e in result["graph"].edges}
+    # The reentrant lock is counted once and Object.wait is not a wait for a lock
+    assert ("monitor:0x00000000bbbb", "thread:worker-1", "allocation", 1) in edges
+    assert ("monitor:0x00000000dddd", "thread:waiter", "allocation", 1) in edges
+    assert not any("cccc" in edge[0] or "cccc" in edge[1] for edge in edges)
+
+def test_missing_pg_column_and_unknown_format_are_rejected():
+    with pytest.raises(ValueError, match="granted"):
+        import_lock_dump(["locktype,pid\n", "relation,1\n"], "pg-locks")
+    with pytest.raises(ValueError, match="Unknown lock dump format"):
+        import_lock_dump(PROC_LOCKS.splitlines(True), "windows")
+
+def test_reduction_matches_the_safety_algorithm():
+    for dump in (PROC_LOCKS, PG_LOCKS, JVM_DUMP, "".join(PROC_LOCKS.splitlines(True)[2:])):
+        result = import_lock_dump(dump.splitlines(True))
+        state = graph_to_state(result["graph"])
+        safety = check_safety(state)
+        deadlocked = {state["processIds"][i] for i in safety["deadlocked"]}
+        assert deadlocked == set(result["deadlockedProcesses"])
+
+def test_large_dump_imports_in_seconds():
+    def rows(n):
+        yield "locktype,relation,pid,mode,granted\n"
+        for i in range(n):
+            # Every process holds its own relation and waits for the next one
+            yield f"relation,{i},{i},AccessExclusiveLock,t\n"
+            yield f"relation,{(i + 1) % n},{i},AccessExclusiveLock,f\n"
+
+    start = time.perf_counter()
+    result = import_lock_dump(rows(100_000))
+    assert time.perf_counter() - start < 15
+    assert result["rows"] == 200_000
+    assert result["processes"] == 100_000
+    assert len(result["deadlockedProcesses"]) == 100_000
+    timings = result["parseSeconds"] + result["reductionSeconds"] + result["graphSeconds"]
+    assert timings == pytest.approx(result["seconds"])
+
+def test_import_endpoint_creates_a_session(client):
+    response = client.post(
+        "/api/sessions/import-locks",
+        files={"file": ("pg_locks.csv", PG_LOCKS.encode())}
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["format"] == "pg-locks" and body["rows"] == 6
+    assert body["deadlockedProcesses"] == ["pid:11", "pid:12"]
+
+    detection = client.get(f"/api/sessions/{body['sessionId']}/detect-deadlock")
+    assert detection.status_code == 200
+    assert detection.json()["result"]["hasDeadlock"]
+
+    response = client.post(
+        "/api/sessions/import-locks",
+        files={"file": ("locks.txt", b"locktype,pid\nrelation,1\n")},
+        data={"lock_format": "pg-locks"}
+    )
+    assert response.status_code == 400
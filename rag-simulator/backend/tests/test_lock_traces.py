@@ -0,0 +1,154 @@
+import json
+import os
+import threading
+import time
+from models.lock_traces import LiveRAG, LockTraceWatcher, ingest, parse_events, tail_lines
+
+def _write(path, events, mode="w"):
+    with open(path, mode) as f:
+        for event in events:
+            f.write(json.dumps(event) + "\n")
+
+def _event(ts, event, process, resource=None, **extra):
+    return {"ts": ts, "event": event, "process": process, "resource": resource, **extra}
+
+CROSSED = [
+    _event(1, "acquire", "A", "L1"),
+    _event(2, "acquire", "B", "L2"),
+    _event(3, "wait", "A", "L2"),
+    _event(4, "wait", "B", "L1"),
+]
+
+def test_crossed_locks_raise_one_alert(workdir):
+    _write(workdir / "locks.jsonl", CROSSED + [_event(5, "wait", "B", "L1")])
+    rag = LiveRAG()
+    alerts = list(ingest(str(workdir / "locks.jsonl"), rag))
+    assert alerts == [{"type": "deadlock", "ts": 4, "processes": ["A", "B"], "waits": {"A": "L2", "B": "L1"}}]
+    assert rag.stats["events"] == 5 and rag.stats["deadlocks"] == 1
+    edges = {(e.source, e.target, e.type) for e in rag.to_graph().edges}
+    assert ("L1", "A", "allocation") in edges and ("B", "L1", "request") in edges
+
+def test_waiting_on_a_running_holder_is_not_a_deadlock():
+    rag = LiveRAG()
+    for event in CROSSED[:3]:
+        assert rag.apply(*event.values()) is None
+
+def test_free_instances_prevent_a_deadlock():
+    rag = LiveRAG()
+    events = [
+        ("acquire", "A", "L1", None, 2), ("acquire", "B", "L2", None, None),
+        ("wait", "A", "L2", None, None), ("wait", "B", "L1", None, None)
+    ]
+    assert all(rag.apply(0, *event) is None for event in events)
+
+def test_exit_resolves_and_memory_follows_the_live_state():
+    rag = LiveRAG()
+    for event in CROSSED:
+        rag.apply(*event.values())
+    rag.apply(5, "exit", "B", None)
+    rag.apply(6, "acquire", "A", "L2")
+    rag.apply(7, "release", "A", "L1")
+    rag.apply(8, "release", "A", "L2")
+    assert rag.holdings == {} and rag.holders == {} and rag.waiting == {} and rag.waiters == {}
+    assert rag.deadlocked == set() and len(rag.last_seen) == 0
+    # A new deadlock between the same processes alerts again
+    for event in CROSSED:
+        alert = rag.apply(*event.values())
+    assert alert is not None and rag.stats["deadlocks"] == 2
+
+def test_least_recently_active_process_is_evicted():
+    rag = LiveRAG(max_processes=10)
+    for i in range(25):
+        rag.apply(i, "acquire", f"P{i}", f"L{i}")
+    assert len(rag.holdings) == 10 and set(rag.holdings) == {f"P{i}" for i in range(15, 25)}
+    assert rag.stats["evicted"] == 15 and len(rag.holders) == 10
+
+def test_malformed_lines_are_counted_and_skipped():
+    stats = {"malformed": 0}
+    lines = [b'{"event": "acquire", "process": "A", "resource": "L"}', b"not json", b'{"event": "jump", "process": "A"}',
+             b'{"event": "wait", "process": "A"}', b'{"event": "acquire", "process": "A", "resource": "L", "count": 0}',
+             b"", b'{"event": "exit", "process": "A"}']
+    events = list(parse_events(lines, stats))
+    assert [e[1] for e in events] == ["acquire", "exit"]
+    assert stats["malformed"] == 4
+
+def test_tail_follows_appended_lines(workdir):
+    path = workdir / "locks.jsonl"
+    path.write_bytes(b"first\nsec")
+    stop = threading.Event()
+    received = []
+    def reader():
+        for line in tail_lines(str(path), follow=True, poll_interval=0.01, stop=stop):
+            received.append(line)
+    thread = threading.Thread(target=reader)
+    thread.start()
+    time.sleep(0.05)
+    assert received == [b"first"]
+    with open(path, "ab") as f:
+        f.write(b"ond\nthird\n")
+    time.sleep(0.05)
+    stop.set()
+    thread.join()
+    assert received == [b"first", b"second", b"third"]
+
+def test_tail_follows_a_renamed_and_recreated_file(workdir):
+    path = workdir / "locks.jsonl"
+    path.write_bytes(b"old1\n")
+    stop = threading.Event()
+    received = []
+    def reader():
+        for line in tail_lines(str(path), follow=True, poll_interval=0.01, stop=stop):
+            received.append(line)
+    thread = threading.Thread(target=reader)
+    thread.start()
+    time.sleep(0.05)
+    with open(path, "ab") as f:
+        f.write(b"old2\n")
+        os.rename(path, workdir / "locks.jsonl.1")
+        # The writer still holds the old file, so this lands in the rotated file
+        f.write(b"old3\n")
+    path.write_bytes(b"new\n")
+    time.sleep(0.1)
+    stop.set()
+    thread.join()
+    assert received == [b"old1", b"old2", b"old3", b"new"]
+
+def test_tail_restarts_a_file_truncated_in_place(workdir):
+    path = workdir / "locks.jsonl"
+    path.write_bytes(b"first\nsecond\n")
+    stop = threading.Event()
+    received = []
+    def reader():
+        for line in tail_lines(str(path), follow=True, poll_interval=0.01, stop=stop):
+            received.append(line)
+    thread = threading.Thread(target=reader)
+    thread.start()
+    time.sleep(0.05)
+    with open(path, "wb") as f:
+        f.write(b"again\n")
+    time.sleep(0.05)
+    stop.set()
+    thread.join()
+    assert received == [b"first", b"second", b"again"]
+
+def test_watcher_reports_alerts_and_graph(workdir):
+    path = workdir / "locks.jsonl"
+    _write(path, CROSSED[:2])
+    watcher = LockTraceWatcher()
+    watcher.start(str(path))
+    try:
+        _write(path, CROSSED[2:], mode="a")
+        deadline = time.time() + 5
+        while not watcher.status()["alerts"] and time.time() < deadline:
+            time.sleep(0.02)
+        status = watcher.status()
+    finally:
+        watcher.stop()
+    assert status["running"] and status["stats"]["events"] == 4
+    assert status["alerts"][0]["processes"] == ["A", "B"]
+    assert len(status["graph"]["edges"]) == 4
+
+def test_status_endpoint(client):
+    response = client.get("/api/lock-traces/status")
+    assert response.status_code == 200
+    assert response.json()["running"] is False
@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+from models.graph import Graph
+from models import ml_prediction
+from models.ml_prediction import (
+    FEATURE_SETS, extract_features, extract_structural_features,
+    predict_deadlock, train_model, validate_training_data
+)
+from conftest import make_graph, deadlocked_pair
+
+def test_structural_features_of_deadlocked_pair():
+    features = extract_structural_features(Graph(**deadlocked_pair()))
+    assert set(FEATURE_SETS["v2"]) <= set(features)
+    assert features["sccCount"] == 1
+    assert features["largestSccSize"] == 4
+    assert features["nodesInSccs"] == 4
+    assert features["maxWaitForOutDegree"] == 1
+    assert features["maxWaitForInDegree"] == 1
+    assert features["shortCycleCount"] == 1
+
+def test_structural_features_of_acyclic_graph():
+    graph = Graph(**make_graph(["P0", "P1"], {"R0": 2},
+                               allocations=[("R0", "P0", 1)], requests=[("P1", "R0", 1)]))
+    features = extract_structural_features(graph)
+    assert features["sccCount"] == 0
+    assert features["shortCycleCount"] == 0
+    assert features["maxWaitForOutDegree"] == 1
+    assert features["meanWaitForOutDegree"] == 0.5
+
+def test_v1_and_v2_share_basic_features():
+    graph = Graph(**deadlocked_pair())
+    v1 = extract_features(graph)
+    v2 = extract_structural_features(graph)
+    for name in FEATURE_SETS["v1"][:5]:
+        assert v1[name] == v2[name]
+
+def _v2_training_data(rows=200):
+    rng = np.random.default_rng(0)
+    X = rng.random((rows, len(FEATURE_SETS["v2"])))
+    return {"feature_set": "v2", "features": X.tolist(), "labels": (X[:, 5] > 0.5).astype(int).tolist()}
+
+def test_v2_model_is_used_once_trained():
+    train_model(_v2_training_data())
+    prediction = predict_deadlock(Graph(**deadlocked_pair()))
+    assert prediction["modelVersion"] == "v2"
+    assert 0.0 <= prediction["deadlockProbability"] <= 1.0
+
+def test_most_recently_trained_feature_set_is_served(monkeypatch):
+    train_model(_v2_training_data())
+    rng = np.random.default_rng(1)
+    X = rng.random((200, len(FEATURE_SETS["v1"])))
+    train_model({"features": X.tolist(), "labels": (X[:, 5] > 0.5).astype(int).tolist()})
+    assert predict_deadlock(Graph(**deadlocked_pair()))["modelVersion"] == "v1"
+    
+    monkeypatch.setattr(ml_prediction, "PREDICTION_FEATURE_SET", "v2")
+    assert predict_deadlock(Graph(**deadlocked_pair()))["modelVersion"] == "v2"
+
+def test_health_reports_the_served_feature_set(client):
+    assert client.get("/api/health").json()["predictionFeatureSet"] == "v1"
+
+@pytest.mark.parametrize("data", [
+    {"feature_set": "v2", "features": [[1.0] * 6] * 10, "labels": [0, 1] * 5},
+    {"features": [[1.0] * 12] * 10, "labels": [0, 1] * 5},
+    {"features": [[1.0] * 6] * 10, "labels": [0, 1]},
+    {"features": [[1.0] * 6, [1.0]], "labels": [0, 1]},
+    {"feature_set": "v3", "features": [[1.0] * 6], "labels": [0]},
+    {"labels": [0]},
+])
+def test_mismatched_training_data_is_rejected_before_fitting(data):
+    with pytest.raises(ValueError):
+        validate_training_data(data)
+    with pytest.raises(ValueError):
+        train_model(data)
+    assert not ml_prediction.MODEL_PATH.exists()
+    assert not ml_prediction.STRUCTURAL_MODEL_PATH.exists()
+
+def test_train_endpoint_rejects_mismatched_width(client):
+    response = client.post("/api/train-model", json={"feature_set": "v2", "features": [[1.0] * 6], "labels": [1]})
+    assert response.status_code == 400
+
+def test_startup_loads_every_model(workdir):
+    from fastapi.testclient import TestClient
+    import main
+    train_model(_v2_training_data())
+    for holder in ml_prediction.model_holders.values():
+        holder._model = None
+        holder._signature = None
+    with TestClient(main.app):
+        assert ml_prediction.model_holders["v2"]._model is not None
+
+def test_predictions_include_attributions(client):
+    train_model(_v2_training_data())
+    result = client.post("/api/predict-deadlock", json=deadlocked_pair()).json()
+    assert set(result["attributions"]) == set(FEATURE_SETS["v2"])
+    assert result["baseValue"] + sum(result["attributions"].values()) == pytest.approx(result["deadlockProbability"])
+    
+    [batched] = client.post("/api/batch/predict-deadlock", json={"graphs": [deadlocked_pair()]}).json()["results"]
+    assert batched["attributions"] == pytest.approx(result["attributions"])
+
+def test_heuristic_predictions_have_no_attributions():
+    result = predict_deadlock(Graph(**deadlocked_pair()))
+    assert result["attributions"] is None and result["baseValue"] is None
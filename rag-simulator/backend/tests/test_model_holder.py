@@ -0,0 +1,45 @@
+import os
+import joblib
+from models.ml_prediction import ModelHolder, save_model
+
+def _write(path, model, mtime_ns):
+    save_model(model, path)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+def test_missing_model_file_returns_none(workdir):
+    assert ModelHolder(workdir / "data" / "models" / "missing.pkl").get() is None
+
+def test_model_is_loaded_once_and_reloaded_on_change(workdir, monkeypatch):
+    path = workdir / "data" / "models" / "model.pkl"
+    _write(path, {"version": 1}, 1_000_000_000)
+    holder = ModelHolder(path)
+
+    loads = []
+    real_load = joblib.load
+    monkeypatch.setattr(joblib, "load", lambda *args: loads.append(args) or real_load(*args))
+
+    assert holder.get() == {"version": 1}
+    assert holder.get() == {"version": 1}
+    assert len(loads) == 1
+
+    _write(path, {"version": 2}, 2_000_000_000)
+    assert holder.get() == {"version": 2}
+    assert len(loads) == 2
+
+def test_unreadable_model_keeps_previous_one(workdir):
+    path = workdir / "data" / "models" / "model.pkl"
+    _write(path, {"version": 1}, 1_000_000_000)
+    holder = ModelHolder(path)
+    assert holder.get() == {"version": 1}
+
+    path.write_bytes(b"not a pickle")
+    os.utime(path, ns=(2_000_000_000, 2_000_000_000))
+    assert holder.get() == {"version": 1}
+
+def test_set_saves_atomically_and_swaps(workdir):
+    path = workdir / "data" / "models" / "model.pkl"
+    holder = ModelHolder(path)
+    holder.set({"version": 3})
+    assert holder.get() == {"version": 3}
+    assert joblib.load(path) == {"version": 3}
+    assert not list(path.parent.glob("*.tmp"))
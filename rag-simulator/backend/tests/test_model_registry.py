@@ -0,0 +1,102 @@
+import os
+import threading
+import time
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from models import ml_prediction
+from models.file_lock import file_lock
+from models.model_registry import ModelRegistry
+
+def _model(seed):
+    rng = np.random.default_rng(seed)
+    X = rng.random((200, 6))
+    return RandomForestClassifier(n_estimators=5, random_state=seed).fit(X, (X[:, seed % 6] > 0.5).astype(int)), X
+
+def test_register_list_and_load_memory_mapped(workdir):
+    registry = ModelRegistry(workdir / "registry")
+    model, X = _model(0)
+    version = registry.register("v1", model, {"accuracy": 0.9})
+    assert version == 1
+    
+    [meta] = registry.list_versions("v1")
+    assert meta["active"] and meta["version"] == 1
+    assert meta["sizeBytes"] > 0 and meta["loadTimeMs"] >= 0
+    assert meta["metadata"] == {"accuracy": 0.9}
+    
+    loaded = registry.load("v1")
+    assert isinstance(loaded.value, np.memmap)
+    np.testing.assert_allclose(loaded.predict_proba(X), model.predict_proba(X))
+
+def test_activate_and_rollback(workdir):
+    registry = ModelRegistry(workdir / "registry")
+    for seed in range(3):
+        registry.register("v1", _model(seed)[0])
+    assert registry.active_version("v1") == 3
+    
+    registry.activate("v1", 1)
+    assert registry.active_version("v1") == 1
+    assert registry.rollback("v1") == 3
+    assert registry.rollback("v1") == 2
+    assert registry.rollback("v1") == 1
+    with pytest.raises(ValueError):
+        registry.rollback("v1")
+    with pytest.raises(KeyError):
+        registry.activate("v1", 7)
+
+def test_unsupported_models_are_rejected(workdir):
+    with pytest.raises(ValueError):
+        ModelRegistry(workdir / "registry").register("v1", {"not": "a forest"})
+
+def test_holder_follows_the_active_version(workdir):
+    first, X = _model(0)
+    second, _ = _model(1)
+    holder = ml_prediction.model_holders["v1"]
+    assert holder.set(first) == 1
+    assert holder.set(second) == 2
+    np.testing.assert_allclose(holder.get().predict_proba(X), second.predict_proba(X))
+    
+    ml_prediction.model_registry.activate("v1", 1)
+    np.testing.assert_allclose(holder.get().predict_proba(X), first.predict_proba(X))
+
+def test_newer_model_file_wins_over_the_active_version(workdir):
+    first, X = _model(0)
+    second, _ = _model(1)
+    holder = ml_prediction.model_holders["v1"]
+    holder.set(first)
+    # A tool that only writes the pickle, like train_model.py, after the activation
+    ml_prediction.save_model(second, holder.path)
+    later = time.time_ns() + 10**9
+    for path in (holder.path, ml_prediction.compiled_path(holder.path)):
+        os.utime(path, ns=(later, later))
+    np.testing.assert_allclose(holder.get().predict_proba(X), second.predict_proba(X))
+    
+    # Setting a model afterwards makes the registry current again
+    holder.set(first)
+    np.testing.assert_allclose(holder.get().predict_proba(X), first.predict_proba(X))
+
+def test_activation_waits_for_other_processes(workdir):
+    registry = ModelRegistry(workdir / "registry")
+    for seed in range(2):
+        registry.register("v1", _model(seed)[0])
+    done = threading.Event()
+    with file_lock(registry._lock_path("v1")):
+        thread = threading.Thread(target=lambda: (registry.activate("v1", 1), done.set()))
+        thread.start()
+        assert not done.wait(0.2)
+    thread.join()
+    assert registry.active_version("v1") == 1
+    assert registry.rollback("v1") == 2
+
+def test_registry_endpoints(client):
+    for seed in range(2):
+        ml_prediction.model_holders["v1"].set(_model(seed)[0])
+    
+    versions = client.get("/api/models/v1/versions").json()["versions"]
+    assert [v["version"] for v in versions] == [2, 1]
+    
+    assert client.post("/api/models/v1/activate", json={"version": 1}).json()["activeVersion"] == 1
+    assert client.post("/api/models/v1/rollback").json()["activeVersion"] == 2
+    assert client.post("/api/models/v1/activate", json={"version": 9}).status_code == 404
+    assert client.post("/api/models/v1/activate", json={}).status_code == 400
+    assert client.get("/api/models/v9/versions").status_code == 404
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+from models.model_search import build_model, measure_serving_cost, parameter_grid, search_models
+
+def _data(rows=240):
+    rng = np.random.default_rng(3)
+    X = rng.random((rows, 6))
+    return X, (X[:, 0] + X[:, 1] > 1).astype(int)
+
+def test_parameter_grid_expands_every_combination():
+    grid = parameter_grid({"a": [1, 2], "b": ["x", "y", "z"]})
+    assert len(grid) == 6 and {"a": 2, "b": "z"} in grid
+
+def test_search_compares_families_with_serving_cost():
+    X, y = _data()
+    grids = {
+        "random_forest": {"n_estimators": [5, 10], "max_depth": [None]},
+        "logistic_regression": {"C": [1.0]}
+    }
+    report = search_models(X, y, families=list(grids), grids=grids, folds=3, workers=2)
+    assert report["tasks"] == 9
+    assert len(report["results"]) == 3
+    assert {row["family"] for row in report["comparison"]} == set(grids)
+    for row in report["comparison"]:
+        assert 0.5 < row["testAccuracy"] <= 1.0
+        assert row["sizeBytes"] > 0 and row["latencyMs"] > 0
+    forest = next(row for row in report["comparison"] if row["family"] == "random_forest")
+    assert forest["compiled"]
+
+def test_unknown_family_is_rejected():
+    X, y = _data()
+    with pytest.raises(ValueError):
+        search_models(X, y, families=["nope"])
+    with pytest.raises(ValueError):
+        build_model("nope", {})
+
+def test_serving_cost_of_uncompiled_model():
+    X, y = _data()
+    cost = measure_serving_cost(build_model("logistic_regression", {"C": 1.0}).fit(X, y), X, rounds=5)
+    assert not cost["compiled"] and cost["sizeBytes"] > 0
@@ -0,0 +1,84 @@
+import pytest
+from models import monte_carlo, parallel
+from models.graph import Graph
+from models.monte_carlo import estimate_deadlock_probability, wilson_interval
+from conftest import make_graph, deadlocked_pair
+
+TWO_LOCKS = make_graph(["P1", "P2"], {"R1": 1, "R2": 1})
+OPPOSITE_ORDER = {"P1": [{"resource": "R1"}, {"resource": "R2"}], "P2": [{"resource": "R2"}, {"resource": "R1"}]}
+SAME_ORDER = {"P1": [{"resource": "R1"}, {"resource": "R2"}], "P2": [{"resource": "R1"}, {"resource": "R2"}]}
+
+def test_current_deadlock_is_certain():
+    result = estimate_deadlock_probability(Graph(**deadlocked_pair()), trials=500, seed=0)
+    assert result["probability"] == 1.0
+    assert result["processDeadlockRates"] == {"P0": 1.0, "P1": 1.0}
+    assert result["confidenceInterval"][1] == 1.0
+
+def test_lock_ordering_decides_the_probability():
+    graph = Graph(**TWO_LOCKS)
+    opposite = estimate_deadlock_probability(graph, OPPOSITE_ORDER, trials=20_000, seed=1)
+    same = estimate_deadlock_probability(graph, SAME_ORDER, trials=20_000, seed=1)
+    assert same["probability"] == 0.0
+    low, high = opposite["confidenceInterval"]
+    assert 0.2 < low <= opposite["probability"] <= high < 0.6
+    assert opposite["trials"] == 20_000 and not opposite["budgetExhausted"]
+
+def test_skipped_steps_lower_the_probability():
+    graph = Graph(**TWO_LOCKS)
+    never = {"P1": [{"resource": "R1", "probability": 0}, {"resource": "R2"}], "P2": OPPOSITE_ORDER["P2"]}
+    assert estimate_deadlock_probability(graph, never, trials=2_000, seed=0)["probability"] == 0.0
+
+def test_seeded_estimates_do_not_depend_on_the_pool(monkeypatch):
+    graph = Graph(**TWO_LOCKS)
+    inline = estimate_deadlock_probability(graph, OPPOSITE_ORDER, trials=5_000, seed=7)
+    monkeypatch.setattr(parallel, "MAX_WORKERS", 2)
+    try:
+        pooled = estimate_deadlock_probability(graph, OPPOSITE_ORDER, trials=5_000, seed=7)
+    finally:
+        parallel.shutdown_process_pool()
+    assert pooled["deadlocks"] == inline["deadlocks"]
+
+def test_time_budget_stops_after_the_first_batch():
+    result = estimate_deadlock_probability(Graph(**TWO_LOCKS), OPPOSITE_ORDER, trials=100_000, time_budget=1e-9)
+    assert 0 < result["trials"] < 100_000
+    assert result["budgetExhausted"]
+
+@pytest.mark.parametrize("patterns, options", [
+    ({"P9": []}, {}),
+    ({"P1": [{"resource": "R9"}]}, {}),
+    ({"P1": [{"resource": "R1", "count": 0}]}, {}),
+    ({"P1": [{"resource": "R1", "probability": 2}]}, {}),
+    (None, {"trials": 0}),
+    (None, {"time_budget": 0}),
+    (None, {"confidence": 1}),
+])
+def test_invalid_input_is_rejected(patterns, options):
+    with pytest.raises(ValueError):
+        estimate_deadlock_probability(Graph(**TWO_LOCKS), patterns, **options)
+
+def test_large_systems_run_in_smaller_batches(monkeypatch):
+    # One trial of TWO_LOCKS with its patterns is 2 x 3 x 2 int64 = 96 bytes
+    monkeypatch.setattr(monte_carlo, "MAX_TASK_BYTES", 96 * 100)
+    calls = []
+    simulate_trials = monte_carlo.simulate_trials
+    monkeypatch.setattr(monte_carlo, "simulate_trials",
+                        lambda programs, trials, seed: calls.append(trials) or simulate_trials(programs, trials, seed))
+    result = estimate_deadlock_probability(Graph(**TWO_LOCKS), OPPOSITE_ORDER, trials=1_000, seed=0)
+    assert result["trials"] == 1_000 and max(calls) == 100
+    
+    monkeypatch.setattr(monte_carlo, "MAX_TASK_BYTES", 95)
+    with pytest.raises(ValueError, match="too large"):
+        estimate_deadlock_probability(Graph(**TWO_LOCKS), OPPOSITE_ORDER, trials=1_000)
+
+def test_wilson_interval_contains_the_estimate():
+    low, high = wilson_interval(30, 100, 0.95)
+    assert low < 0.3 < high
+    assert wilson_interval(0, 100, 0.95)[0] == pytest.approx(0.0, abs=1e-12)
+
+def test_endpoint(client):
+    response = client.post("/api/estimate-deadlock-probability",
+                           json={"graph": TWO_LOCKS, "patterns": OPPOSITE_ORDER, "trials": 1000, "seed": 3})
+    assert response.status_code == 200
+    assert 0 < response.json()["probability"] < 1
+    bad = client.post("/api/estimate-deadlock-probability", json={"graph": TWO_LOCKS, "trials": -1})
+    assert bad.status_code == 400
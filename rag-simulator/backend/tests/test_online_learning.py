@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+from models import ml_prediction, online_learning
+from models.file_lock import file_lock
+from models.graph import Graph
+from models.model_registry import model_registry
+from models.online_learning import feature_logs, record_labelled_graph, update_model, recent_updates
+from conftest import make_graph, deadlocked_pair
+
+SAFE = make_graph(["P0"], {"R0": 1}, requests=[("P0", "R0", 1)])
+
+def _record(n):
+    for i in range(n):
+        record_labelled_graph(Graph(**(deadlocked_pair() if i % 2 else SAFE)), i % 2)
+
+def test_labelled_graphs_are_logged_for_every_feature_set():
+    _record(3)
+    for feature_set, log in feature_logs.items():
+        rows = log.read_pending()
+        assert rows.shape == (3, len(ml_prediction.FEATURE_SETS[feature_set]) + 1)
+        assert rows[:, -1].tolist() == [0, 1, 0]
+
+@pytest.mark.parametrize("label", [2, -1, True, None, "1"])
+def test_invalid_labels_are_rejected(label):
+    with pytest.raises(ValueError):
+        record_labelled_graph(Graph(**SAFE), label)
+
+def test_update_waits_for_enough_rows():
+    _record(4)
+    assert update_model("v1", min_rows=8) is None
+    assert feature_logs["v1"].pending() == 4
+
+def test_update_grows_the_forest_and_records_its_cost():
+    _record(8)
+    first = update_model("v1", min_rows=8)
+    assert first["rows"] == 8 and first["trees"] == online_learning.TREES_PER_UPDATE
+    assert first["fitSeconds"] >= 0 and first["registryVersion"] == 1
+    assert feature_logs["v1"].pending() == 0
+    
+    _record(8)
+    second = update_model("v1", min_rows=8)
+    assert second["trees"] == 2 * online_learning.TREES_PER_UPDATE
+    assert [u["registryVersion"] for u in recent_updates()] == [2, 1]
+    
+    probability = ml_prediction.predict_from_features(
+        ml_prediction.extract_features(Graph(**deadlocked_pair())), "v1")["deadlockProbability"]
+    assert probability > 0.5
+
+def test_update_warm_starts_from_the_active_version():
+    for _ in range(2):
+        _record(8)
+        update_model("v1", min_rows=8)
+    assert model_registry.rollback("v1") == 1
+    
+    _record(8)
+    record = update_model("v1", min_rows=8)
+    # Grown from the 10 trees of version 1, not the 20 of the latest pickle
+    assert record["trees"] == 2 * online_learning.TREES_PER_UPDATE
+    assert model_registry.active_version("v1") == record["registryVersion"] == 3
+
+def test_only_one_process_updates_at_a_time():
+    _record(8)
+    with file_lock(online_learning.UPDATE_LOCK_PATH):
+        assert update_model("v1", min_rows=8) is None
+    assert feature_logs["v1"].pending() == 8
+    update_model("v1", min_rows=8)
+    assert feature_logs["v1"].cursor() == len(feature_logs["v1"]) == 8
+
+def test_forest_size_is_capped(monkeypatch):
+    monkeypatch.setattr(online_learning, "MAX_TREES", 15)
+    for _ in range(3):
+        _record(8)
+        record = update_model("v1", min_rows=8)
+    assert record["trees"] == 15
+
+def test_single_class_batches_wait():
+    for _ in range(8):
+        record_labelled_graph(Graph(**SAFE), 0)
+    assert update_model("v1", min_rows=8) is None
+
+def test_labelled_graph_endpoint(client):
+    response = client.post("/api/labelled-graphs", json={"graph": deadlocked_pair(), "label": 1})
+    assert response.status_code == 200
+    assert response.json()["pendingRows"] == {"v1": 1, "v2": 1}
+    assert client.post("/api/labelled-graphs", json={"graph": SAFE, "label": 5}).status_code == 400
+    assert client.get("/api/online-updates").json() == {"updates": []}
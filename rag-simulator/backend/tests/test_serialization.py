@@ -0,0 +1,41 @@
+import importlib
+import json
+import logging
+import numpy as np
+import pytest
+from models import serialization
+from conftest import deadlocked_pair
+
+@pytest.mark.parametrize("encoder", sorted(serialization.JSON_ENCODERS))
+def test_numpy_values_are_serialized(encoder):
+    serialization.set_json_encoder(encoder)
+    try:
+        data = json.loads(serialization.dumps({"a": np.arange(3), "b": np.float64(0.5), "c": np.int64(7)}))
+    finally:
+        importlib.reload(serialization)
+    assert data == {"a": [0, 1, 2], "b": 0.5, "c": 7}
+
+def test_unknown_encoder_is_rejected():
+    with pytest.raises(ValueError):
+        serialization.set_json_encoder("nope")
+
+def test_unknown_encoder_variable_logs_warning(monkeypatch, caplog):
+    monkeypatch.setenv("RAG_JSON_ENCODER", "nope")
+    with caplog.at_level(logging.WARNING):
+        importlib.reload(serialization)
+    monkeypatch.delenv("RAG_JSON_ENCODER")
+    importlib.reload(serialization)
+    assert "nope" in caplog.text
+
+def test_large_responses_are_gzipped(client):
+    graphs = [deadlocked_pair()] * 30
+    response = client.post("/api/batch/detect-deadlock", json={"graphs": graphs},
+                           headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers.get("content-encoding") == "gzip"
+    assert len(response.json()["results"]) == 30
+
+def test_small_responses_are_not_gzipped(client):
+    response = client.post("/api/validate-syntax", json={"text": ""},
+                           headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
@@ -0,0 +1,106 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from models import ml_prediction
+from models.graph import Graph
+from models.sessions import GraphSession, SessionStore
+from conftest import make_graph, deadlocked_pair
+
+def _open_pair():
+    graph = deadlocked_pair()
+    graph["edges"] = [e for e in graph["edges"] if not (e["source"] == "P1" and e["target"] == "R0")]
+    return graph
+
+def test_edit_invalidates_cached_analysis():
+    session = GraphSession("s", Graph(**_open_pair()))
+    calls = []
+    def analyse(graph):
+        calls.append(len(graph.edges))
+        return len(graph.edges)
+
+    assert session.analysis("edges", analyse) == {"version": 0, "result": 3}
+    assert session.analysis("edges", analyse)["result"] == 3
+    assert calls == [3]
+
+    version = session.apply([{"op": "addEdge", "edge": {"id": "e9", "source": "P1", "target": "R0", "type": "request"}}])
+    assert version == 1
+    assert session.analysis("edges", analyse) == {"version": 1, "result": 4}
+    assert calls == [3, 4]
+
+def test_different_key_recomputes_cached_analysis():
+    session = GraphSession("s", Graph(**_open_pair()))
+    assert session.analysis("x", lambda graph: 1, key="a")["result"] == 1
+    assert session.analysis("x", lambda graph: 2, key="a")["result"] == 1
+    assert session.analysis("x", lambda graph: 3, key="b")["result"] == 3
+
+def test_move_keeps_cache():
+    session = GraphSession("s", Graph(**_open_pair()))
+    session.analysis("x", lambda graph: 1)
+    assert session.apply([{"op": "moveNode", "id": "P0", "x": 5, "y": 6}]) == 0
+    assert session.analysis("x", lambda graph: 2)["result"] == 1
+
+def test_remove_node_drops_incident_edges():
+    session = GraphSession("s", Graph(**_open_pair()))
+    session.apply([{"op": "removeNode", "id": "R0"}])
+    assert all("R0" not in (e.source, e.target) for e in session.graph.edges)
+
+def test_failed_batch_leaves_graph_unchanged():
+    session = GraphSession("s", Graph(**_open_pair()))
+    with pytest.raises(ValueError):
+        session.apply([{"op": "removeEdge", "id": "e0"}, {"op": "removeEdge", "id": "missing"}])
+    assert session.version == 0
+    assert len(session.graph.edges) == 3
+
+@pytest.mark.parametrize("operation", [
+    {"op": "removeEdge"},
+    {"op": "setInstances", "id": "R0"},
+    {"op": "setInstances", "id": "R0", "instances": None},
+    {"op": "setInstances", "id": "R0", "instances": -3},
+    {"op": "setCount", "id": "e0", "count": 0},
+    {"op": "addNode", "node": "P9"},
+    {"op": "moveNode", "id": "P0", "x": "left"},
+    {"op": "explode"},
+])
+def test_invalid_operations_raise_value_error(operation):
+    session = GraphSession("s", Graph(**_open_pair()))
+    with pytest.raises(ValueError):
+        session.apply([operation])
+
+def test_shrinking_instances_below_allocation_is_rejected():
+    graph = make_graph(["P0"], {"R0": 2}, allocations=[("R0", "P0", 2)])
+    session = GraphSession("s", Graph(**graph))
+    with pytest.raises(ValueError):
+        session.apply([{"op": "setInstances", "id": "R0", "instances": 1}])
+
+def test_store_expires_idle_sessions():
+    store = SessionStore(ttl=0)
+    session = store.create(Graph(**_open_pair()))
+    with pytest.raises(KeyError):
+        store.get(session.id)
+
+def test_session_api(client):
+    session_id = client.post("/api/sessions", json=_open_pair()).json()["sessionId"]
+    assert not client.get(f"/api/sessions/{session_id}/detect-deadlock").json()["result"]["hasDeadlock"]
+
+    edit = {"operations": [{"op": "addEdge", "edge": {"id": "e9", "source": "P1", "target": "R0", "type": "request"}}]}
+    assert client.post(f"/api/sessions/{session_id}/edits", json=edit).json()["version"] == 1
+    detection = client.get(f"/api/sessions/{session_id}/detect-deadlock").json()
+    assert detection == {"version": 1, "result": detection["result"]}
+    assert detection["result"]["hasDeadlock"]
+    assert client.get(f"/api/sessions/{session_id}/predict-deadlock").status_code == 200
+
+    bad = client.post(f"/api/sessions/{session_id}/edits", json={"operations": [{"op": "removeEdge"}]})
+    assert bad.status_code == 400
+    assert client.delete(f"/api/sessions/{session_id}").status_code == 200
+    assert client.get(f"/api/sessions/{session_id}").status_code == 404
+
+def test_session_prediction_follows_the_served_model(client):
+    session_id = client.post("/api/sessions", json=_open_pair()).json()["sessionId"]
+    heuristic = client.get(f"/api/sessions/{session_id}/predict-deadlock").json()
+    assert heuristic["result"]["attributions"] is None
+
+    X = np.random.default_rng(0).random((200, len(ml_prediction.FEATURE_SETS["v1"])))
+    ml_prediction.model_holders["v1"].set(RandomForestClassifier(n_estimators=5, random_state=0).fit(X, X[:, 0] > 0.5))
+    learned = client.get(f"/api/sessions/{session_id}/predict-deadlock").json()
+    assert learned["version"] == heuristic["version"]
+    assert learned["result"]["attributions"] is not None
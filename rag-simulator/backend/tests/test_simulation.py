@@ -0,0 +1,116 @@
+import pytest
+from models.simulation import Simulation, run_simulation, ACQUIRE, RELEASE, WAIT, ABORT, FINISH
+
+def _opposite_order(repeat=1):
+    hold = {"op": "hold", "duration": 1}
+    return {
+        "resources": {"R1": 1, "R2": 1},
+        "processes": [
+            {"id": "P1", "repeat": repeat, "script": [{"op": "acquire", "resource": "R1"}, hold,
+                                                     {"op": "acquire", "resource": "R2"}, hold]},
+            {"id": "P2", "repeat": repeat, "script": [{"op": "acquire", "resource": "R2"}, hold,
+                                                     {"op": "acquire", "resource": "R1"}, hold]}
+        ]
+    }
+
+def test_opposite_lock_order_deadlocks_and_stops():
+    result = run_simulation(_opposite_order())
+    metrics = result["metrics"]
+    assert metrics["deadlocked"] and metrics["deadlocks"] == 1
+    assert metrics["firstDeadlockTime"] == 1.0
+    assert result["trace"]["type"] == ["acquire", "acquire", "wait", "wait", "deadlock"]
+    assert result["processIds"] == ["P1", "P2"]
+
+def test_same_lock_order_finishes_with_waits():
+    spec = _opposite_order(repeat=3)
+    spec["processes"][1]["script"] = spec["processes"][0]["script"]
+    metrics = run_simulation(spec)["metrics"]
+    assert metrics["deadlocks"] == 0 and not metrics["deadlocked"]
+    assert metrics["completions"] == 6
+    assert metrics["waits"] > 0 and metrics["meanWaitTime"] > 0
+
+def test_recovery_aborts_a_victim_and_continues():
+    spec = {**_opposite_order(repeat=2), "onDeadlock": "recover", "recoveryDelay": 2.0}
+    simulation = Simulation(spec)
+    metrics = simulation.run()
+    assert metrics["aborts"] >= 1 and metrics["deadlocks"] >= 1
+    assert metrics["completions"] == 4
+    # Both processes spent the recovery delay deadlocked
+    assert metrics["deadlockedProcessTime"] >= 4.0
+    assert ABORT in simulation.trace.type
+
+def test_multi_instance_resource_is_not_a_deadlock():
+    spec = _opposite_order(repeat=5)
+    spec["resources"] = {"R1": 2, "R2": 2}
+    metrics = run_simulation(spec)["metrics"]
+    assert metrics["deadlocks"] == 0 and metrics["waits"] == 0
+
+def test_waiting_on_a_running_process_is_not_a_deadlock():
+    spec = {
+        "resources": {"R1": 1},
+        "processes": [
+            {"id": "P1", "script": [{"op": "acquire", "resource": "R1"}, {"op": "hold", "duration": 5}]},
+            {"id": "P2", "script": [{"op": "acquire", "resource": "R1"}]}
+        ]
+    }
+    simulation = Simulation(spec)
+    metrics = simulation.run()
+    assert metrics["deadlocks"] == 0 and metrics["completions"] == 2
+    assert metrics["meanWaitTime"] == 5.0
+    assert list(simulation.trace.type) == [ACQUIRE, WAIT, FINISH, RELEASE, ACQUIRE, FINISH, RELEASE]
+
+def test_random_processes_are_reproducible_and_bounded():
+    spec = {
+        "resources": {f"R{i}": 2 for i in range(4)},
+        "processes": [{"id": f"P{i}", "random": {"maxAcquires": 2}} for i in range(8)],
+        "seed": 3, "maxEvents": 20_000, "onDeadlock": "recover", "traceLimit": 100
+    }
+    first, second = run_simulation(spec), run_simulation(spec)
+    assert first["trace"] == second["trace"]
+    assert first["metrics"]["events"] == second["metrics"]["events"]
+    assert first["metrics"]["events"] == 20_000
+    assert len(first["trace"]["time"]) == 100 and first["trace"]["truncated"]
+    assert first["metrics"]["throughput"] > 0
+
+def test_until_limits_simulated_time():
+    spec = {"resources": {"R1": 1}, "processes": [{"id": "P1", "random": {}}], "until": 50.0, "seed": 1}
+    assert run_simulation(spec)["metrics"]["simulatedTime"] == 50.0
+
+@pytest.mark.parametrize("spec", [
+    {},
+    {"resources": {"R1": 0}, "processes": [{"script": []}]},
+    {"resources": {"R1": 1}, "processes": [{"script": [{"op": "acquire", "resource": "R9"}]}]},
+    {"resources": {"R1": 1}, "processes": [{"script": [{"op": "acquire", "resource": "R1", "count": 2}]}]},
+    {"resources": {"R1": 1}, "processes": [{"script": [{"op": "jump"}]}]},
+    {"resources": {"R1": 1}, "processes": [{"id": "P", "script": []}, {"id": "P", "script": []}]},
+    {"resources": {"R1": 1}, "processes": [{"script": []}], "onDeadlock": "ignore"},
+    {"resources": {"R1": 1}, "processes": [{"script": []}], "maxEvents": 0},
+    {"resources": {"R1": 1}, "processes": [{"script": []}], "until": None},
+    {"resources": {"R1": 1}, "processes": [{"script": []}], "recoveryDelay": "soon"},
+    {"resources": {"R1": 1}, "processes": [{"script": []}], "traceLimit": "all"},
+    {"resources": {"R1": 1}, "processes": ["P1"]},
+    {"resources": {"R1": 1}, "processes": [{"script": ["acquire"]}]},
+    {"resources": {"R1": 1}, "processes": [{"random": {"thinkTime": None}}]},
+    {"resources": ["R1"], "processes": [{"script": []}]},
+])
+def test_invalid_spec_is_rejected(spec):
+    with pytest.raises(ValueError):
+        Simulation(spec)
+
+def test_event_limit_is_never_exceeded():
+    # Finishing records a release per held resource and a grant per woken
+    # waiter, so most runs hit the limit in the middle of an operation
+    for limit in range(1, 200):
+        spec = {
+            "resources": {f"R{i}": 2 for i in range(4)},
+            "processes": [{"id": f"P{i}", "random": {"maxAcquires": 4, "thinkTime": 0}} for i in range(8)],
+            "seed": limit, "maxEvents": limit, "onDeadlock": "recover"
+        }
+        assert run_simulation(spec)["metrics"]["events"] == limit
+
+def test_endpoint(client):
+    response = client.post("/api/simulate", json=_opposite_order())
+    assert response.status_code == 200
+    assert response.json()["metrics"]["deadlocked"]
+    assert client.post("/api/simulate", json={"resources": {}}).status_code == 400
+    assert client.post("/api/simulate", json={**_opposite_order(), "until": None}).status_code == 400
@@ -0,0 +1,131 @@
+import os
+import numpy as np
+import pytest
+from models import trace_format
+from models.simulation import Simulation, ACQUIRE, RELEASE, WAIT, ABORT, FINISH
+from models.trace_format import (
+    RECORD_DTYPE, TraceReader, TraceWriter, run_recorded_simulation, write_simulation_trace
+)
+
+def _simulation(events=5_000):
+    spec = {
+        "resources": {f"R{i}": 2 for i in range(4)},
+        "processes": [{"id": f"P{i}", "random": {"maxAcquires": 3}} for i in range(8)],
+        "seed": 5, "maxEvents": events, "onDeadlock": "recover", "recoveryDelay": 0.5
+    }
+    simulation = Simulation(spec)
+    simulation.run()
+    return simulation
+
+def _replay(records, n_processes, n_resources):
+    """Reference state by replaying record by record"""
+    allocation = np.zeros((n_processes, n_resources), dtype=np.int64)
+    waiting = {}
+    for _, event_type, process, resource, count in records.tolist():
+        if event_type == ACQUIRE:
+            allocation[process, resource] += count
+            waiting.pop(process, None)
+        elif event_type == RELEASE:
+            allocation[process, resource] -= count
+        elif event_type == WAIT:
+            waiting[process] = (resource, count)
+        elif event_type in (ABORT, FINISH):
+            waiting.pop(process, None)
+    return allocation, waiting
+
+def test_records_are_fixed_width():
+    assert RECORD_DTYPE.itemsize == 21
+
+def test_state_at_any_step_matches_a_full_replay(workdir):
+    simulation = _simulation()
+    assert write_simulation_trace(workdir / "run.ragt", simulation, checkpoint_interval=256) == len(simulation.trace)
+    reader = TraceReader(workdir / "run.ragt")
+    assert len(reader) == len(simulation.trace)
+    assert reader.process_ids == simulation.process_ids
+    assert reader.capacities.tolist() == simulation.capacities
+    assert WAIT in reader.records["type"] and ABORT in reader.records["type"]
+    for step in [0, 1, 255, 256, 257, 1000, 4097, len(reader)]:
+        allocation, waiting_resource, waiting_count = reader.state_at(step)
+        expected, waiting = _replay(reader[:step], len(reader.process_ids), len(reader.resource_ids))
+        np.testing.assert_array_equal(allocation, expected)
+        assert {p: (int(waiting_resource[p]), int(waiting_count[p]))
+                for p in np.flatnonzero(waiting_resource >= 0)} == waiting
+
+def test_final_state_matches_the_simulation(workdir):
+    simulation = _simulation()
+    write_simulation_trace(workdir / "run.ragt", simulation, checkpoint_interval=1000)
+    allocation, waiting_resource, _ = TraceReader(workdir / "run.ragt").state_at(len(simulation.trace))
+    for process, held in enumerate(simulation.allocation):
+        assert {r: int(c) for r, c in enumerate(allocation[process]) if c} == held
+        blocked = simulation.blocked[process]
+        assert waiting_resource[process] == (blocked[0] if blocked else -1)
+
+def test_streamed_records_match_a_single_write(workdir):
+    simulation = _simulation(2_000)
+    write_simulation_trace(workdir / "whole.ragt", simulation, checkpoint_interval=100)
+    whole = TraceReader(workdir / "whole.ragt")
+    with TraceWriter(workdir / "streamed.ragt", simulation.process_ids, simulation.resource_ids,
+                     simulation.capacities, checkpoint_interval=100) as writer:
+        for start in range(0, len(whole), 37):
+            writer.append_records(whole[start:start + 37])
+        writer.append(9e9, FINISH, 0, -1, 0)
+    streamed = TraceReader(workdir / "streamed.ragt")
+    assert len(streamed) == len(whole) + 1
+    np.testing.assert_array_equal(streamed[:len(whole)], whole[:])
+    for step in (150, 1999):
+        np.testing.assert_array_equal(streamed.state_at(step)[0], whole.state_at(step)[0])
+
+def test_graph_at_builds_the_rag(workdir):
+    spec = {
+        "resources": {"R1": 1, "R2": 1},
+        "processes": [
+            {"id": "P1", "script": [{"op": "acquire", "resource": "R1"}, {"op": "hold", "duration": 1},
+                                    {"op": "acquire", "resource": "R2"}]},
+            {"id": "P2", "script": [{"op": "acquire", "resource": "R2"}, {"op": "hold", "duration": 1},
+                                    {"op": "acquire", "resource": "R1"}]}
+        ]
+    }
+    simulation = Simulation(spec)
+    simulation.run()
+    write_simulation_trace(workdir / "run.ragt", simulation)
+    reader = TraceReader(workdir / "run.ragt")
+    assert reader.graph_at(0).edges == []
+    edges = {(e.source, e.target, e.type) for e in reader.graph_at(len(reader)).edges}
+    assert edges == {("R1", "P1", "allocation"), ("R2", "P2", "allocation"),
+                     ("P1", "R2", "request"), ("P2", "R1", "request")}
+    with pytest.raises(IndexError):
+        reader.state_at(len(reader) + 1)
+
+def test_bad_files_are_rejected(workdir):
+    (workdir / "bad.ragt").write_bytes(b"NOPE" + b"\0" * 100)
+    with pytest.raises(ValueError, match="magic"):
+        TraceReader(workdir / "bad.ragt")
+
+def test_saved_trace_endpoint(client):
+    response = client.post("/api/simulate", json={
+        "resources": {"R1": 1}, "saveTrace": True,
+        "processes": [{"id": "P1", "script": [{"op": "acquire", "resource": "R1"}, {"op": "hold", "duration": 1}]}]
+    })
+    trace_id = response.json()["traceId"]
+    step = client.get(f"/api/traces/{trace_id}", params={"step": 1}).json()
+    assert step["events"] == 3
+    assert [e["type"] for e in step["graph"]["edges"]] == ["allocation"]
+    assert step["nextEvent"]["type"] == "finish"
+    assert client.get(f"/api/traces/{trace_id}", params={"step": 9}).status_code == 400
+    assert client.get("/api/traces/" + "0" * 32).status_code == 404
+
+def test_oldest_saved_traces_are_pruned(workdir, monkeypatch):
+    monkeypatch.setattr(trace_format, "MAX_TRACES", 2)
+    spec = {"resources": {"R1": 1}, "processes": [{"id": "P1", "script": [{"op": "acquire", "resource": "R1"}]}]}
+    trace_ids = []
+    for i in range(3):
+        trace_ids.append(run_recorded_simulation(spec)["traceId"])
+        os.utime(trace_format.trace_path(trace_ids[-1]), ns=(i * 10**9, i * 10**9))
+    with pytest.raises(KeyError):
+        trace_format.trace_path(trace_ids[0])
+    trace_format.trace_path(trace_ids[2])
+
+    # The trace just saved is kept even when it alone exceeds the byte limit
+    monkeypatch.setattr(trace_format, "MAX_TRACE_BYTES", 1)
+    newest = run_recorded_simulation(spec)["traceId"]
+    assert sorted(p.stem for p in trace_format.TRACE_DIR.glob("*.ragt")) == [newest]
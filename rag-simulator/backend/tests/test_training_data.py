@@ -0,0 +1,93 @@
+import io
+import time
+import numpy as np
+import pytest
+from models.ml_prediction import FEATURE_SETS, validate_training_data
+from models.training_data import load_training_arrays, prepare_training_file
+
+NAMES = FEATURE_SETS["v1"]
+
+def _rows(n=200):
+    rng = np.random.default_rng(0)
+    X = rng.random((n, len(NAMES)))
+    return X, (X[:, 5] > 0.5).astype(int)
+
+def _write_csv(path, X, y, header=None):
+    lines = [",".join(header)] if header else []
+    lines += [",".join(map(repr, list(row) + [label])) for row, label in zip(X.tolist(), y.tolist())]
+    path.write_text("\n".join(lines) + "\n")
+    return path
+
+def test_csv_is_converted_to_memory_mapped_arrays(workdir):
+    X, y = _rows()
+    data = prepare_training_file(_write_csv(workdir / "train.csv", X, y), "v1", NAMES)
+    assert not (workdir / "train.csv").exists()
+    features, labels = load_training_arrays(data)
+    assert isinstance(features, np.memmap)
+    np.testing.assert_array_equal(features, X)
+    np.testing.assert_array_equal(labels, y)
+    feature_set, _, _ = validate_training_data(data)
+    assert feature_set == "v1"
+
+def test_csv_header_may_reorder_columns(workdir):
+    X, y = _rows(10)
+    header = ["label"] + NAMES[::-1]
+    table = np.column_stack([y, X[:, ::-1]])
+    lines = [",".join(header)] + [",".join(map(repr, row)) for row in table.tolist()]
+    (workdir / "train.csv").write_text("\n".join(lines))
+    features, labels = load_training_arrays(prepare_training_file(workdir / "train.csv", "v1", NAMES))
+    np.testing.assert_array_equal(features, X)
+    np.testing.assert_array_equal(labels, y)
+
+@pytest.mark.parametrize("content, message", [
+    ("1,2,3\n", "columns"),
+    ("a,b,c,d,e,f,label\n1,2,3,4,5,6,0\n", "missing"),
+    ("1,2,3,4,5,6,0.5\n", "whole"),
+    ("1,2,3,4,5,6,0\n1,2,3,x,5,6,1\n", "Malformed"),
+    ("", "no rows"),
+])
+def test_malformed_csv_is_rejected(workdir, content, message):
+    (workdir / "train.csv").write_text(content)
+    with pytest.raises(ValueError, match=message):
+        prepare_training_file(workdir / "train.csv", "v1", NAMES)
+    assert list(workdir.glob("*.npy")) == []
+
+def test_npz_members_are_extracted_for_mapping(workdir):
+    X, y = _rows()
+    np.savez(workdir / "train.npz", features=X, labels=y)
+    features, labels = load_training_arrays(prepare_training_file(workdir / "train.npz", "v1", NAMES))
+    assert isinstance(features, np.memmap)
+    np.testing.assert_array_equal(features, X)
+
+def test_npz_with_objects_or_missing_arrays_is_rejected(workdir):
+    np.savez(workdir / "objects.npz", features=np.array([[1, "a"]], dtype=object), labels=np.array([0]))
+    with pytest.raises(ValueError, match="objects"):
+        prepare_training_file(workdir / "objects.npz", "v1", NAMES)
+    np.savez(workdir / "missing.npz", features=np.zeros((2, 6)))
+    with pytest.raises(ValueError, match="labels"):
+        prepare_training_file(workdir / "missing.npz", "v1", NAMES)
+
+def test_wrong_width_npz_fails_validation(workdir):
+    np.savez(workdir / "train.npz", features=np.zeros((4, 3)), labels=np.zeros(4))
+    with pytest.raises(ValueError, match="expects rows"):
+        validate_training_data(prepare_training_file(workdir / "train.npz", "v1", NAMES))
+
+def test_upload_endpoint_trains_from_file(client, workdir):
+    X, y = _rows(300)
+    buffer = io.BytesIO()
+    np.savez(buffer, features=X, labels=y)
+    response = client.post("/api/train-model/upload", data={"feature_set": "v1"},
+                           files={"file": ("train.npz", buffer.getvalue())})
+    assert response.status_code == 200
+    job_id = response.json()["jobId"]
+    deadline = time.time() + 120
+    while client.get(f"/api/train-model/jobs/{job_id}").json()["status"] == "running" and time.time() < deadline:
+        time.sleep(0.2)
+    assert client.get(f"/api/train-model/jobs/{job_id}").json()["status"] == "completed"
+    assert list((workdir / "data" / "uploads").iterdir()) == []
+
+def test_upload_endpoint_rejects_bad_files(client):
+    assert client.post("/api/train-model/upload", files={"file": ("train.txt", b"1,2")}).status_code == 400
+    assert client.post("/api/train-model/upload", files={"file": ("train.csv", b"1,2\n")}).status_code == 400
+    assert client.post("/api/train-model/upload", data={"feature_set": "v9"},
+                       files={"file": ("train.csv", b"1,2\n")}).status_code == 400
@@ -0,0 +1,62 @@
+import time
+import numpy as np
+import pytest
+from models import ml_prediction, training_jobs
+from models.training_jobs import TrainingJob, TrainingJobManager, TooManyTrainingJobs
+
+def _training_data(rows):
+    rng = np.random.default_rng(0)
+    X = rng.random((rows, 6))
+    y = (X[:, 5] > 0.5).astype(int)
+    return {"features": X.tolist(), "labels": y.tolist()}
+
+def _wait(job, timeout=120):
+    deadline = time.time() + timeout
+    while job.status == "running" and time.time() < deadline:
+        time.sleep(0.2)
+    return job.status
+
+def test_job_completes_and_swaps_model():
+    job = TrainingJob(_training_data(300))
+    job.start()
+    assert _wait(job) == "completed"
+    assert job.progress == 1.0
+    assert job.result["accuracy"] > 0.5
+    assert ml_prediction.MODEL_PATH.exists()
+    assert ml_prediction.model_holders["v1"].get() is not None
+
+def test_cancel_before_save_keeps_previous_model():
+    job = TrainingJob(_training_data(200000))
+    job.start()
+    time.sleep(1)
+    assert job.cancel()
+    assert job.status == "cancelled"
+    assert not ml_prediction.MODEL_PATH.exists()
+    assert list(ml_prediction.MODEL_PATH.parent.glob("*.tmp")) == []
+
+def test_failed_job_reports_error():
+    job = TrainingJob({"features": [[1.0] * 6], "labels": [1]})
+    job.start()
+    assert _wait(job) == "failed"
+    assert job.error
+
+def test_running_jobs_are_capped(monkeypatch):
+    monkeypatch.setattr(training_jobs, "MAX_RUNNING_JOBS", 1)
+    manager = TrainingJobManager()
+    job = manager.submit(_training_data(200000))
+    try:
+        with pytest.raises(TooManyTrainingJobs):
+            manager.submit(_training_data(300))
+    finally:
+        job.cancel()
+    assert manager.submit(_training_data(300)).status == "running"
+
+def test_cap_and_cancel_endpoints(client, monkeypatch):
+    monkeypatch.setattr(training_jobs, "MAX_RUNNING_JOBS", 1)
+    response = client.post("/api/train-model", json=_training_data(200000))
+    assert response.status_code == 200
+    assert client.post("/api/train-model", json=_training_data(300)).status_code == 429
+    
+    response = client.delete(f"/api/train-model/jobs/{response.json()['jobId']}")
+    assert response.status_code == 200
+    assert response.json()["status"] == "cancelled"
@@ -5,6 +5,7 @@ from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
 import os
 from pathlib import Path
+from models.ml_prediction import save_model
 
 # Create data directory if it doesn't exist
 Path("data").mkdir(exist_ok=True)
@@ -73,8 +74,8 @@ print("\nFeature importance:")
 for name, importance in zip(feature_names, model.feature_importances_):
     print(f"{name}: {importance:.4f}")
 
-# Save model
+# Save model; the atomic write lets a running server hot-reload it safely
 model_path = "data/models/deadlock_prediction_model.pkl"
-joblib.dump(model, model_path)
+save_model(model, model_path)
 print(f"\nModel saved to {model_path}")
 
@@ -57,8 +57,11 @@ interface MLPrediction {
     requestEdgeCount: number
     allocationEdgeCount: number
     resourceUtilization: number
-    cycleCount: number
+    // "v1" models report every cycle; "v2" models report cyclic components
+    cycleCount?: number
+    nodesInSccs?: number
   }
+  modelVersion?: "v1" | "v2"
   explanation: string
 }
 
@@ -1318,9 +1321,15 @@ export function ResourceAllocationGraph() {
                   <span className="font-medium">Resource Utilization:</span>{" "}
                   {Math.round((mlPrediction?.features.resourceUtilization || 0) * 100)}%
                 </div>
-                <div className="p-2 bg-gray-50 rounded">
-                  <span className="font-medium">Cycle Count:</span> {mlPrediction?.features.cycleCount || 0}
-                </div>
+                {mlPrediction?.features.cycleCount !== undefined ? (
+                  <div className="p-2 bg-gray-50 rounded">
+                    <span className="font-medium">Cycle Count:</span> {mlPrediction.features.cycleCount}
+                  </div>
+                ) : (
+                  <div className="p-2 bg-gray-50 rounded">
+                    <span className="font-medium">Nodes on Cycles:</span> {mlPrediction?.features.nodesInSccs || 0}
+                  </div>
+                )}
               </div>
             </div>
 
@@ -0,0 +1,199 @@
+import numpy as np
+
+# Names of the 23 features, in model input order
+FEATURE_NAMES = [
+    "n_processes", "n_resources", "total_instances", "total_allocated", "total_requested",
+    "avg_allocation", "avg_request", "max_allocation", "max_request",
+    "n_allocation_edges", "n_request_edges", "resource_utilization",
+    "number_of_waiting_edges", "number_of_processes_with_outgoing_waiting_edges",
+    "number_of_processes_with_incoming_waiting_edges", "number_of_processes_with_both",
+    "number_of_waiting_processes", "number_of_holding_processes", "number_of_both_waiting_and_holding",
+    "fully_allocated_resources", "contested_resources", "average_contention", "maximum_contention"
+]
+
+def _edge_arrays(pairs, process_index, resource_index):
+    """Process indices, resource indices and counts of the pairs whose nodes both exist"""
+    rows, cols, counts = [], [], []
+    for (p, r), cnt in pairs.items():
+        i = process_index.get(p)
+        j = resource_index.get(r)
+        if i is not None and j is not None:
+            rows.append(i)
+            cols.append(j)
+            counts.append(cnt)
+    return (np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64),
+            np.asarray(counts, dtype=np.float64))
+
+def _waiting_pairs(want_process, want_resource, hold_process, hold_resource, n_processes):
+    """
+    Distinct (requester, holder) process pairs that share a resource, without self-pairs
+
+    Holders are sorted by resource once; each request edge is then joined with
+    the run of holders of its resource, so the work is proportional to the
+    number of pairs produced.
+    """
+    order = np.argsort(hold_resource, kind="stable")
+    hold_process, hold_resource = hold_process[order], hold_resource[order]
+    starts = np.searchsorted(hold_resource, want_resource, side="left")
+    lengths = np.searchsorted(hold_resource, want_resource, side="right") - starts
+    requester = np.repeat(want_process, lengths)
+    # Position of each pair within its run of holders, offset to the run start
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    holder = hold_process[np.repeat(starts, lengths) + offsets]
+    keys = np.unique((requester * n_processes + holder)[requester != holder])
+    return keys // max(n_processes, 1), keys % max(n_processes, 1)
+
+def extract_features(rag):
+    """
+    Compute the 23 deadlock-prediction features of a ResourceAllocationGraph
+
+    Allocations and requests are turned into arrays of (process, resource,
+    count) edges once, and every feature is a grouped sum or a join over
+    those, so the cost grows with the number of edges rather than with
+    P x R (or, for the waiting edges, P x P x R).
+
+    Args:
+        rag: Graph with ``processes``, ``resources``, ``allocations`` and ``requests``
+
+    Returns:
+        List of the 23 features in FEATURE_NAMES order
+    """
+    process_index = {p: i for i, p in enumerate(rag.processes)}
+    resource_index = {r: j for j, r in enumerate(rag.resources)}
+    n_processes = len(process_index)
+    n_resources = len(resource_index)
+
+    alloc_process, alloc_resource, alloc_count = _edge_arrays(rag.allocations, process_index, resource_index)
+    req_process, req_resource, req_count = _edge_arrays(rag.requests, process_index, resource_index)
+    totals = np.fromiter((info['total'] for info in rag.resources.values()), dtype=np.float64, count=n_resources)
+    available = np.fromiter((info['available'] for info in rag.resources.values()), dtype=np.float64, count=n_resources)
+
+    total_instances = sum(info['total'] for info in rag.resources.values())
+    total_allocated = sum(rag.allocations.values())
+    total_requested = sum(rag.requests.values())
+    n_allocation_edges = sum(1 for cnt in rag.allocations.values() if cnt > 0)
+    n_request_edges = sum(1 for cnt in rag.requests.values() if cnt > 0)
+
+    # Per-process allocation and request statistics
+    allocation_per_process = np.bincount(alloc_process, weights=alloc_count, minlength=n_processes)
+    request_per_process = np.bincount(req_process, weights=req_count, minlength=n_processes)
+    avg_allocation = allocation_per_process.mean() if n_processes > 0 else 0
+    avg_request = request_per_process.mean() if n_processes > 0 else 0
+    max_allocation = allocation_per_process.max() if n_processes > 0 else 0
+    max_request = request_per_process.max() if n_processes > 0 else 0
+
+    # Resource utilization
+    allocation_per_resource = np.bincount(alloc_resource, weights=alloc_count, minlength=n_resources)
+    resource_utilization = (allocation_per_resource / totals).mean() if n_resources > 0 else 0
+
+    # Waiting edges (P1 -> P2 if P1 requests R and P2 holds R)
+    holds = alloc_count > 0
+    wants = req_count > 0
+    waiting_from, waiting_to = _waiting_pairs(req_process[wants], req_resource[wants],
+                                              alloc_process[holds], alloc_resource[holds], n_processes)
+    number_of_waiting_edges = len(waiting_from)
+
+    # Processes with waiting relationships
+    outgoing = np.zeros(n_processes, dtype=bool)
+    incoming = np.zeros(n_processes, dtype=bool)
+    outgoing[waiting_from] = True
+    incoming[waiting_to] = True
+    number_of_processes_with_outgoing_waiting_edges = int(outgoing.sum())
+    number_of_processes_with_incoming_waiting_edges = int(incoming.sum())
+    number_of_processes_with_both = int((outgoing & incoming).sum())
+
+    # Holding and waiting processes
+    holding = np.zeros(n_processes, dtype=bool)
+    holding[alloc_process[holds]] = True
+    number_of_holding_processes = int(holding.sum())
+    number_of_waiting_processes = number_of_processes_with_outgoing_waiting_edges
+    number_of_both_waiting_and_holding = int((outgoing & holding).sum())
+
+    # Resource contention features
+    fully_allocated_resources = int((available == 0).sum())
+    contention = np.bincount(req_resource, weights=req_count, minlength=n_resources) - available
+    contested = contention[contention > 0]
+    contested_resources = len(contested)
+    average_contention = contested.sum() / contested_resources if contested_resources > 0 else 0
+    maximum_contention = contested.max() if contested_resources > 0 else 0
+
+    # Compile all 23 features into a list
+    return [
+        n_processes, n_resources, total_instances, total_allocated, total_requested,
+        avg_allocation, avg_request, max_allocation, max_request,
+        n_allocation_edges, n_request_edges, resource_utilization,
+        number_of_waiting_edges, number_of_processes_with_outgoing_waiting_edges,
+        number_of_processes_with_incoming_waiting_edges, number_of_processes_with_both,
+        number_of_waiting_processes, number_of_holding_processes, number_of_both_waiting_and_holding,
+        fully_allocated_resources, contested_resources, average_contention, maximum_contention
+    ]
+
+def extract_batch_features(allocation, request, totals, process_mask, resource_mask):
+    """
+    Compute the 23 features for a batch of systems held as tensors
+
+    Systems are padded to a common P processes and R resources; padding rows
+    and columns are all zero and excluded through the masks. The result is
+    the same as extract_features on the equivalent graphs.
+
+    Args:
+        allocation: B x P x R instances held by each process
+        request: B x P x R instances requested by each process
+        totals: B x R instances of each resource
+        process_mask: B x P, True for real processes
+        resource_mask: B x R, True for real resources
+
+    Returns:
+        B x 23 float64 feature matrix in FEATURE_NAMES order
+    """
+    allocation = np.asarray(allocation, dtype=np.float64)
+    request = np.asarray(request, dtype=np.float64)
+    totals = np.asarray(totals, dtype=np.float64)
+    process_mask = np.asarray(process_mask, dtype=bool)
+    resource_mask = np.asarray(resource_mask, dtype=bool)
+
+    n_processes = process_mask.sum(axis=1)
+    n_resources = resource_mask.sum(axis=1)
+    per_process = np.maximum(n_processes, 1)
+    per_resource = np.maximum(n_resources, 1)
+    available = totals - allocation.sum(axis=1)
+
+    # Per-process allocation and request statistics
+    allocation_per_process = allocation.sum(axis=2)
+    request_per_process = request.sum(axis=2)
+    avg_allocation = allocation_per_process.sum(axis=1) / per_process
+    avg_request = request_per_process.sum(axis=1) / per_process
+    max_allocation = allocation_per_process.max(axis=1, initial=0)
+    max_request = request_per_process.max(axis=1, initial=0)
+
+    # Resource utilization over the real resources
+    utilization = np.divide(allocation.sum(axis=1), totals, out=np.zeros_like(totals), where=resource_mask)
+    resource_utilization = utilization.sum(axis=1) / per_resource
+
+    # Waiting edges: requesters times holders, without the diagonal
+    holds = allocation > 0
+    wants = request > 0
+    waiting = np.matmul(wants.astype(np.int32), holds.transpose(0, 2, 1).astype(np.int32)) > 0
+    diagonal = np.arange(waiting.shape[1])
+    waiting[:, diagonal, diagonal] = False
+    outgoing = waiting.any(axis=2)
+    incoming = waiting.any(axis=1)
+    holding = holds.any(axis=2)
+
+    # Resource contention over the real resources
+    contention = request.sum(axis=1) - available
+    contested = (contention > 0) & resource_mask
+    contested_resources = contested.sum(axis=1)
+    contention_sum = np.where(contested, contention, 0).sum(axis=1)
+
+    return np.column_stack([
+        n_processes, n_resources, totals.sum(axis=1), allocation.sum(axis=(1, 2)), request.sum(axis=(1, 2)),
+        avg_allocation, avg_request, max_allocation, max_request,
+        holds.sum(axis=(1, 2)), wants.sum(axis=(1, 2)), resource_utilization,
+        waiting.sum(axis=(1, 2)), outgoing.sum(axis=1),
+        incoming.sum(axis=1), (outgoing & incoming).sum(axis=1),
+        outgoing.sum(axis=1), holding.sum(axis=1), (outgoing & holding).sum(axis=1),
+        ((available == 0) & resource_mask).sum(axis=1), contested_resources,
+        contention_sum / np.maximum(contested_resources, 1),
+        np.where(contested, contention, 0).max(axis=1, initial=0)
+    ]).astype(np.float64)
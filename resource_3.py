@@ -8,6 +8,8 @@ import json
 import joblib
 import numpy as np
 import os
+from compiled_forest import CompiledForest
+from rag_features import extract_features as extract_rag_features
 #exe builder stuff
 def resource_path(relative_path):
     """Get the absolute path to a resource, works for dev and PyInstaller."""
@@ -148,9 +150,13 @@ class RAGSimulator(tk.Tk):
         self.resource_width = 90
         self.resource_height = 90
 
-        # Attempt to load the ML model
+        # Attempt to load the ML model, preferring the compiled NumPy copy
         try:
-            self.ml_model = joblib.load(resource_path("rag_deadlock_model.joblib"))
+            compiled_model_path = resource_path("rag_deadlock_model.npz")
+            if os.path.exists(compiled_model_path):
+                self.ml_model = CompiledForest.load(compiled_model_path)
+            else:
+                self.ml_model = joblib.load(resource_path("rag_deadlock_model.joblib"))
         except Exception as e:
             messagebox.showwarning("ML Model Missing", "ML model could not be loaded. Deadlock prediction will be disabled.")
             self.status_message = "ML model not loaded"
@@ -695,80 +701,7 @@ class RAGSimulator(tk.Tk):
             messagebox.showerror("Error", str(e))
     
     def extract_features(self):
-        rag = self.rag
-        n_processes = len(rag.processes)
-        n_resources = len(rag.resources)
-        total_instances = sum(info['total'] for info in rag.resources.values())
-        total_allocated = sum(rag.allocations.values())
-        total_requested = sum(rag.requests.values())
-        n_allocation_edges = sum(1 for cnt in rag.allocations.values() if cnt > 0)
-        n_request_edges = sum(1 for cnt in rag.requests.values() if cnt > 0)
-
-        # Per-process allocation and request statistics
-        allocation_per_process = {p: sum(rag.allocations.get((p, r), 0) for r in rag.resources) for p in rag.processes}
-        request_per_process = {p: sum(rag.requests.get((p, r), 0) for r in rag.resources) for p in rag.processes}
-        avg_allocation = np.mean(list(allocation_per_process.values())) if n_processes > 0 else 0
-        avg_request = np.mean(list(request_per_process.values())) if n_processes > 0 else 0
-        max_allocation = max(allocation_per_process.values(), default=0)
-        max_request = max(request_per_process.values(), default=0)
-
-        # Resource utilization
-        utilization = [sum(rag.allocations.get((p, r), 0) for p in rag.processes) / info['total']
-            for r, info in rag.resources.items()]
-        resource_utilization = np.mean(utilization) if utilization else 0
-
-        # Waiting edges (P1 -> P2 if P1 requests R and P2 holds R)
-        waiting_edges = set()
-        for r in rag.resources:
-            holders = [p for p in rag.processes if rag.allocations.get((p, r), 0) > 0]
-            requesters = [p for p in rag.processes if rag.requests.get((p, r), 0) > 0]
-            for p1 in requesters:
-                for p2 in holders:
-                    if p1 != p2:
-                        waiting_edges.add((p1, p2))
-        number_of_waiting_edges = len(waiting_edges)
-
-        # Processes with waiting relationships
-        outgoing_processes = set(p1 for (p1, p2) in waiting_edges)
-        incoming_processes = set(p2 for (p1, p2) in waiting_edges)
-        number_of_processes_with_outgoing_waiting_edges = len(outgoing_processes)
-        number_of_processes_with_incoming_waiting_edges = len(incoming_processes)
-        number_of_processes_with_both = len(outgoing_processes & incoming_processes)
-
-        # Holding and waiting processes
-        holding_processes = set(p for p in rag.processes if any(rag.allocations.get((p, r), 0) > 0 for r in rag.resources))
-        number_of_holding_processes = len(holding_processes)
-        number_of_waiting_processes = len(outgoing_processes)
-        both_waiting_and_holding = outgoing_processes & holding_processes
-        number_of_both_waiting_and_holding = len(both_waiting_and_holding)
-
-        # Resource contention features
-        fully_allocated_resources = sum(1 for r in rag.resources if rag.resources[r]['available'] == 0)
-        contested_resources = 0
-        total_contention = 0
-        max_contention = 0
-        for r in rag.resources:
-            sum_requests = sum(rag.requests.get((p, r), 0) for p in rag.processes)
-            available = rag.resources[r]['available']
-            if sum_requests > available:
-                contested_resources += 1
-                contention = sum_requests - available
-                total_contention += contention
-                max_contention = max(max_contention, contention)
-        average_contention = total_contention / contested_resources if contested_resources > 0 else 0
-        maximum_contention = max_contention
-
-        # Compile all 23 features into a list
-        features = [
-        n_processes, n_resources, total_instances, total_allocated, total_requested,
-        avg_allocation, avg_request, max_allocation, max_request,
-        n_allocation_edges, n_request_edges, resource_utilization,
-        number_of_waiting_edges, number_of_processes_with_outgoing_waiting_edges,
-        number_of_processes_with_incoming_waiting_edges, number_of_processes_with_both,
-        number_of_waiting_processes, number_of_holding_processes, number_of_both_waiting_and_holding,
-        fully_allocated_resources, contested_resources, average_contention, maximum_contention
-        ]
-        return features
+        return extract_rag_features(self.rag)
 
     def predict_deadlock_percentage(self):
         if not self.ml_model:
@@ -5,7 +5,7 @@ block_cipher = None
 a = Analysis(['resource_3.py'],
              pathex=[],
              binaries=[],
-             datas=[('rag_deadlock_model.joblib', '.')],
+             datas=[('rag_deadlock_model.joblib', '.'), ('rag_deadlock_model.npz', '.')],
              hiddenimports=[],
              hookspath=[],
              hooksconfig={},
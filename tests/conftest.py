@@ -0,0 +1,19 @@
+import sys
+from pathlib import Path
+import pytest
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    """Run every test in an empty directory so generated files stay isolated"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+@pytest.fixture(scope="session")
+def shards(tmp_path_factory):
+    """Three small dataset shards"""
+    import RAG_ML
+    out_dir = tmp_path_factory.mktemp("shards")
+    return RAG_ML.generate_shards(3000, str(out_dir), shard_size=1000, workers=1)["shards"]
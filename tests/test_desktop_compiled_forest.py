@@ -0,0 +1,10 @@
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+
+BACKEND_COPY = ROOT_DIR / "rag-simulator" / "backend" / "models" / "compiled_forest.py"
+
+def test_desktop_copy_matches_the_backend_module():
+    # The desktop app and the backend are packaged separately, so each keeps
+    # a copy; edit the backend module and copy it over
+    assert (ROOT_DIR / "compiled_forest.py").read_bytes() == BACKEND_COPY.read_bytes()
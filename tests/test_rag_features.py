@@ -0,0 +1,133 @@
+import random
+import numpy as np
+import pytest
+import RAG_ML
+from RAG_ML import ResourceAllocationGraph, generate_batch, detect_deadlocks_batch
+from rag_features import FEATURE_NAMES, extract_features, extract_batch_features
+
+def reference_features(rag):
+    """The per-pair loops that extract_features replaced, kept as the specification"""
+    n_processes = len(rag.processes)
+    n_resources = len(rag.resources)
+    total_instances = sum(info['total'] for info in rag.resources.values())
+    total_allocated = sum(rag.allocations.values())
+    total_requested = sum(rag.requests.values())
+    n_allocation_edges = sum(1 for cnt in rag.allocations.values() if cnt > 0)
+    n_request_edges = sum(1 for cnt in rag.requests.values() if cnt > 0)
+
+    allocation_per_process = {p: sum(rag.allocations.get((p, r), 0) for r in rag.resources) for p in rag.processes}
+    request_per_process = {p: sum(rag.requests.get((p, r), 0) for r in rag.resources) for p in rag.processes}
+    avg_allocation = np.mean(list(allocation_per_process.values())) if n_processes > 0 else 0
+    avg_request = np.mean(list(request_per_process.values())) if n_processes > 0 else 0
+    max_allocation = max(allocation_per_process.values(), default=0)
+    max_request = max(request_per_process.values(), default=0)
+
+    utilization = [sum(rag.allocations.get((p, r), 0) for p in rag.processes) / info['total']
+                   for r, info in rag.resources.items()]
+    resource_utilization = np.mean(utilization) if utilization else 0
+
+    waiting_edges = set()
+    for r in rag.resources:
+        holders = [p for p in rag.processes if rag.allocations.get((p, r), 0) > 0]
+        requesters = [p for p in rag.processes if rag.requests.get((p, r), 0) > 0]
+        for p1 in requesters:
+            for p2 in holders:
+                if p1 != p2:
+                    waiting_edges.add((p1, p2))
+
+    outgoing = set(p1 for (p1, p2) in waiting_edges)
+    incoming = set(p2 for (p1, p2) in waiting_edges)
+    holding = set(p for p in rag.processes if any(rag.allocations.get((p, r), 0) > 0 for r in rag.resources))
+
+    contested_resources, total_contention, max_contention = 0, 0, 0
+    for r in rag.resources:
+        contention = sum(rag.requests.get((p, r), 0) for p in rag.processes) - rag.resources[r]['available']
+        if contention > 0:
+            contested_resources += 1
+            total_contention += contention
+            max_contention = max(max_contention, contention)
+
+    return [
+        n_processes, n_resources, total_instances, total_allocated, total_requested,
+        avg_allocation, avg_request, max_allocation, max_request,
+        n_allocation_edges, n_request_edges, resource_utilization,
+        len(waiting_edges), len(outgoing), len(incoming), len(outgoing & incoming),
+        len(outgoing), len(holding), len(outgoing & holding),
+        sum(1 for r in rag.resources if rag.resources[r]['available'] == 0), contested_resources,
+        total_contention / contested_resources if contested_resources > 0 else 0, max_contention
+    ]
+
+def random_rag(rng, max_processes=10, max_resources=5):
+    rag = ResourceAllocationGraph()
+    for i in range(rng.randint(0, max_processes)):
+        rag.add_process(f"P{i}")
+    for j in range(rng.randint(0, max_resources)):
+        rag.add_resource(f"R{j}", rng.randint(1, 10))
+    for p in sorted(rag.processes):
+        for r in list(rag.resources):
+            if rng.random() < 0.5:
+                rag.add_allocation(p, r, rng.randint(1, 3))
+            if rng.random() < 0.5:
+                rag.add_request(p, r, rng.randint(1, 3))
+    # Edges left behind by removed nodes still count towards the totals
+    if rag.processes and rng.random() < 0.2:
+        rag.processes.discard(sorted(rag.processes)[0])
+    return rag
+
+def rag_from_batch(batch, b):
+    rag = ResourceAllocationGraph()
+    processes = [f"P{i}" for i in range(int(batch["process_mask"][b].sum()))]
+    resources = [f"R{j}" for j in range(int(batch["resource_mask"][b].sum()))]
+    for p in processes:
+        rag.add_process(p)
+    for j, r in enumerate(resources):
+        rag.add_resource(r, int(batch["totals"][b, j]))
+    for i, p in enumerate(processes):
+        for j, r in enumerate(resources):
+            if batch["allocation"][b, i, j]:
+                rag.add_allocation(p, r, int(batch["allocation"][b, i, j]))
+            if batch["request"][b, i, j]:
+                rag.add_request(p, r, int(batch["request"][b, i, j]))
+    return rag
+
+def test_feature_names_match_the_feature_count():
+    assert len(FEATURE_NAMES) == 23
+
+@pytest.mark.parametrize("seed", range(4))
+def test_extractor_matches_the_reference_loops(seed):
+    rng = random.Random(seed)
+    for _ in range(500):
+        rag = random_rag(rng)
+        np.testing.assert_allclose(extract_features(rag), reference_features(rag))
+
+def test_extractor_matches_on_a_large_graph():
+    rag = random_rag(random.Random(7), max_processes=200, max_resources=40)
+    np.testing.assert_allclose(extract_features(rag), reference_features(rag))
+
+def test_batch_features_and_labels_match_per_graph_extraction():
+    batch = generate_batch(300, np.random.default_rng(0))
+    X = extract_batch_features(batch["allocation"], batch["request"], batch["totals"],
+                               batch["process_mask"], batch["resource_mask"])
+    deadlocked = detect_deadlocks_batch(batch["allocation"], batch["request"], batch["available"],
+                                        batch["process_mask"])
+    for b in range(300):
+        rag = rag_from_batch(batch, b)
+        np.testing.assert_allclose(X[b], extract_features(rag))
+        safe, _ = rag.is_safe()
+        assert deadlocked[b].any() == (not safe)
+
+def test_generated_shards_resume_and_reproduce(tmp_path):
+    out_dir = str(tmp_path / "shards")
+    first = RAG_ML.generate_shards(2500, out_dir, shard_size=1000, workers=1, seed=3)
+    assert first["generated"] == 2500 and first["skipped"] == 0
+    with np.load(first["shards"][1]) as data:
+        X, y = data["X"], data["y"]
+    assert X.shape == (1000, 23) and set(np.unique(y)) <= {0, 1}
+
+    # A rerun skips finished shards and regenerates a missing one identically
+    tmp_path.joinpath("shards", "shard-00001.npz").unlink()
+    second = RAG_ML.generate_shards(2500, out_dir, shard_size=1000, workers=1, seed=3)
+    assert second["generated"] == 1000 and second["skipped"] == 2
+    with np.load(second["shards"][1]) as data:
+        np.testing.assert_array_equal(data["X"], X)
+        np.testing.assert_array_equal(data["y"], y)
@@ -0,0 +1,39 @@
+import os
+import joblib
+import pytest
+import RAG_ML
+from RAG_ML import DeadlockPredictor
+
+CHECKPOINT = "checkpoint.joblib"
+
+def test_completed_run_removes_its_checkpoint_and_reruns_from_scratch(shards):
+    first = DeadlockPredictor().train_on_shards(shards, trees_per_shard=2, checkpoint=CHECKPOINT)
+    assert first["samples"] == 3000 and first["trees"] == 6
+    assert not os.path.exists(CHECKPOINT)
+
+    second = DeadlockPredictor().train_on_shards(shards, trees_per_shard=2, checkpoint=CHECKPOINT)
+    assert second["samples"] == 3000 and second["trees"] == 6
+
+def test_interrupted_run_resumes_after_the_learned_shards(shards, monkeypatch):
+    real_load_shards = RAG_ML.load_shards
+    def crash_after_first(paths):
+        loaded = real_load_shards(paths)
+        yield next(loaded)
+        raise KeyboardInterrupt
+    monkeypatch.setattr(RAG_ML, "load_shards", crash_after_first)
+    with pytest.raises(KeyboardInterrupt):
+        DeadlockPredictor().train_on_shards(shards, trees_per_shard=2, checkpoint=CHECKPOINT)
+    assert os.path.exists(CHECKPOINT)
+
+    monkeypatch.setattr(RAG_ML, "load_shards", real_load_shards)
+    resumed = DeadlockPredictor().train_on_shards(shards, trees_per_shard=2, checkpoint=CHECKPOINT)
+    assert resumed["samples"] == 2000 and resumed["trees"] == 6
+    assert not os.path.exists(CHECKPOINT)
+
+def test_checkpoint_for_other_shards_is_ignored(shards):
+    predictor = DeadlockPredictor()
+    predictor.train_on_shards(shards[:2], trees_per_shard=2, checkpoint=None)
+    joblib.dump({"model": predictor.model, "shards_done": 2, "shards": [os.path.abspath(p) for p in shards[:2]]},
+                CHECKPOINT)
+    result = DeadlockPredictor().train_on_shards(shards, trees_per_shard=2, checkpoint=CHECKPOINT)
+    assert result["samples"] == 3000 and result["trees"] == 6